@@ -0,0 +1,79 @@
+"""
+Match_ID / Payment_ID normalizasyonu: eski satır bazlı yol ile toplu yolun
+karşılaştırması.
+
+Kullanım:
+    python benchmarks/anahtar_benchmark.py [--adet 1000000] [--cache]
+
+--cache verilirse eski yol gerçek uygulamadaki gibi `st.cache_data` ile
+sarılmış fonksiyon üzerinden ölçülür (streamlit kurulu olmalı; çok yavaştır).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.anahtar import match_id_serisi, payment_id_serisi, referans_no_temizle
+
+
+def ornek_referanslar(adet, tohum=42):
+    rnd = random.Random(tohum)
+    onekler = ["FTR", "ABC2024/", "", "00", "EFT-", "Havale "]
+    degerler = []
+    for _ in range(adet):
+        r = rnd.random()
+        if r < 0.05:
+            degerler.append(None)
+        elif r < 0.08:
+            degerler.append("  ")
+        elif r < 0.12:
+            degerler.append(rnd.choice(["NAKİT", "mahsup", "Kredi Kartı"]))
+        else:
+            degerler.append(f"{rnd.choice(onekler)}{rnd.randint(0, 10**9):0{rnd.randint(3, 12)}d}")
+    return pd.Series(degerler, dtype=object)
+
+
+def olc(ad, fn):
+    t0 = time.perf_counter()
+    sonuc = fn()
+    sure = time.perf_counter() - t0
+    print(f"{ad:<32} {sure:8.3f} sn")
+    return sonuc, sure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--adet", type=int, default=1_000_000)
+    parser.add_argument("--cache", action="store_true", help="eski yolu st.cache_data ile ölç")
+    args = parser.parse_args()
+
+    seri = ornek_referanslar(args.adet)
+    belge = seri.astype(str)
+    print(f"{args.adet:,} referans")
+
+    ref_fn = referans_no_temizle
+    if args.cache:
+        import streamlit as st
+        ref_fn = st.cache_data(referans_no_temizle)
+
+    eski_pay, t_eski_pay = olc("Payment_ID eski (.apply)", lambda: seri.apply(ref_fn))
+    yeni_pay, t_yeni_pay = olc("Payment_ID yeni (toplu)", lambda: payment_id_serisi(seri))
+
+    eski_mid, t_eski_mid = olc(
+        "Match_ID eski (.apply + regex)",
+        lambda: belge.apply(lambda x: ''.join(filter(str.isdigit, str(x)))).replace(r'^0+', '', regex=True),
+    )
+    yeni_mid, t_yeni_mid = olc("Match_ID yeni (toplu)", lambda: match_id_serisi(belge))
+
+    assert eski_pay.tolist() == yeni_pay.tolist(), "Payment_ID sonuçları farklı"
+    assert eski_mid.tolist() == yeni_mid.tolist(), "Match_ID sonuçları farklı"
+    print(f"Hızlanma: Payment_ID x{t_eski_pay / t_yeni_pay:.1f}, Match_ID x{t_eski_mid / t_yeni_mid:.1f}")
+
+
+if __name__ == "__main__":
+    main()
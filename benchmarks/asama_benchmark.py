@@ -0,0 +1,178 @@
+"""
+Mutabakat akışının aşama aşama süre ve bellek ölçümü.
+
+Her boyut için sentetik iki defter üretilir (bkz. benchmarks/sentetik.py),
+seçilen biçimde bayta yazılır ve şu aşamalar ayrı ayrı ölçülür:
+okuma, veri_hazirla, grupla, fatura (merge), odeme, ozet, disa_aktarim.
+
+Kullanım:
+    python benchmarks/asama_benchmark.py --satir 10000 100000 1000000 [--bicim csv] \\
+        [--disa-aktarim xlsx|parquet|csv.gz|yok] [--bellek] [--cikti sonuclar.jsonl]
+
+Sonuçlar JSON lines olarak --cikti dosyasına eklenir (satır başına bir
+aşama; sürüm, boyut ve ortam bilgisiyle). Böylece sürümler arası
+gerilemeler aynı dosyadan izlenebilir. --bellek verilirse her aşama
+tracemalloc altında bir kez daha çalıştırılıp tepe bellek ölçülür (süre
+ölçümü izlemesiz çalıştırmadan alınır).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sentetik import AYARLAR, defterler_uret, dosyaya_yaz
+from motor import okuyucular
+from motor.aktarim import tablo_baytlari
+from motor.cli import karsi_rol, taraf_ayarlari
+from motor.mutabakat import faturalari_eslestir, grupla, hazirla, odemeleri_eslestir, ozetle
+from motor.rapor import excel_yaz, rapor_sayfalari
+from motor.sonuc import tablolari_birlestir
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def surum():
+    try:
+        return subprocess.run(["git", "-C", KOK, "describe", "--always", "--dirty"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _maxrss_mb():
+    # Linux'ta KB, macOS'ta bayt
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _satir_sayisi(sonuc):
+    if isinstance(sonuc, pd.DataFrame):
+        return len(sonuc)
+    if isinstance(sonuc, (tuple, list)):
+        return sum(_satir_sayisi(s) for s in sonuc)
+    if hasattr(sonuc, "ham"):
+        return len(sonuc.ham)
+    if hasattr(sonuc, "eslesen"):
+        return len(sonuc.eslesen)
+    return None
+
+
+def olc(ad, fn, bellek=False):
+    """fn'i çalıştırır → (sonuç, ölçüm kaydı)."""
+    t0 = time.perf_counter()
+    sonuc = fn()
+    kayit = {"asama": ad, "sure_sn": round(time.perf_counter() - t0, 4),
+             "cikti_satir": _satir_sayisi(sonuc), "maxrss_mb": _maxrss_mb()}
+    if bellek:
+        tracemalloc.start()
+        fn()
+        kayit["bellek_tepe_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+    return sonuc, kayit
+
+
+def _disa_aktar(tablolar, bicim):
+    if bicim == "xlsx":
+        excel_yaz(io.BytesIO(), rapor_sayfalari(tablolar))
+        return
+    for df in tablolar.values():
+        tablo_baytlari(df, bicim)
+
+
+def asamalari_olc(satir, bicim="csv", disa_aktarim="xlsx", bellek=False, eslesme_orani=0.85, tohum=42):
+    """Tek boyut için aşama kayıtları listesi."""
+    df_biz, df_onlar = defterler_uret(satir, eslesme_orani=eslesme_orani, tohum=tohum)
+    veriler = {}
+    for ad, df in (("biz", df_biz), ("onlar", df_onlar)):
+        with tempfile.TemporaryDirectory() as klasor:
+            yol = os.path.join(klasor, f"{ad}.{bicim}")
+            dosyaya_yaz(df, yol)
+            with open(yol, "rb") as f:
+                veriler[ad] = (f.read(), os.path.basename(yol))
+    del df_biz, df_onlar
+
+    rol = AYARLAR["rol"]
+    cf_biz, ex_biz = taraf_ayarlari(AYARLAR["biz"], rol)
+    cf_onlar, ex_onlar = taraf_ayarlari(AYARLAR["onlar"], karsi_rol(rol))
+
+    kayitlar = []
+
+    def asama(ad, fn):
+        sonuc, kayit = olc(ad, fn, bellek)
+        kayitlar.append(kayit)
+        return sonuc
+
+    d_biz, d_onlar = asama("okuma", lambda: tuple(okuyucular.oku(v, yol) for v, yol in veriler.values()))
+    kayitlar[-1]["girdi_bayt"] = sum(len(v) for v, _ in veriler.values())
+    biz, onlar = asama("veri_hazirla", lambda: (hazirla(d_biz, cf_biz, "Biz", ex_biz),
+                                                hazirla(d_onlar, cf_onlar, "Onlar", ex_onlar)))
+    grp_biz, grp_onlar = asama("grupla", lambda: (grupla(biz), grupla(onlar)))
+    fatura = asama("fatura", lambda: faturalari_eslestir(
+        grp_biz, grp_onlar, rol, biz.doviz_aktif or onlar.doviz_aktif, biz.ekstra, onlar.ekstra))
+    odeme = asama("odeme", lambda: odemeleri_eslestir(biz, onlar))
+    ozet = asama("ozet", lambda: ozetle(biz, onlar))
+    if disa_aktarim != "yok":
+        tablolar = {"ozet": ozet, "eslesen": fatura.eslesen, "odeme": odeme.eslesen,
+                    "un_biz": tablolari_birlestir(fatura.bizde_var, odeme.bizde_var),
+                    "un_onlar": tablolari_birlestir(fatura.onlarda_var, odeme.onlarda_var)}
+        asama("disa_aktarim", lambda: _disa_aktar(tablolar, disa_aktarim))
+
+    girdi_satir = len(d_biz) + len(d_onlar)
+    for k in kayitlar:
+        k.update(satir=satir, girdi_satir=girdi_satir)
+    return kayitlar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--satir", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--bicim", default="csv", choices=["csv", "tsv", "xlsx", "parquet"],
+                        help="Okuma aşamasında kullanılan dosya biçimi (xlsx ≤ 1M satır)")
+    parser.add_argument("--disa-aktarim", default="xlsx", choices=["xlsx", "parquet", "csv.gz", "yok"])
+    parser.add_argument("--eslesme-orani", type=float, default=0.85)
+    parser.add_argument("--tohum", type=int, default=42)
+    parser.add_argument("--bellek", action="store_true", help="aşama başına tepe bellek (tracemalloc)")
+    parser.add_argument("--cikti", help="Sonuçların ekleneceği JSON lines dosyası")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")  # arayüzdeki gibi (tarih biçimi uyarıları ölçümü kirletmesin)
+
+    ortak = {
+        "zaman": datetime.now().isoformat(timespec="seconds"),
+        "surum": surum(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "bicim": args.bicim,
+        "disa_aktarim": args.disa_aktarim,
+        "eslesme_orani": args.eslesme_orani,
+    }
+    print(f"{'satır':>10} {'aşama':<14} {'süre (sn)':>10} {'çıktı satır':>12} {'tepe MB':>8}")
+    for satir in args.satir:
+        kayitlar = asamalari_olc(satir, args.bicim, args.disa_aktarim, args.bellek,
+                                 args.eslesme_orani, args.tohum)
+        toplam = sum(k["sure_sn"] for k in kayitlar)
+        for k in kayitlar:
+            print(f"{satir:>10,} {k['asama']:<14} {k['sure_sn']:>10.3f} {k['cikti_satir'] or '':>12} "
+                  f"{k.get('bellek_tepe_mb', ''):>8}")
+        print(f"{satir:>10,} {'TOPLAM':<14} {toplam:>10.3f}")
+        if args.cikti:
+            with open(args.cikti, "a", encoding="utf-8") as f:
+                for k in kayitlar:
+                    f.write(json.dumps(dict(ortak, **k), ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benzer belge no geçişi (motor/benzer.py): süre ve yakalama oranı.
+
+Her iki tarafta da tam anahtarla eşleşmeyen satırlar üretilir: karşı
+taraf belge numarasını sıfır ekleyerek/atarak, önek değiştirerek, iki
+rakamı yer değiştirerek ya da bir rakamı yanlış yazarak girer; bir kısmı
+hiç karşılığı olmayan gürültüdür.
+
+Kullanım:
+    python benchmarks/benzer_benchmark.py [--adet 100000] [--gurultu 0.2]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.benzer import BenzerAyarlari, benzer_eslestir
+
+
+def _bozulmus(no, rng):
+    """Karşı tarafın yazım hataları; rakam kısmı `no`dan türetilir."""
+    tur = rng.integers(5)
+    if tur == 0:                                   # sıfır dolgusu: 2024000123 ↔ 2024123
+        return f"FTR{no[:4]}000{no[4:].lstrip('0')}"
+    if tur == 1:                                   # komşu iki rakam yer değiştirmiş
+        i = int(rng.integers(len(no) - 1))
+        return no[:i] + no[i + 1] + no[i] + no[i + 2:]
+    if tur == 2:                                   # tek rakam yanlış
+        i = int(rng.integers(len(no)))
+        return no[:i] + str((int(no[i]) + 1) % 10) + no[i + 1:]
+    if tur == 3:                                   # son rakam eksik
+        return "ABC-" + no[:-1]
+    return f"{no[:4]}/{no[4:]}"                    # farklı ayraç, aynı rakamlar
+
+
+def kalanlar_uret(adet, gurultu=0.2, tohum=42):
+    rng = np.random.default_rng(tohum)
+    nolar = [f"{2020 + rng.integers(5)}{n:06d}" for n in rng.choice(10**6, adet, replace=False)]
+    tutar = np.round(rng.lognormal(8, 1.5, adet), 2)
+    tarih = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, adet), unit="D")
+    biz = pd.DataFrame({'Orijinal_Belge_No': nolar, 'Borc': 0.0, 'Alacak': tutar,
+                        'Para_Birimi': "TRY", 'Tarih': tarih})
+
+    karsilikli = rng.random(adet) >= gurultu
+    onlar_no = [_bozulmus(no, rng) if k else f"X{rng.integers(10**9)}" for no, k in zip(nolar, karsilikli)]
+    onlar_tutar = np.where(karsilikli & (rng.random(adet) < 0.1), tutar * 1.005, tutar)
+    onlar_tutar = np.where(karsilikli, onlar_tutar, np.round(rng.lognormal(8, 1.5, adet), 2))
+    onlar = pd.DataFrame({'Orijinal_Belge_No': onlar_no, 'Borc': onlar_tutar, 'Alacak': 0.0,
+                          'Para_Birimi': "TRY", 'Tarih': tarih + pd.to_timedelta(rng.integers(0, 5, adet), unit="D")})
+    # Karşı taraf farklı sırada
+    sira = rng.permutation(adet)
+    onlar = onlar.iloc[sira].reset_index(drop=True)
+    dogru = pd.Series(np.argsort(sira))[karsilikli]  # biz poz → onlar poz
+    return biz, onlar, dogru
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--adet", type=int, default=100_000, help="taraf başına eşleşmeyen satır")
+    parser.add_argument("--gurultu", type=float, default=0.2, help="karşılığı olmayan satır oranı")
+    args = parser.parse_args()
+
+    biz, onlar, dogru = kalanlar_uret(args.adet, args.gurultu)
+    print(f"{args.adet:,} × {args.adet:,} eşleşmeyen satır, {len(dogru):,} gerçek çift")
+
+    t0 = time.perf_counter()
+    sonuc = benzer_eslestir(biz, onlar, BenzerAyarlari())
+    sure = time.perf_counter() - t0
+
+    bulunan = pd.Series(sonuc['poz_onlar'].to_numpy(), index=sonuc['poz_biz'].to_numpy())
+    isabet = int((bulunan.reindex(dogru.index) == dogru).sum())
+    print(f"{'benzer_eslestir':<32} {sure:8.3f} sn")
+    print(f"{'eşleşen çift':<32} {len(sonuc):8,}")
+    print(f"{'yakalama (recall)':<32} {isabet / max(len(dogru), 1):8.1%}")
+    print(f"{'kesinlik (precision)':<32} {isabet / max(len(sonuc), 1):8.1%}")
+
+
+if __name__ == "__main__":
+    main()
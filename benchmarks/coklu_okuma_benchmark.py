@@ -0,0 +1,74 @@
+"""
+Çok dosyalı okuma (motor/okuma.py `dosyalari_oku`): sıralı ve paralel süre.
+
+Sentetik karşı taraf defteri (bkz. benchmarks/sentetik.py) aylık
+ekstreler gibi --dosya adet xlsx dosyasına bölünür. Dosyalar önce tek
+süreçte (is_sayisi=1), sonra süreç havuzunda okunur; her ölçümden önce
+önbellek boşaltılır. İki sonucun birebir aynı olduğu kontrol edilir,
+ardından önbellekten ikinci okuma (rerun) ölçülür.
+
+Kullanım:
+    python benchmarks/coklu_okuma_benchmark.py [--satir 120000] [--dosya 12]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sentetik import defterler_uret
+from motor.okuma import dosyalari_oku, onbellek
+
+
+class BellekDosyasi(io.BytesIO):
+    """Yüklenen dosya gibi (.name / .getvalue())."""
+
+    def __init__(self, veri, name):
+        super().__init__(veri)
+        self.name = name
+
+
+def aylik_dosyalar(df, adet):
+    dosyalar = []
+    for i, parca in enumerate(np.array_split(np.arange(len(df)), adet), 1):
+        tampon = io.BytesIO()
+        df.iloc[parca].to_excel(tampon, index=False)
+        dosyalar.append(BellekDosyasi(tampon.getvalue(), f"ekstre_{i:02d}.xlsx"))
+    return dosyalar
+
+
+def olc(dosyalar, **secenekler):
+    t0 = time.perf_counter()
+    df, _ = dosyalari_oku(dosyalar, **secenekler)
+    return df, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--satir", type=int, default=120_000)
+    parser.add_argument("--dosya", type=int, default=12)
+    args = parser.parse_args()
+
+    _, df_onlar = defterler_uret(args.satir)
+    dosyalar = aylik_dosyalar(df_onlar, args.dosya)
+    print(f"{args.dosya} dosya, {len(df_onlar):,} satır, {os.cpu_count()} çekirdek")
+
+    onbellek.temizle()
+    df_sirali, t_sirali = olc(dosyalar, is_sayisi=1)
+    onbellek.temizle()
+    df_paralel, t_paralel = olc(dosyalar)
+    _, t_rerun = olc(dosyalar)
+    pd.testing.assert_frame_equal(df_sirali, df_paralel, check_exact=True)
+
+    print(f"  sıralı          {t_sirali:8.3f} sn")
+    print(f"  paralel         {t_paralel:8.3f} sn ({t_sirali / t_paralel:.2f}x)")
+    print(f"  önbellekten     {t_rerun:8.3f} sn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Toplu ödeme dağıtımı (motor/dagitim.py): süre, bulunan grup oranı ve
+süre bütçesinin patolojik girdide devreye girmesi.
+
+1'e 1 eşleşmeden kalmış ödemeler üretilir: her grupta bir taraftaki tek
+ödeme karşı tarafta 2-5 parçaya bölünmüştür (yarısı biz → onlar, yarısı
+tersi); parçaların valörü hedefin ±3 günü içindedir. Ayrıca karşılığı
+olmayan gürültü ödemeleri eklenir. --patolojik ile tüm tutarlar aynı
+küçük değer kümesinden seçilir (her hedef için çok sayıda çözüm adayı).
+
+Kullanım:
+    python benchmarks/dagitim_benchmark.py [--grup 300] [--gurultu 600] [--patolojik]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.dagitim import DagitimAyarlari, odeme_dagit
+
+
+def odemeler_uret(grup, gurultu, patolojik=False, tohum=42):
+    rng = np.random.default_rng(tohum)
+    satirlar = {0: [], 1: []}  # taraf → (tutar, tarih, grup no)
+    bas = np.datetime64("2024-01-01")
+    for g in range(grup):
+        parca = int(rng.integers(2, 6))
+        if patolojik:
+            tutarlar = rng.choice([100.0, 200.0, 300.0, 400.0], parca)
+        else:
+            tutarlar = np.round(rng.lognormal(7, 1.2, parca), 2)
+        gun = int(rng.integers(0, 365))
+        hedef_taraf = g % 2
+        satirlar[hedef_taraf].append((round(float(tutarlar.sum()), 2), bas + gun, g))
+        for t in tutarlar:
+            satirlar[1 - hedef_taraf].append((float(t), bas + gun + int(rng.integers(-3, 4)), g))
+    for i in range(gurultu):
+        tutar = float(rng.choice([100.0, 200.0, 300.0, 400.0])) if patolojik else round(float(rng.lognormal(7, 1.5)), 2)
+        satirlar[i % 2].append((tutar, bas + int(rng.integers(0, 365)), -1))
+
+    def tablo(s):
+        sira = rng.permutation(len(s))
+        tutar, tarih, g = (np.array(x) for x in zip(*[s[i] for i in sira]))
+        return pd.DataFrame({'Borc': tutar, 'Alacak': 0.0, 'Para_Birimi': "TRY",
+                             'Tarih_Odeme': pd.to_datetime(tarih), 'Payment_ID': None}), g
+
+    (biz, g_biz), (onlar, g_onlar) = tablo(satirlar[0]), tablo(satirlar[1])
+    return biz, onlar, g_biz, g_onlar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--grup", type=int, default=300, help="bölünmüş ödeme grubu sayısı")
+    parser.add_argument("--gurultu", type=int, default=600, help="karşılığı olmayan ödeme sayısı")
+    parser.add_argument("--patolojik", action="store_true", help="aynı küçük tutar kümesinden tutarlar")
+    parser.add_argument("--blok-suresi", type=float, default=DagitimAyarlari.blok_suresi)
+    args = parser.parse_args()
+
+    biz, onlar, g_biz, g_onlar = odemeler_uret(args.grup, args.gurultu, args.patolojik)
+    print(f"{len(biz):,} + {len(onlar):,} eşleşmeyen ödeme, {args.grup:,} gerçek grup")
+    bos = (np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+
+    t0 = time.perf_counter()
+    sonuc = odeme_dagit(biz, onlar, bos, ayarlar=DagitimAyarlari(blok_suresi=args.blok_suresi))
+    sure = time.perf_counter() - t0
+
+    u = sonuc.uyelik
+    gercek = np.empty(len(u), dtype=np.int64)
+    biz_mi = u['taraf'].eq("Biz").to_numpy()
+    gercek[biz_mi] = g_biz[u['poz'].to_numpy()[biz_mi]]
+    gercek[~biz_mi] = g_onlar[u['poz'].to_numpy()[~biz_mi]]
+    dogru = pd.Series(gercek).groupby(u['grup'].to_numpy()).agg(lambda g: g.nunique() == 1 and g.iloc[0] >= 0)
+    print(f"{'odeme_dagit':<32} {sure:8.3f} sn")
+    print(f"{'bulunan grup':<32} {u['grup'].nunique():8,}")
+    print(f"{'  gerçek grupla birebir':<32} {int(dogru.sum()):8,}")
+    print(f"{'süre bütçesiyle atlanan hedef':<32} {sonuc.atlanan:8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Dosya biçimi gidiş-dönüş kontrolü: sentetik defterler (bkz.
+benchmarks/sentetik.py) diske yazılıp `motor.okuyucular.oku` ile geri
+okunur, iki taraf da `hazirla`'dan geçirilir ve tutarlar (Borç, Alacak,
+Döviz tutarı) bellekteki defterlerin hazırlığıyla satır satır
+karşılaştırılır. Nokta ondalıklı CSV tutarlarının Türkçe ayrıştırıcıda
+100 kat büyümesi gibi sessiz okuma hataları burada yakalanır; fark varsa
+betik hata koduyla çıkar.
+
+Kullanım:
+    python benchmarks/dosya_gidis_donus.py [--satir 5000] [--bicim csv tsv parquet xlsx]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sentetik import AYARLAR, defterler_uret, dosyaya_yaz
+from motor import okuyucular
+from motor.cli import karsi_rol, taraf_ayarlari
+from motor.mutabakat import hazirla
+
+KONTROL_KOLONLARI = ("Borc", "Alacak", "Doviz_Tutari")
+
+
+def hazir_tutarlar(df, taraf, ad):
+    config, ekstra = taraf_ayarlari(AYARLAR[taraf], AYARLAR["rol"] if taraf == "biz" else karsi_rol(AYARLAR["rol"]))
+    ham = hazirla(df, config, ad, ekstra).ham
+    return {c: ham[c].to_numpy(dtype=np.float64) for c in KONTROL_KOLONLARI}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--satir", type=int, default=5_000)
+    parser.add_argument("--bicim", nargs="+", default=["csv", "tsv", "parquet", "xlsx"])
+    parser.add_argument("--tohum", type=int, default=42)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    defterler = dict(zip(("biz", "onlar"), defterler_uret(args.satir, tohum=args.tohum)))
+    beklenen = {taraf: hazir_tutarlar(df, taraf, taraf.title()) for taraf, df in defterler.items()}
+    hatali = False
+    with tempfile.TemporaryDirectory() as klasor:
+        for bicim in args.bicim:
+            if bicim == "parquet" and not okuyucular.importlib.util.find_spec("pyarrow"):
+                print(f"{bicim:<8} atlandı (pyarrow yok)")
+                continue
+            for taraf, df in defterler.items():
+                yol = os.path.join(klasor, f"{taraf}.{bicim}")
+                dosyaya_yaz(df, yol)
+                with open(yol, "rb") as f:
+                    okunan = okuyucular.oku(f.read(), yol)
+                gelen = hazir_tutarlar(okunan, taraf, taraf.title())
+                for kolon, deger in beklenen[taraf].items():
+                    esit = np.array_equal(gelen[kolon], deger)
+                    hatali |= not esit
+                    print(f"{bicim:<8} {taraf:<6} {kolon:<12} toplam {gelen[kolon].sum():>18,.2f} "
+                          f"(beklenen {deger.sum():,.2f}) {'tamam' if esit else 'FARK'}")
+    return 1 if hatali else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
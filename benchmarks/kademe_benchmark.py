@@ -0,0 +1,79 @@
+"""
+Fatura eşleştirme kademesi (motor/kademe.py): geçiş başına süre ve eşleşme.
+
+Sentetik defterlerde (bkz. benchmarks/sentetik.py) karşı tarafın
+faturalarının bir kısmında belge no açıklamaya taşınır ("KAYIT" yazılır),
+bir kısmında belge no boş bırakılır. Önce varsayılan kademe (Match_ID →
+Belge No), sonra tüm kurallar çalıştırılır; açıklama geçişinin bulduğu
+çiftlerin doğruluğu belge numarasından kontrol edilir.
+
+Kullanım:
+    python benchmarks/kademe_benchmark.py [--satir 100000] [--aciklama 0.1] [--bos 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sentetik import AYARLAR, defterler_uret
+from motor.anahtar import match_id_serisi
+from motor.cli import karsi_rol, taraf_ayarlari
+from motor.mutabakat import faturalari_eslestir, grupla, hazirla
+
+TUM_KURALLAR = ["match_id", "belge_no", {"tur": "aciklama", "kolon": "Açıklama"},
+                {"tur": "tutar_tarih", "gun": 3}, "benzer"]
+
+
+def bozulmus_onlar(df, aciklama_orani, bos_orani, tohum=1):
+    """Karşı tarafın belge no'lu faturalarından seçilenler: açıklamaya taşınmış / boş belge no."""
+    rng = np.random.default_rng(tohum)
+    df = df.copy()
+    fatura = np.flatnonzero((df["Fatura No"].astype(str).str.contains(r"\d") & df["Referans"].isna()).to_numpy())
+    secim = rng.permutation(fatura)
+    n_ac, n_bos = int(len(fatura) * aciklama_orani), int(len(fatura) * bos_orani)
+    acik, bos = df.index[secim[:n_ac]], df.index[secim[n_ac:n_ac + n_bos]]
+    df.loc[acik, "Açıklama"] = "Fatura " + df.loc[acik, "Fatura No"].astype(str) + " hk."
+    df.loc[acik, "Fatura No"] = "KAYIT"
+    df.loc[bos, "Fatura No"] = None
+    return df, n_ac, n_bos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--satir", type=int, default=100_000)
+    parser.add_argument("--aciklama", type=float, default=0.1, help="belge no'su açıklamaya taşınan fatura oranı")
+    parser.add_argument("--bos", type=float, default=0.05, help="belge no'su boş bırakılan fatura oranı")
+    args = parser.parse_args()
+
+    df_biz, df_onlar = defterler_uret(args.satir)
+    df_onlar, n_ac, n_bos = bozulmus_onlar(df_onlar, args.aciklama, args.bos)
+    rol = AYARLAR["rol"]
+    cb, eb = taraf_ayarlari(AYARLAR["biz"], rol)
+    co, eo = taraf_ayarlari(AYARLAR["onlar"], karsi_rol(rol))
+    biz, onlar = hazirla(df_biz, cb, "Biz", eb), hazirla(df_onlar, co, "Onlar", eo)
+    grp_biz, grp_onlar = grupla(biz), grupla(onlar)
+    print(f"{len(grp_biz):,} × {len(grp_onlar):,} gruplanmış satır; açıklamada {n_ac:,}, boş belge no {n_bos:,}")
+
+    for ad, kurallar in (("varsayılan", None), ("tüm kurallar", TUM_KURALLAR)):
+        t0 = time.perf_counter()
+        fatura = faturalari_eslestir(grp_biz, grp_onlar, rol, True, eb, eo, kurallar=kurallar)
+        sure = time.perf_counter() - t0
+        print(f"\n{ad}: {len(fatura.eslesen):,} eşleşen, {sure:.3f} sn")
+        for g in fatura.gecisler:
+            print(f"  {g['kural']:<28} {g['eslesen']:8,} {g['sure_sn']:8.3f} sn")
+
+        e = fatura.eslesen
+        acik = e[e["Kural"].astype(str) == "Açıklamada Belge No"]
+        if len(acik):
+            no_biz = match_id_serisi(acik["Belge No"]).to_numpy()
+            no_acik = match_id_serisi(acik["KARŞI: Açıklama"].str.split().str[1]).to_numpy()
+            print(f"  açıklama geçişi kesinliği: {np.mean(no_biz == no_acik):.1%}, "
+                  f"yakalama: {len(acik) / max(n_ac, 1):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Kolon eşleştirme hafızası (motor/kolon_hafizasi.py): arama süresi ve
+eşzamanlı kayıt tutarlılığı.
+
+Geçici bir depoya --duzen adet farklı başlık düzeni kaydedilir, sonra
+rastgele düzenler için arama süresi ölçülür. Ardından --surec süreç aynı
+depoya aynı anda kayıt yazar (oturumların Başlat'ı gibi); sonunda her
+kaydın bulunduğu ve içeriğinin doğru olduğu kontrol edilir.
+
+Kullanım:
+    python benchmarks/kolon_hafizasi_benchmark.py [--duzen 5000] [--surec 8] [--kayit 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.kolon_hafizasi import KolonHafizasi
+
+
+def duzen(i):
+    """i. sentetik başlık satırı ve ona ait kolon seçimleri."""
+    kolonlar = ["Tarih", "Belge No", "Borç", "Alacak", f"Açıklama {i}", f"Şube {i % 97}"]
+    return kolonlar, {"tarih_col": "Tarih", "belge_col": "Belge No", "borc_col": "Borç",
+                      "alacak_col": "Alacak", "no": i}
+
+
+def yaz(yol, baslangic, adet):
+    hafiza = KolonHafizasi(yol)
+    for i in range(baslangic, baslangic + adet):
+        kolonlar, ayarlar = duzen(i)
+        hafiza.kaydet("onlar", kolonlar, f"ekstre_{i}.xlsx", ayarlar)
+    return adet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duzen", type=int, default=5_000)
+    parser.add_argument("--surec", type=int, default=8)
+    parser.add_argument("--kayit", type=int, default=200, help="süreç başına eşzamanlı kayıt")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as klasor:
+        yol = os.path.join(klasor, "hafiza.db")
+        t0 = time.perf_counter()
+        yaz(yol, 0, args.duzen)
+        t_yaz = time.perf_counter() - t0
+        hafiza = KolonHafizasi(yol)
+
+        ornek = random.Random(1).sample(range(args.duzen), min(1_000, args.duzen))
+        t0 = time.perf_counter()
+        bulunan = [hafiza.bul("onlar", list(reversed(duzen(i)[0])))["no"] for i in ornek]
+        t_bul = (time.perf_counter() - t0) / len(ornek)
+        assert bulunan == ornek
+        print(f"{args.duzen:,} düzen: kayıt {t_yaz / args.duzen * 1e3:.2f} ms, arama {t_bul * 1e3:.3f} ms")
+
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.surec) as havuz:
+            baslangiclar = [args.duzen + s * args.kayit for s in range(args.surec)]
+            list(havuz.map(yaz, [yol] * args.surec, baslangiclar, [args.kayit] * args.surec))
+        t_es = time.perf_counter() - t0
+        toplam = args.duzen + args.surec * args.kayit
+        eksik = [i for i in range(toplam) if hafiza.bul("onlar", duzen(i)[0]).get("no") != i]
+        print(f"{args.surec} süreç × {args.kayit} eşzamanlı kayıt: {t_es:.2f} sn, "
+              f"depoda {len(hafiza):,}/{toplam:,} düzen, kayıp {len(eksik)}")
+    return 1 if eksik else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Hesap motorları (pandas / polars, bkz. motor/polars_motoru.py): sonuç
+eşitliği kontrolü ve aşama süreleri.
+
+Önce eşitlik kontrolü: sentetik defterler (bkz. benchmarks/sentetik.py)
+ve bunlardan türetilen uç durumlar (SENARYOLAR: ek kolonu tamamen boş ya
+da grup içinde karışık, hiç Match_ID yok, sadece dövizli satırlar,
+ödemesiz) her ek kolon gruplamasıyla iki motordan geçirilir; hazırlık ve gruplama çıktıları ile
+tüm sonuç tabloları `assert_frame_equal(check_exact=True)` ile
+karşılaştırılır (kolon sırası ve tipleri dahil). Fark varsa betik hata
+koduyla çıkar; --sadece-kontrol ile süre ölçümü atlanır.
+
+Sonra --satir boylarında süreler. Polars motoru sadece hazırlıkta anahtar
+normalizasyonunu ve gruplamada 'join' birleştirmesini üstlenir; özet,
+fatura ve ödeme eşleştirmesi iki motorda aynı koddur, o yüzden bu
+aşamalar karşılaştırılmadan tek süreyle (pandas koşusu) gösterilir.
+
+Kullanım:
+    python benchmarks/motor_parite.py [--satir 30000 300000] [--gruplama join] [--sadece-kontrol]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sentetik import AYARLAR, defterler_uret
+from motor.cli import karsi_rol, taraf_ayarlari
+from motor.mutabakat import MutabakatSonucu, faturalari_eslestir, grupla, hazirla, odemeleri_eslestir, ozetle
+from motor.polars_motoru import polars_var_mi
+
+# Motora göre değişen aşamalar; diğerleri iki motorda aynı kod
+MOTORA_BAGLI = ("veri_hazirla", "grupla")
+ORTAK = ("ozet", "fatura", "odeme")
+
+
+def _ekstra_bos(b, o):
+    return b.assign(Açıklama=None), o.assign(Açıklama=None)
+
+
+def _ekstra_karisik(b, o):
+    # Grup içinde farklı değerler, boş metin, boşluk ve NaN: 'join' gerçekten birleştirsin
+    def karistir(df):
+        degerler = np.array(["not A", "not B", "", "  ", None, "not A", "İade ß"], dtype=object)
+        return df.assign(Açıklama=degerler[np.arange(len(df)) % len(degerler)])
+    return karistir(b), karistir(o)
+
+
+def _match_id_yok(b, o):
+    # Rakamsız belge no'lar (ödemeler de referansa düşmesin): Match_ID her satırda boş,
+    # eşleştirme Orijinal_Belge_No'ya düşer
+    return b.assign(**{"Belge No": "KAYIT"}), o.assign(**{"Fatura No": "KAYIT"})
+
+
+def _sadece_doviz(b, o):
+    return b[~b["PB"].isin(["TL", "TRY"])], o[~o["PB"].isin(["TL", "TRY"])]
+
+
+def _odemesiz(b, o):
+    return b[b["Referans"].isna()], o[o["Referans"].isna()]
+
+
+SENARYOLAR = {
+    "standart": lambda b, o: (b, o),
+    "ekstra_bos": _ekstra_bos,
+    "ekstra_karisik": _ekstra_karisik,
+    "match_id_yok": _match_id_yok,
+    "sadece_doviz": _sadece_doviz,
+    "odemesiz": _odemesiz,
+}
+
+
+def calistir(df_biz, df_onlar, hesap, gruplama):
+    """Tek motorla tüm akış → (aşama süreleri, karşılaştırılacak tablolar)."""
+    rol = AYARLAR["rol"]
+    cb, eb = taraf_ayarlari(AYARLAR["biz"], rol)
+    co, eo = taraf_ayarlari(AYARLAR["onlar"], karsi_rol(rol))
+    if gruplama:
+        cb['ekstra_gruplama'] = co['ekstra_gruplama'] = {c: gruplama for c in eb}
+    sureler = {}
+
+    def olc(ad, fn):
+        t0 = time.perf_counter()
+        sonuc = fn()
+        sureler[ad] = time.perf_counter() - t0
+        return sonuc
+
+    biz, onlar = olc("veri_hazirla", lambda: (hazirla(df_biz, cb, "Biz", eb, hesap=hesap),
+                                              hazirla(df_onlar, co, "Onlar", eo, hesap=hesap)))
+    grp_biz, grp_onlar = olc("grupla", lambda: (grupla(biz), grupla(onlar)))
+    ozet = olc("ozet", lambda: ozetle(biz, onlar))
+    fatura = olc("fatura", lambda: faturalari_eslestir(grp_biz, grp_onlar, rol, True, biz.ekstra, onlar.ekstra))
+    odeme = olc("odeme", lambda: odemeleri_eslestir(biz, onlar))
+
+    tablolar = {"ham_biz": biz.ham, "ham_onlar": onlar.ham, "odemeler_biz": biz.odemeler,
+                "grp_biz": grp_biz, "grp_onlar": grp_onlar}
+    tablolar.update(MutabakatSonucu(ozet=ozet, fatura=fatura, odeme=odeme, biz=biz, onlar=onlar).tablolar())
+    return sureler, tablolar
+
+
+def farklar(t1, t2):
+    """Aynı adlı tablolardan eşit olmayanlar → {ad: hata mesajı}."""
+    sonuc = {}
+    for ad in t1:
+        try:
+            pd.testing.assert_frame_equal(t1[ad], t2[ad], check_exact=True)
+        except AssertionError as e:
+            sonuc[ad] = str(e).strip().splitlines()[0]
+    return sonuc
+
+
+def kontrol(satir, tohum):
+    """Her senaryo × gruplama için iki motorun çıktılarını karşılaştırır; fark varsa True."""
+    df_biz, df_onlar = defterler_uret(satir, tohum=tohum)
+    hatali = False
+    print(f"Eşitlik kontrolü ({satir:,} satırlık defterlerden)")
+    for senaryo, uret in SENARYOLAR.items():
+        b, o = uret(df_biz, df_onlar)
+        for gruplama in (None, "last", "join", "count"):
+            fark = farklar(calistir(b, o, "pandas", gruplama)[1], calistir(b, o, "polars", gruplama)[1])
+            print(f"  {senaryo:<14} {gruplama or 'first':<6} {len(b):>6}/{len(o):<6} "
+                  f"{'FARK' if fark else 'aynı'}")
+            for ad, mesaj in fark.items():
+                print(f"    {ad}: {mesaj}")
+            hatali |= bool(fark)
+    return hatali
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--satir", type=int, nargs="+", default=[30_000, 300_000])
+    parser.add_argument("--gruplama", choices=["first", "last", "join", "count"],
+                        help="süre ölçümünde ek kolonların grup içi birleştirmesi (varsayılan: first)")
+    parser.add_argument("--kontrol-satir", type=int, default=3_000)
+    parser.add_argument("--sadece-kontrol", action="store_true")
+    parser.add_argument("--tohum", type=int, default=42)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    if not polars_var_mi():
+        sys.exit("polars kurulu değil (pip install polars)")
+
+    # İlk çağrıdaki yükleme (polars modülü, regex derleme) ölçüme girmesin
+    hatali = kontrol(args.kontrol_satir, args.tohum)
+    if args.sadece_kontrol:
+        return 1 if hatali else 0
+
+    for satir in args.satir:
+        df_biz, df_onlar = defterler_uret(satir, tohum=args.tohum)
+        s_pd, t_pd = calistir(df_biz, df_onlar, "pandas", args.gruplama)
+        s_pl, t_pl = calistir(df_biz, df_onlar, "polars", args.gruplama)
+
+        print(f"\n{satir:,} satır{f' (gruplama: {args.gruplama})' if args.gruplama else ''}")
+        print(f"  {'aşama':<14} {'pandas':>9} {'polars':>9} {'hız':>7}")
+        for ad in MOTORA_BAGLI:
+            print(f"  {ad:<14} {s_pd[ad]:>9.3f} {s_pl[ad]:>9.3f} {s_pd[ad] / max(s_pl[ad], 1e-9):>6.2f}x")
+        toplam_pd, toplam_pl = (sum(s[ad] for ad in MOTORA_BAGLI) for s in (s_pd, s_pl))
+        print(f"  {'TOPLAM':<14} {toplam_pd:>9.3f} {toplam_pl:>9.3f} {toplam_pd / toplam_pl:>6.2f}x")
+        for ad in ORTAK:
+            print(f"  {ad:<14} {s_pd[ad]:>9.3f}   (ortak kod)")
+
+        fark = farklar(t_pd, t_pl)
+        for ad, mesaj in fark.items():
+            print(f"  FARK {ad}: {mesaj}")
+        if not fark:
+            print(f"  {len(t_pd)} tablo birebir aynı")
+        hatali |= bool(fark)
+    return 1 if hatali else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Sentetik cari defter üreteci (benchmark ve yük testleri için).
+
+İki taraf da gerçekçi Türkçe defter biçimindedir:
+  - Biz (alıcı): tarih metni "gg.aa.yyyy", tutarlar "1.234,56" metni,
+    Belge No önekli ("FTR000012345", "GIB2024000012345", "A-0012345"),
+    ödemelerde Ödeme Tarihi ve Referans.
+  - Onlar (satıcı): gerçek tarih ve sayı tipleri, belge no farklı
+    biçimde ("12345", "A-0012345", ...).
+Faturaların bir kısmı karşı tarafta yoktur ya da tutar farklıdır; iade
+faturaları, dövizli satırlar, kısmi (bölünmüş) ödemeler ve referansı
+eksik ödemeler vardır. Üretim numpy ile vektörel yapılır; 5M satır
+birkaç saniye/dakika sürer.
+
+Kullanım:
+    python benchmarks/sentetik.py --satir 100000 --klasor /tmp/defterler [--bicim csv|xlsx|parquet]
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Üretilen defterlerin kolon eşleştirmesi (python -m motor --ayarlar biçiminde)
+AYARLAR = {
+    "rol": "Biz Alıcıyız",
+    "biz": {"tarih_col": "Tarih", "belge_col": "Belge No", "tarih_odeme_col": "Ödeme Tarihi",
+            "odeme_ref_col": "Referans", "tutar_tipi": "Ayrı Kolonlar", "borc_col": "Borç",
+            "alacak_col": "Alacak", "doviz_cinsi_col": "PB", "doviz_tutar_col": "Döviz",
+            "ekstra": ["Açıklama"]},
+    "onlar": {"tarih_col": "Tarih", "belge_col": "Fatura No", "odeme_ref_col": "Referans",
+              "tutar_tipi": "Ayrı Kolonlar", "borc_col": "Borç", "alacak_col": "Alacak",
+              "doviz_cinsi_col": "PB", "doviz_tutar_col": "Döviz", "ekstra": ["Açıklama"]},
+}
+
+KURLAR = {"USD": 32.5, "EUR": 35.1, "GBP": 41.0}
+BASLANGIC = np.datetime64("2024-01-01")
+
+
+def turkce_tutar(degerler):
+    """1234.5 → "1.234,50" (NaN → None)."""
+    return [None if d != d else f"{d:,.2f}".translate(_TR_AYIRICI) for d in degerler.tolist()]
+
+
+_TR_AYIRICI = str.maketrans(",.", ".,")
+
+
+def _tarih_metni(tarihler):
+    return pd.Series(tarihler).dt.strftime("%d.%m.%Y").to_numpy(dtype=object)
+
+
+def _belge_biz(no, rng):
+    """Bizim defterdeki belge no biçimleri (rakam kısmı karşı tarafla aynı kalır)."""
+    sayi = pd.Series(no).astype(str)
+    bicim = rng.integers(0, 3, len(no))
+    return np.select(
+        [bicim == 0, bicim == 1],
+        ["FTR" + sayi.str.zfill(9), "GIB2024" + sayi.str.zfill(9)],
+        "A-" + sayi.str.zfill(7),
+    ).astype(object), bicim
+
+
+def _belge_onlar(no, bicim_biz, rng):
+    """Karşı tarafın yazımı: GIB numaraları aynen, diğerleri çıplak ya da farklı önekli."""
+    sayi = pd.Series(no).astype(str)
+    alternatif = rng.random(len(no)) < 0.5
+    return np.where(
+        bicim_biz == 1, "GIB2024" + sayi.str.zfill(9),
+        np.where(alternatif, sayi, "A-" + sayi.str.zfill(7)),
+    ).astype(object)
+
+
+def defterler_uret(satir=10_000, eslesme_orani=0.85, tutar_farki_orani=0.1, odeme_orani=0.3,
+                   iade_orani=0.03, doviz_orani=0.15, kismi_odeme_orani=0.1, ref_eksik_orani=0.1,
+                   tohum=42):
+    """
+    Yaklaşık `satir` satırlık bizim defter ve ona karşılık gelen karşı
+    taraf defteri üretir → (df_biz, df_onlar).
+
+    eslesme_orani: faturaların karşı tarafta da bulunma oranı.
+    tutar_farki_orani: karşı tarafta bulunan faturalardan tutarı farklı olanlar.
+    odeme_orani / iade_orani: satırların ödeme / iade faturası payı.
+    kismi_odeme_orani: bizde iki taksite bölünmüş (aynı referanslı) ödemeler.
+    ref_eksik_orani: karşı tarafta referansı boş ödemeler.
+    """
+    rng = np.random.default_rng(tohum)
+    n_odeme = int(satir * odeme_orani)
+    n_iade = int(satir * iade_orani)
+    n_fatura = max(satir - n_odeme - n_iade, 0)
+    n_belge = n_fatura + n_iade
+
+    # --- Faturalar ve iadeler (belge no benzersiz) ---
+    no = rng.choice(np.arange(1, max(n_belge * 20, 1000)), n_belge, replace=False) if n_belge else np.array([], int)
+    iade = np.zeros(n_belge, dtype=bool)
+    iade[n_fatura:] = True
+    tarih = BASLANGIC + rng.integers(0, 365, n_belge).astype("timedelta64[D]")
+    tutar = np.round(np.exp(rng.normal(8, 1.5, n_belge)), 2)
+    pb = np.where(rng.random(n_belge) < doviz_orani, rng.choice(list(KURLAR), n_belge), "TL").astype(object)
+    kur = pd.Series(pb).map(KURLAR).to_numpy(dtype=float)
+    doviz = np.round(tutar / kur, 2)  # TL satırlarda NaN
+    belge_biz, bicim = _belge_biz(no, rng)
+    belge_biz = np.where(iade, "IAD" + pd.Series(no).astype(str).str.zfill(9), belge_biz).astype(object)
+
+    # Alıcı olarak: fatura → Alacak, iade → Borç (karşı tarafta tersi)
+    fatura_biz = pd.DataFrame({
+        "Tarih": _tarih_metni(tarih),
+        "Belge No": belge_biz,
+        "Borç": turkce_tutar(np.where(iade, tutar, np.nan)),
+        "Alacak": turkce_tutar(np.where(iade, np.nan, tutar)),
+        "PB": pb,
+        "Döviz": doviz,
+        "Referans": None,
+        "Ödeme Tarihi": None,
+        "Açıklama": np.where(iade, "İade faturası", "Alış faturası").astype(object),
+    })
+
+    karsida = rng.random(n_belge) < eslesme_orani
+    fark = karsida & (rng.random(n_belge) < tutar_farki_orani)
+    tutar_onlar = np.where(fark, np.round(tutar + rng.choice([0.5, 3.0, -100.0, 1000.0], n_belge), 2), tutar)
+    fatura_onlar = pd.DataFrame({
+        "Tarih": tarih + rng.integers(0, 3, n_belge).astype("timedelta64[D]"),
+        "Fatura No": _belge_onlar(no, bicim, rng),
+        "Borç": np.where(iade, np.nan, tutar_onlar),
+        "Alacak": np.where(iade, tutar_onlar, np.nan),
+        "PB": np.where(pb == "TL", "TRY", pb).astype(object),
+        "Döviz": doviz,
+        "Referans": None,
+        "Açıklama": np.where(iade, "Satış iadesi", "Satış faturası").astype(object),
+    })[karsida]
+
+    # Sadece karşı tarafta olan faturalar (bizde işlenmemiş)
+    n_sadece = int(n_fatura * (1 - eslesme_orani) * 0.3)
+    no_sadece = (no.max(initial=0) + 1 + np.arange(n_sadece))
+    sadece_onlar = pd.DataFrame({
+        "Tarih": BASLANGIC + rng.integers(0, 365, n_sadece).astype("timedelta64[D]"),
+        "Fatura No": pd.Series(no_sadece).astype(str).to_numpy(dtype=object),
+        "Borç": np.round(np.exp(rng.normal(8, 1.5, n_sadece)), 2),
+        "Alacak": np.nan,
+        "PB": "TRY",
+        "Döviz": np.nan,
+        "Referans": None,
+        "Açıklama": "Satış faturası",
+    })
+
+    # --- Ödemeler ---
+    o_tarih = BASLANGIC + rng.integers(0, 365, n_odeme).astype("timedelta64[D]")
+    o_tutar = np.round(np.exp(rng.normal(9, 1.2, n_odeme)), 2)
+    o_pb = np.where(rng.random(n_odeme) < doviz_orani / 2, rng.choice(list(KURLAR), n_odeme), "TL").astype(object)
+    o_doviz = np.round(o_tutar / pd.Series(o_pb).map(KURLAR).to_numpy(dtype=float), 2)
+    ref = ("EFT" + pd.Series(rng.choice(np.arange(10**7, 10**8), n_odeme, replace=False)
+                             if n_odeme else np.array([], int)).astype(str)).to_numpy(dtype=object)
+    nakit = rng.random(n_odeme) < 0.03
+    ref = np.where(nakit, rng.choice(["NAKİT", "mahsup"], n_odeme), ref).astype(object)
+
+    # Kısmi ödeme: bizde aynı referansla iki taksit, karşıda tek toplam
+    kismi = rng.random(n_odeme) < kismi_odeme_orani
+    pay = np.round(o_tutar * rng.uniform(0.2, 0.8, n_odeme), 2)
+    b_idx = np.concatenate([np.arange(n_odeme), np.flatnonzero(kismi)])
+    b_tutar = np.concatenate([np.where(kismi, pay, o_tutar), (o_tutar - pay)[kismi]])
+    b_gun = np.concatenate([np.zeros(n_odeme, int), rng.integers(1, 30, int(kismi.sum()))]).astype("timedelta64[D]")
+    odeme_biz = pd.DataFrame({
+        "Tarih": _tarih_metni(o_tarih[b_idx] + b_gun),
+        "Belge No": None,
+        "Borç": turkce_tutar(b_tutar),
+        "Alacak": None,
+        "PB": o_pb[b_idx],
+        "Döviz": o_doviz[b_idx],
+        "Referans": ref[b_idx],
+        "Ödeme Tarihi": _tarih_metni(o_tarih[b_idx] + b_gun + np.timedelta64(1, "D")),
+        "Açıklama": "Ödeme",
+    })
+
+    karsida_o = rng.random(n_odeme) < eslesme_orani
+    ref_eksik = rng.random(n_odeme) < ref_eksik_orani
+    odeme_onlar = pd.DataFrame({
+        "Tarih": o_tarih,
+        "Fatura No": None,
+        "Borç": np.nan,
+        "Alacak": o_tutar,
+        "PB": np.where(o_pb == "TL", "TRY", o_pb).astype(object),
+        "Döviz": o_doviz,
+        "Referans": np.where(ref_eksik, None, ref).astype(object),
+        "Açıklama": "Tahsilat",
+    })[karsida_o]
+
+    df_biz = pd.concat([fatura_biz, odeme_biz], ignore_index=True)
+    df_onlar = pd.concat([fatura_onlar, sadece_onlar, odeme_onlar], ignore_index=True)
+    # Defterler tarih sırasında değil, girildiği sırada gibi karışık
+    df_biz = df_biz.iloc[rng.permutation(len(df_biz))].reset_index(drop=True)
+    df_onlar = df_onlar.iloc[rng.permutation(len(df_onlar))].reset_index(drop=True)
+    return df_biz, df_onlar
+
+
+def dosyaya_yaz(df, yol):
+    """Uzantıya göre xlsx / csv / tsv / parquet yazar."""
+    uzanti = os.path.splitext(yol)[1].lower()
+    if uzanti == ".parquet":
+        df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(yol, index=False)
+    elif uzanti == ".csv":
+        df.to_csv(yol, index=False, sep=";", encoding="utf-8-sig")
+    elif uzanti == ".tsv":
+        df.to_csv(yol, index=False, sep="\t", encoding="utf-8-sig")
+    else:
+        from motor.rapor import excel_yaz
+        excel_yaz(yol, {"Sayfa1": df})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--satir", type=int, default=10_000)
+    parser.add_argument("--klasor", default=".")
+    parser.add_argument("--bicim", default="csv", choices=["csv", "tsv", "xlsx", "parquet"])
+    parser.add_argument("--eslesme-orani", type=float, default=0.85)
+    parser.add_argument("--tohum", type=int, default=42)
+    args = parser.parse_args()
+
+    df_biz, df_onlar = defterler_uret(args.satir, eslesme_orani=args.eslesme_orani, tohum=args.tohum)
+    os.makedirs(args.klasor, exist_ok=True)
+    for ad, df in (("biz", df_biz), ("onlar", df_onlar)):
+        yol = os.path.join(args.klasor, f"{ad}.{args.bicim}")
+        dosyaya_yaz(df, yol)
+        print(f"{yol}: {len(df):,} satır")
+    with open(os.path.join(args.klasor, "ayarlar.json"), "w", encoding="utf-8") as f:
+        json.dump(AYARLAR, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Mutabakat Pro hesaplama motoru (Streamlit'ten bağımsız yardımcı modüller)."""
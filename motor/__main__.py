@@ -0,0 +1,7 @@
+import sys
+
+from motor.cli import main
+
+# spawn ile başlayan alt süreçler bu modülü yeniden içe aktarır (bkz. motor/okuma.py)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Excel dışı çıktılar: tablo başına Parquet, gzip'li CSV ve hepsini içeren
+zip paketi (JSON manifest ile).
+
+BI/denetim araçları yüzlerce MB'lık Rapor.xlsx yerine bunları okur. Her
+tablo doğrudan hedef akışa (zip girdisi dahil) yazılır; tablonun ayrıca
+bayt kopyası tutulmaz.
+"""
+import gzip
+import importlib.util
+import io
+import json
+import time
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+
+from motor.rapor import EK_SAYFA_ADLARI, SAYFA_ADLARI
+
+MANIFEST_ADI = "manifest.json"
+
+
+def parquet_var_mi():
+    return any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+
+
+def disa_aktarilacak_tablolar(tablolar):
+    """Sonuç anahtarı → tablo (ozet, eslesen, odeme, un_biz, un_onlar [+ degisiklik])."""
+    sonuc = {anahtar: tablolar.get(anahtar, pd.DataFrame()) for anahtar in SAYFA_ADLARI}
+    sonuc.update({anahtar: tablolar[anahtar] for anahtar in EK_SAYFA_ADLARI if anahtar in tablolar})
+    return sonuc
+
+
+def _parquet_uyumlu(df):
+    """
+    Parquet kolonları tek tipli olmalı: karışık tipli object kolonlar
+    (ör. hem sayı hem metin belge no) metne çevrilir, boşlar boş kalır.
+    """
+    karisik = [c for c in df.columns
+               if df[c].dtype == object and df[c].dropna().map(type).nunique() > 1]
+    if not karisik:
+        return df
+    return df.assign(**{c: df[c].where(df[c].isna(), df[c].astype(str)) for c in karisik})
+
+
+def parquet_yaz(hedef, df):
+    """hedef: dosya yolu veya yazılabilir akış."""
+    _parquet_uyumlu(df).to_parquet(hedef, index=False)
+
+
+def csv_gz_yaz(hedef, df):
+    """gzip'li CSV (UTF-8, BOM'lu; Excel Türkçe karakterleri doğru açsın)."""
+    # mtime=0: aynı tablo her seferinde aynı baytları üretir
+    with gzip.GzipFile(fileobj=hedef, mode="wb", mtime=0) as gz, \
+            io.TextIOWrapper(gz, encoding="utf-8-sig", newline="") as metin:
+        df.to_csv(metin, index=False)
+
+
+BICIMLER = {
+    "parquet": (".parquet", parquet_yaz),
+    "csv.gz": (".csv.gz", csv_gz_yaz),
+}
+
+
+def tablo_baytlari(df, bicim):
+    output = io.BytesIO()
+    BICIMLER[bicim][1](output, df)
+    return output.getvalue()
+
+
+def paket_yaz(hedef, tablolar, parametreler=None, sureler=None, bicimler=None):
+    """
+    Tüm tabloları tek zip'e yazar: <tablo>.parquet / <tablo>.csv.gz ve
+    manifest.json (satır/kolon sayıları, çalıştırma parametreleri, süreler).
+    Her tablo zip girdisine doğrudan akar. bicimler verilmezse Parquet
+    kuruluysa ikisi, değilse sadece CSV yazılır.
+    """
+    bicimler = bicimler or (["parquet", "csv.gz"] if parquet_var_mi() else ["csv.gz"])
+    tablolar = disa_aktarilacak_tablolar(tablolar)
+    manifest = {
+        "olusturma": datetime.now().isoformat(timespec="seconds"),
+        "parametreler": parametreler or {},
+        "sureler": dict(sureler or {}),
+        "tablolar": {},
+    }
+    t_paket = time.perf_counter()
+    # Parquet ve gzip zaten sıkıştırılmış; zip'te tekrar sıkıştırmak sadece zaman kaybı
+    with zipfile.ZipFile(hedef, "w", compression=zipfile.ZIP_STORED) as zf:
+        for anahtar, df in tablolar.items():
+            dosyalar = []
+            for bicim in bicimler:
+                uzanti, yaz = BICIMLER[bicim]
+                with zf.open(anahtar + uzanti, "w", force_zip64=True) as girdi:
+                    yaz(girdi, df)
+                dosyalar.append(anahtar + uzanti)
+            manifest["tablolar"][anahtar] = {
+                "satir": int(len(df)),
+                "kolonlar": [str(c) for c in df.columns],
+                "dosyalar": dosyalar,
+            }
+        manifest["sureler"]["paket_yazimi"] = round(time.perf_counter() - t_paket, 3)
+        zf.writestr(MANIFEST_ADI, json.dumps(manifest, ensure_ascii=False, indent=2, default=str))
+
+
+def paket_baytlari(tablolar, parametreler=None, sureler=None, bicimler=None):
+    output = io.BytesIO()
+    paket_yaz(output, tablolar, parametreler, sureler, bicimler)
+    return output.getvalue()
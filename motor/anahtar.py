@@ -0,0 +1,77 @@
+"""
+Eşleşme anahtarlarının (Match_ID / Payment_ID) normalizasyonu.
+
+Skaler `referans_no_temizle` referans davranıştır (bkz.
+benchmarks/anahtar_benchmark.py); `*_serisi` fonksiyonları anahtarları
+tüm Series üzerinde `str` accessor ile tek geçişte üretir. Hücre başına
+`st.cache_data` kullanılmaz: her satırın hash'lenip önbellekte aranması
+işin kendisinden pahalıydı.
+"""
+import functools
+import re
+import sys
+
+import pandas as pd
+
+
+@functools.lru_cache(maxsize=None)
+def _rakam_disi_deseni():
+    """
+    `filter(str.isdigit, ...)` ile birebir aynı karakterleri bırakan desen.
+
+    `str.isdigit()` '²', '①' gibi ondalık olmayan rakamları da kabul eder,
+    regex `\\d` ise sadece ondalık rakamları (Nd) tanır; fark listesi bir
+    kez hesaplanıp desene eklenir. Bu karakterlerin hepsi ilk iki Unicode
+    düzleminde olduğundan tarama 0x20000'de kesilir.
+    """
+    ek = ''.join(chr(c) for c in range(min(sys.maxunicode + 1, 0x20000))
+                 if chr(c).isdigit() and not chr(c).isdecimal())
+    return re.compile(r'[^\d' + re.escape(ek) + ']+')
+
+
+def _metin(seri):
+    # Regex'ler Python `re` semantiğiyle çalışsın diye object dtype'a çekilir
+    # (pyarrow string kolonlarında `\D` sadece ASCII rakamları tanır).
+    return pd.Series(seri).astype(str).astype(object)
+
+
+def referans_no_temizle(val):
+    if pd.isna(val):
+        return ""
+
+    s = str(val).strip()
+
+    # Tamamen boşsa ödeme değil
+    if s == "":
+        return ""
+
+    # Sayı bulmaya çalış ama bulamazsan da string'i olduğu gibi kabul et
+    digits = re.sub(r'\D', '', s)
+
+    # Eğer içinde hiç rakam yoksa yine de referans kabul et
+    if digits == "":
+        return s.upper()
+
+    return digits  # Rakamlar varsa bunlar Payment_ID olur
+
+
+def match_id_serisi(seri):
+    """Belge No → Match_ID: sadece rakamlar, baştaki sıfırlar atılmış ("000" → "")."""
+    rakamlar = _metin(seri).str.replace(_rakam_disi_deseni(), '', regex=True).fillna('')
+    return rakamlar.str.lstrip('0').astype(str)
+
+
+def payment_id_serisi(seri):
+    """
+    Ödeme Ref → Payment_ID: rakam varsa sadece rakamlar, yoksa büyük harfli
+    metnin kendisi, boş/NaN ise "".
+    """
+    seri = pd.Series(seri)
+    bos = seri.isna().to_numpy()
+    metin = _metin(seri).str.strip()
+    rakamlar = metin.str.replace(r'\D+', '', regex=True)
+
+    harfli = rakamlar.eq('').to_numpy() & ~bos
+    sonuc = rakamlar.where(~harfli, metin.where(harfli).str.upper())
+    sonuc[bos] = ''
+    return sonuc.astype(str)
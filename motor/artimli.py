@@ -0,0 +1,503 @@
+"""
+Dönemden döneme artımlı mutabakat: eşleşen çiftler ve açık kalemler cari
+bazında yerel bir SQLite deposunda tutulur; yeni çalıştırmada sadece
+değişen kısım gruplanıp eşleştirilir.
+
+Fatura eşleştirmesi anahtar bazlıdır: bir Match_ID'nin sonucu sadece iki
+taraftaki o Match_ID'li satırlara bağlıdır. Her anahtar için iki tarafın
+satırlarından sıraya duyarlı bir parmak izi çıkarılır. İzi değişmeyen
+anahtarların sonuç satırları depodan taşınır, sadece yeni/değişen/silinen
+anahtarlar `grupla` + eşleştirmeden geçer. Sonuç, aynı veriyle baştan
+yapılan çalıştırmanın aynısıdır.
+
+Ödeme eşleştirmesi anahtar bazlı değildir (tutar + PB ile de eşleşir);
+burada açık kalem mantığı uygulanır: iki satırı da değişmeden duran
+eşleşmiş çift kapanmış sayılır ve taşınır, yeni/değişen satırlar önceki
+dönemden açık kalanlarla birlikte eşleştirilir.
+
+Belge numarası olmayan (Match_ID boş) satırlar ve özet tablosu her
+çalıştırmada yeniden hesaplanır. Taraflardan birinde hiç Match_ID yoksa
+(Orijinal_Belge_No yedeği) tam çalıştırma yapılır ve o carinin deposu
+temizlenir. Eşleştirme kademesinde (motor/kademe.py) sadece Match_ID ve
+Belge No kuralları anahtar bazlıdır: Belge No ancak aynı rakamlı (yani
+aynı Match_ID'li) ya da Match_ID'siz satırları eşler. Tutar/tarih,
+açıklama veya benzer belge no kuralı varsa tam çalıştırma yapılır. Kolon
+ayarları, rol, kademe veya ödeme toleransı değişince depo geçersiz sayılır.
+
+Sonuç satırları anahtar bazlı saklanır: her çalıştırma sadece yeniden
+eşleştirilen anahtarların satırlarını yeni bir parça olarak ekler ve
+değişen anahtarların eski kayıtlarını siler; yazma maliyeti geçmişle değil
+delta ile büyür. Ölü satırı çoğalan ya da çok parçalı tablo bir sonraki
+kayıtta tek parçaya sıkıştırılır. Depo yerel ve güvenilir kabul edilir;
+parçalar pickle olarak saklanır. Pickle pandas/numpy sürümüne bağlı
+olduğundan sürümler ayar izine girer, okunamayan depo boş sayılır.
+"""
+import contextlib
+import hashlib
+import json
+import pickle
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from motor import hazirlik
+from motor.kademe import anahtar_bazli, kurallari_yaz
+from motor.mutabakat import (FaturaEslesmesi, MutabakatSonucu, OdemeEslesmesi,
+                             faturalari_eslestir, hazir_mutabakat, ozetle)
+from motor.dagitim import dagitimli_tablolar
+from motor.odeme import odeme_eslestir, odeme_tablolari
+from motor.sonuc import durum_kategorik
+
+_SEMA = """
+CREATE TABLE IF NOT EXISTS calismalar (
+    cari TEXT PRIMARY KEY,
+    ayar_izi TEXT NOT NULL,
+    zaman TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS anahtarlar (
+    cari TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    iz_biz INTEGER NOT NULL,
+    iz_onlar INTEGER NOT NULL,
+    durum TEXT,
+    PRIMARY KEY (cari, match_id)
+);
+CREATE TABLE IF NOT EXISTS parcalar (
+    id INTEGER PRIMARY KEY,
+    cari TEXT NOT NULL,
+    ad TEXT NOT NULL,
+    satir INTEGER NOT NULL,
+    canli INTEGER NOT NULL,
+    veri BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parcalar_cari ON parcalar (cari, ad);
+CREATE TABLE IF NOT EXISTS satirlar (
+    cari TEXT NOT NULL,
+    ad TEXT NOT NULL,
+    anahtar TEXT NOT NULL,
+    parca INTEGER NOT NULL,
+    adet INTEGER NOT NULL,
+    PRIMARY KEY (cari, ad, anahtar)
+);
+CREATE TABLE IF NOT EXISTS olu_satirlar (
+    parca INTEGER NOT NULL,
+    anahtar TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS olu_satirlar_parca ON olu_satirlar (parca);
+"""
+
+# Tablo bu kadar parçaya ya da canlı satırının iki katı kayda ulaşınca sıkıştırılır
+SIKISTIRMA_PARCA = 32
+
+# Sıra karıştırma sabiti (altın oran, 64 bit)
+_KARISTIR = np.uint64(0x9E3779B97F4A7C15)
+
+
+@dataclass
+class OncekiDurum:
+    ayar_izi: str
+    anahtarlar: pd.DataFrame          # index: match_id; iz_biz, iz_onlar, durum
+    tablolar: dict                    # ad → canlı satırlar (iç kolonlarıyla, '_anahtar' dahil)
+
+
+class MutabakatDeposu:
+    """
+    Cari bazında anahtar izleri ve sonuç satırları. Satırlar parçalar
+    halinde saklanır; `satirlar` her anahtarın güncel parçasını,
+    `olu_satirlar` parçalarda sonradan geçersiz kalan anahtarları tutar
+    (okumada sadece bunlar atlanır, sayıları sıkıştırmayla sınırlıdır).
+    Her kayıt işlemi tek transaction'dır; toplu moddaki süreçler aynı
+    dosyaya sırayla yazar.
+    """
+
+    def __init__(self, yol):
+        self.yol = yol
+        with self._baglanti() as db:
+            db.executescript(_SEMA)
+
+    @contextlib.contextmanager
+    def _baglanti(self):
+        db = sqlite3.connect(self.yol, timeout=60)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def oku(self, cari):
+        """Carinin önceki durumu; kayıt yoksa ya da parçalar okunamıyorsa None."""
+        with self._baglanti() as db:
+            satir = db.execute("SELECT ayar_izi FROM calismalar WHERE cari = ?", (cari,)).fetchone()
+            if satir is None:
+                return None
+            anahtarlar = pd.read_sql_query(
+                "SELECT match_id, iz_biz, iz_onlar, durum FROM anahtarlar WHERE cari = ?",
+                db, params=(cari,), index_col="match_id", dtype={"iz_biz": "int64", "iz_onlar": "int64"},
+            )
+            parcalar = db.execute("SELECT id, ad, satir > canli, veri FROM parcalar WHERE cari = ? ORDER BY id",
+                                  (cari,)).fetchall()
+            olu = pd.read_sql_query("SELECT o.parca, o.anahtar FROM olu_satirlar o JOIN parcalar p "
+                                    "ON p.id = o.parca WHERE p.cari = ?", db, params=(cari,))
+        olu = {p: set(g['anahtar']) for p, g in olu.groupby('parca')}
+        tablolar = {}
+        try:
+            for parca, ad, eksik, veri in parcalar:
+                df = pickle.loads(veri)
+                if eksik:
+                    df = df[~df['_anahtar'].isin(olu.get(parca, ())).to_numpy()]
+                tablolar.setdefault(ad, []).append(df)
+        except Exception:
+            # Başka sürümle yazılmış ya da bozuk parça: depo yokmuş gibi baştan çalışılır
+            return None
+        tablolar = {ad: pd.concat(p, ignore_index=True) for ad, p in tablolar.items()}
+        return OncekiDurum(ayar_izi=satir[0], anahtarlar=anahtarlar, tablolar=tablolar)
+
+    def kaydet(self, cari, ayar_izi, silinecek, anahtar_satirlari, degisen, tum, sifirdan=False):
+        """
+        silinecek: izi değişen anahtarlar; anahtar_satirlari: bunların yeni
+        (match_id, iz_biz, iz_onlar, durum) satırları. degisen: tablo adı →
+        (kaydı silinecek satır anahtarları, yeni satırlar). tum: tablo adı →
+        tüm canlı satırlar; sadece sıkıştırılan tablolar için yazılır.
+        sifirdan=True ise carinin eski kayıtları tamamen silinir.
+        """
+        with self._baglanti() as db:
+            if sifirdan:
+                self._cari_sil(db, cari, ("anahtarlar", "parcalar", "satirlar"))
+            else:
+                db.executemany("DELETE FROM anahtarlar WHERE cari = ? AND match_id = ?",
+                               ((cari, m) for m in silinecek))
+            db.executemany("INSERT INTO anahtarlar VALUES (?, ?, ?, ?, ?)",
+                           ((cari, m, int(b), int(o), d) for m, b, o, d in anahtar_satirlari))
+            for ad, df in tum.items():
+                if sifirdan:
+                    self._parca_ekle(db, cari, ad, df)
+                    continue
+                eski, yeni = degisen[ad]
+                self._satir_sil(db, cari, ad, set(eski) | set(yeni['_anahtar'] if len(yeni) else ()))
+                self._parca_ekle(db, cari, ad, yeni)
+                parca, kayitli, canli = db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(satir), 0), COALESCE(SUM(canli), 0) "
+                    "FROM parcalar WHERE cari = ? AND ad = ?", (cari, ad)).fetchone()
+                if parca > SIKISTIRMA_PARCA or kayitli > 2 * canli:
+                    self._tablo_sil(db, cari, ad)
+                    self._parca_ekle(db, cari, ad, df)
+            db.execute("INSERT OR REPLACE INTO calismalar VALUES (?, ?, ?)",
+                       (cari, ayar_izi, time.strftime("%Y-%m-%d %H:%M:%S")))
+
+    @staticmethod
+    def _parca_ekle(db, cari, ad, df):
+        """Anahtarlı (boş olmayan '_anahtar') satırları tek parça olarak ekler."""
+        if not len(df):
+            return
+        df = df[df['_anahtar'].ne("").to_numpy()]
+        if not len(df):
+            return
+        parca = db.execute(
+            "INSERT INTO parcalar (cari, ad, satir, canli, veri) VALUES (?, ?, ?, ?, ?)",
+            (cari, ad, len(df), len(df), pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))).lastrowid
+        adetler = df['_anahtar'].value_counts(sort=False)
+        db.executemany("INSERT INTO satirlar VALUES (?, ?, ?, ?, ?)",
+                       ((cari, ad, a, parca, int(n)) for a, n in adetler.items()))
+
+    @staticmethod
+    def _satir_sil(db, cari, ad, anahtarlar):
+        """Anahtarların kayıtlarını siler ve parçalarında ölü işaretler; canlı satırı kalmayan parçalar silinir."""
+        etkilenen, olu = {}, []
+        for a in anahtarlar:
+            kayit = db.execute("SELECT parca, adet FROM satirlar WHERE cari = ? AND ad = ? AND anahtar = ?",
+                               (cari, ad, a)).fetchone()
+            if kayit is not None:
+                etkilenen[kayit[0]] = etkilenen.get(kayit[0], 0) + kayit[1]
+                olu.append((kayit[0], a))
+        db.executemany("DELETE FROM satirlar WHERE cari = ? AND ad = ? AND anahtar = ?",
+                       ((cari, ad, a) for a in anahtarlar))
+        db.executemany("INSERT INTO olu_satirlar VALUES (?, ?)", olu)
+        db.executemany("UPDATE parcalar SET canli = canli - ? WHERE id = ?",
+                       ((n, p) for p, n in etkilenen.items()))
+        bos = [(p,) for p, in db.execute(
+            f"SELECT id FROM parcalar WHERE canli <= 0 AND id IN ({','.join('?' * len(etkilenen))})",
+            list(etkilenen))] if etkilenen else []
+        db.executemany("DELETE FROM olu_satirlar WHERE parca = ?", bos)
+        db.executemany("DELETE FROM parcalar WHERE id = ?", bos)
+
+    @staticmethod
+    def _tablo_sil(db, cari, ad):
+        db.execute("DELETE FROM olu_satirlar WHERE parca IN (SELECT id FROM parcalar WHERE cari = ? AND ad = ?)",
+                   (cari, ad))
+        db.execute("DELETE FROM parcalar WHERE cari = ? AND ad = ?", (cari, ad))
+        db.execute("DELETE FROM satirlar WHERE cari = ? AND ad = ?", (cari, ad))
+
+    @staticmethod
+    def _cari_sil(db, cari, tablolar):
+        db.execute("DELETE FROM olu_satirlar WHERE parca IN (SELECT id FROM parcalar WHERE cari = ?)", (cari,))
+        for tablo in tablolar:
+            db.execute(f"DELETE FROM {tablo} WHERE cari = ?", (cari,))
+
+    def temizle(self, cari):
+        with self._baglanti() as db:
+            self._cari_sil(db, cari, ("anahtarlar", "parcalar", "satirlar", "calismalar"))
+
+
+@dataclass
+class ArtimliSonuc:
+    sonuc: MutabakatSonucu
+    degisiklikler: pd.DataFrame
+    mod: str                          # "artımlı" / "ilk" / "tam"
+    toplam_anahtar: int = 0
+    degisen_anahtar: int = 0
+    tasinan_odeme: int = 0
+    neden: str = "Match_ID yok"       # mod "tam" ise
+
+    def tablolar(self):
+        return dict(self.sonuc.tablolar(), degisiklik=self.degisiklikler)
+
+    def bilgi_metni(self):
+        if self.mod == "tam":
+            return f"[Artımlı] {self.neden}, tam çalıştırma yapıldı (depo temizlendi)"
+        return (f"[Artımlı: {self.mod}] {self.degisen_anahtar}/{self.toplam_anahtar} anahtar yeniden "
+                f"eşleştirildi, {self.tasinan_odeme} ödeme eşleşmesi taşındı")
+
+
+def ayar_izi(ayarlar, rol_kodu, tolerans, gun_penceresi, biz, onlar, kurallar=None):
+    metin = json.dumps({'sema': hazirlik.SEMA_SURUMU, 'kurallar': kurallari_yaz(kurallar),
+                        'ayarlar': ayarlar, 'rol': rol_kodu, 'tolerans': tolerans, 'pencere': gun_penceresi,
+                        'ekstra': [biz.ekstra, onlar.ekstra], 'gruplama': [biz.gruplama, onlar.gruplama],
+                        'doviz': [biz.doviz_aktif, onlar.doviz_aktif],
+                        # Parçalar pickle'dır; başka sürümle yazılanlar okunmaz
+                        'surum': [pd.__version__, np.__version__]},
+                       sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(metin.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _satir_izleri(df):
+    kolonlar = [c for c in df.columns if c != 'unique_idx']
+    return pd.util.hash_pandas_object(df[kolonlar], index=False).to_numpy(np.uint64)
+
+
+def anahtar_izleri(ham):
+    """Match_ID → o anahtarın satırlarının sıraya duyarlı izi (int64)."""
+    mid = ham['Match_ID'].to_numpy(dtype=object)
+    dolu = mid != ""
+    if not dolu.any():
+        return pd.Series([], dtype=np.int64)
+    h = _satir_izleri(ham)[dolu]
+    mid = mid[dolu]
+
+    sira = np.argsort(mid, kind="stable")
+    mid, h = mid[sira], h[sira]
+    bas = np.flatnonzero(np.r_[True, mid[1:] != mid[:-1]])
+    grup_ici = np.arange(len(mid)) - np.repeat(bas, np.diff(np.r_[bas, len(mid)]))
+    h = pd.util.hash_array(h ^ (grup_ici.astype(np.uint64) * _KARISTIR))
+    return pd.Series(np.bitwise_xor.reduceat(h, bas).view(np.int64), index=mid[bas])
+
+
+def odeme_izleri(pay):
+    """Ödeme satırı başına iz; aynı içerikli satırlar tekrar sırasıyla ayrışır."""
+    h = _satir_izleri(pay)
+    tekrar = pd.Series(h).groupby(h).cumcount().to_numpy(np.uint64)
+    return pd.util.hash_array(h ^ (tekrar * _KARISTIR)).view(np.int64)
+
+
+def _birlestir(*parcalar):
+    dolu = [p for p in parcalar if len(p)]
+    if not dolu:
+        return pd.DataFrame()
+    return durum_kategorik(pd.concat(dolu, ignore_index=True, sort=False))
+
+
+def _anahtar_sirasi(df):
+    """Tam çalıştırmadaki sıra: Match_ID'ye göre artan, belge no'suz satırlar sonda."""
+    if df.empty:
+        return df
+    return (df.assign(_bos=df['_anahtar'].eq(""))
+              .sort_values(['_bos', '_anahtar'], kind="stable")
+              .drop(columns='_bos').reset_index(drop=True))
+
+
+def _ic_kolonsuz(df):
+    return df.drop(columns=[c for c in df.columns if c.startswith('_')])
+
+
+def _tasinan(df, kolon, kalmasi_gereken):
+    if df is None or df.empty or kolon not in df.columns:
+        return pd.DataFrame()
+    return df[kalmasi_gereken(df)]
+
+
+def _degisiklik_satirlari(kirli, y, e, onceki_durum, yeni_durum):
+    if not len(kirli):
+        return pd.DataFrame()
+    yeni_var = (y.loc[kirli, ['iz_biz', 'iz_onlar']] != 0).any(axis=1).to_numpy()
+    eski_var = (e.loc[kirli, ['iz_biz', 'iz_onlar']] != 0).any(axis=1).to_numpy()
+    return pd.DataFrame({
+        "Tür": "Fatura",
+        "Anahtar": kirli.to_numpy(),
+        "Değişiklik": np.select([~eski_var, ~yeni_var], ["Yeni", "Silindi"], "Değişti").astype(object),
+        "Önceki Durum": onceki_durum.reindex(kirli).fillna("").to_numpy(),
+        "Yeni Durum": yeni_durum.reindex(kirli).fillna("").to_numpy(),
+    })
+
+
+def artimli_mutabakat(biz, onlar, rol_kodu, depo, cari, ayarlar=None, tolerans=0.0,
+                      gun_penceresi: Optional[int] = None, benzer=None, dagitim=None, kurallar=None):
+    """
+    `hazir_mutabakat`'ın depolu hali. biz/onlar: `hazirla` çıktıları (tam
+    defterler). Dönüş: ArtimliSonuc; `tablolar()` normal rapor tablolarına
+    ek olarak "degisiklik" (son çalıştırmadan bu yana değişenler) içerir.
+    Toplu ödeme dağıtımı (dagitim) depoya yazılmaz; her çalıştırmada açık
+    kalan ödemeler üzerinde yeniden yapılır.
+    """
+    neden = None
+    if benzer is not None:
+        neden = "Benzer belge no açık"
+    elif not anahtar_bazli(kurallar):
+        neden = "Kademede anahtar bazlı olmayan kural var"
+    elif not (biz.ham['Match_ID'].ne("").any() and onlar.ham['Match_ID'].ne("").any()):
+        neden = "Match_ID yok"
+    if neden:
+        depo.temizle(cari)
+        sonuc = hazir_mutabakat(biz, onlar, rol_kodu, tolerans=tolerans, gun_penceresi=gun_penceresi,
+                                benzer=benzer, dagitim=dagitim, kurallar=kurallar)
+        return ArtimliSonuc(sonuc=sonuc, degisiklikler=pd.DataFrame(), mod="tam", neden=neden)
+
+    iz = ayar_izi(ayarlar, rol_kodu, tolerans, gun_penceresi, biz, onlar, kurallar)
+    onceki = depo.oku(cari)
+    if onceki is not None and onceki.ayar_izi != iz:
+        onceki = None
+    mod = "artımlı" if onceki is not None else "ilk"
+
+    # --- Fatura: anahtar izlerini karşılaştır ---
+    izb, izo = anahtar_izleri(biz.ham), anahtar_izleri(onlar.ham)
+    indeks = izb.index.union(izo.index)
+    y = pd.DataFrame({'iz_biz': izb.reindex(indeks, fill_value=0),
+                      'iz_onlar': izo.reindex(indeks, fill_value=0)}, index=indeks)
+    e = (onceki.anahtarlar if onceki is not None
+         else pd.DataFrame({'iz_biz': [], 'iz_onlar': [], 'durum': []}).astype({'iz_biz': 'int64', 'iz_onlar': 'int64'}))
+    tum = y.index.union(e.index)
+    y, e_iz = y.reindex(tum, fill_value=0), e[['iz_biz', 'iz_onlar']].reindex(tum, fill_value=0)
+    kirli = tum[(y['iz_biz'].to_numpy() != e_iz['iz_biz'].to_numpy())
+                | (y['iz_onlar'].to_numpy() != e_iz['iz_onlar'].to_numpy())]
+    kirli_set = set(kirli)
+
+    def delta(hazir):
+        mid = hazir.ham['Match_ID']
+        grp = hazirlik.grupla(hazir.ham[mid.eq("") | mid.isin(kirli_set)], hazir.doviz_aktif, hazir.gruplama,
+                              hesap=hazir.hesap)
+        # Delta'da hiç anahtar kalmayınca grupla erken döner; tam çalıştırmada
+        # (iki tarafta da Match_ID var) unique_idx her zaman bulunur
+        if 'unique_idx' not in grp.columns:
+            grp = grp.reset_index(drop=True)
+            grp['unique_idx'] = grp.index
+        return grp
+
+    grp_b, grp_o = delta(biz), delta(onlar)
+    f = faturalari_eslestir(grp_b, grp_o, rol_kodu, biz.doviz_aktif or onlar.doviz_aktif,
+                            biz.ekstra, onlar.ekstra, kurallar=kurallar)
+
+    # Sonuç satırlarının anahtarları: eşleşenlerde bizim satırın Match_ID'si (Belge No
+    # kuralı sadece aynı Match_ID'li ya da Match_ID'siz satırları eşler), eşleşmeyenler grp sırasıyla
+    mid_b = grp_b['Match_ID'].fillna("").astype(str)
+    mid_o = grp_o['Match_ID'].fillna("").astype(str)
+    poz_b, poz_o = f.ciftler
+    yeni_parcalar = {
+        "eslesen": (f.eslesen, mid_b.iloc[poz_b]),
+        "bizde_var": (f.bizde_var, mid_b[~np.isin(np.arange(len(mid_b)), poz_b)]),
+        "onlarda_var": (f.onlarda_var, mid_o[~np.isin(np.arange(len(mid_o)), poz_o)]),
+    }
+
+    yeni_durum = []
+    fatura_tablolari, degisen = {}, {}
+    for ad, (tablo, anahtarlar) in yeni_parcalar.items():
+        if len(tablo):
+            tablo = tablo.assign(_anahtar=anahtarlar.to_numpy())
+            yeni_durum.append(tablo.loc[tablo['_anahtar'].ne(""), ['_anahtar', 'Durum']])
+        eski = _tasinan(onceki.tablolar.get(ad) if onceki else None, '_anahtar',
+                        lambda t: t['_anahtar'].ne("") & ~t['_anahtar'].isin(kirli_set))
+        fatura_tablolari[ad] = _anahtar_sirasi(_birlestir(eski, tablo))
+        degisen[ad] = (kirli, tablo)
+    yeni_durum = (pd.concat(yeni_durum).set_index('_anahtar')['Durum'].astype(object) if yeni_durum
+                  else pd.Series([], dtype=object))
+
+    # --- Ödeme: değişmeyen eşleşmiş çiftler taşınır, gerisi yeniden eşleştirilir ---
+    pay_b, pay_o = biz.odemeler, onlar.odemeler
+    onceki_odeme = onceki.tablolar.get("odeme") if onceki else None
+    odeme_eski = pd.DataFrame()
+    odeme_yeni, bizde_odeme, onlarda_odeme = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    toplu, atlanan = (None if dagitim is None else pd.DataFrame()), 0
+    bozulan = pd.DataFrame()
+    if not (pay_b.empty or pay_o.empty):
+        izp_b, izp_o = odeme_izleri(pay_b), odeme_izleri(pay_o)
+        odeme_eski = _tasinan(onceki_odeme, '_iz_biz',
+                              lambda t: np.isin(t['_iz_biz'], izp_b) & np.isin(t['_iz_onlar'], izp_o))
+        if onceki_odeme is not None and len(onceki_odeme) > len(odeme_eski):
+            bozulan = onceki_odeme.drop(odeme_eski.index)
+
+        acik_b = ~np.isin(izp_b, odeme_eski['_iz_biz']) if len(odeme_eski) else np.ones(len(pay_b), bool)
+        acik_o = ~np.isin(izp_o, odeme_eski['_iz_onlar']) if len(odeme_eski) else np.ones(len(pay_o), bool)
+        kalan_b, kalan_o = pay_b[acik_b], pay_o[acik_o]
+        if len(kalan_b) and len(kalan_o):
+            eslesme = odeme_eslestir(kalan_b, kalan_o, tolerans, gun_penceresi)
+        else:
+            eslesme = (np.array([], dtype=np.intp), np.array([], dtype=np.intp))
+        if dagitim is None:
+            odeme_yeni, bizde_odeme, onlarda_odeme = odeme_tablolari(
+                kalan_b, kalan_o, biz.ekstra, onlar.ekstra, eslesme=eslesme)
+        else:
+            odeme_yeni, bizde_odeme, onlarda_odeme, toplu, atlanan = dagitimli_tablolar(
+                kalan_b, kalan_o, biz.ekstra, onlar.ekstra, eslesme, tolerans, dagitim)
+        if len(odeme_yeni):
+            odeme_yeni = odeme_yeni.assign(_iz_biz=izp_b[acik_b][eslesme[0]], _iz_onlar=izp_o[acik_o][eslesme[1]])
+            odeme_yeni['_anahtar'] = odeme_yeni['_iz_biz'].astype(str) + ":" + odeme_yeni['_iz_onlar'].astype(str)
+    odeme_tum = _birlestir(odeme_eski, odeme_yeni)
+    if len(odeme_tum):
+        # Tam çalıştırmadaki gibi bizim ödeme satırlarının sırasıyla
+        sira = pd.Series(np.arange(len(izp_b)), index=izp_b).reindex(odeme_tum['_iz_biz']).to_numpy()
+        odeme_tum = odeme_tum.iloc[np.argsort(sira, kind="stable")].reset_index(drop=True)
+
+    # --- Değişiklik raporu ---
+    degisiklik = [_degisiklik_satirlari(kirli, y, e_iz,
+                                        e['durum'] if 'durum' in e.columns else pd.Series([], dtype=object),
+                                        yeni_durum)]
+    if len(odeme_yeni):
+        degisiklik.append(pd.DataFrame({"Tür": "Ödeme", "Anahtar": odeme_yeni["Ödeme Ref"].to_numpy(),
+                                        "Değişiklik": "Yeni eşleşme", "Önceki Durum": "",
+                                        "Yeni Durum": odeme_yeni["Durum"].to_numpy()}))
+    if len(bozulan):
+        degisiklik.append(pd.DataFrame({"Tür": "Ödeme", "Anahtar": bozulan["Ödeme Ref"].to_numpy(),
+                                        "Değişiklik": "Eşleşme bozuldu",
+                                        "Önceki Durum": bozulan["Durum"].to_numpy(), "Yeni Durum": ""}))
+    degisiklikler = _birlestir(*degisiklik)
+
+    # --- Depoya yaz: sadece değişen anahtarlar ---
+    kalanlar = [m for m in kirli if y.at[m, 'iz_biz'] or y.at[m, 'iz_onlar']]
+    if onceki_odeme is not None:
+        degisen["odeme"] = (onceki_odeme['_anahtar'][~onceki_odeme.index.isin(odeme_eski.index)], odeme_yeni)
+    else:
+        degisen["odeme"] = ((), odeme_yeni)
+    depo.kaydet(
+        cari, iz, kirli,
+        ((m, y.at[m, 'iz_biz'], y.at[m, 'iz_onlar'], yeni_durum.get(m)) for m in kalanlar),
+        degisen, dict(fatura_tablolari, odeme=odeme_tum),
+        sifirdan=onceki is None,
+    )
+
+    eslesen = fatura_tablolari["eslesen"]
+    kural_sayilari = eslesen["Kural"].value_counts() if "Kural" in eslesen.columns else {}
+    fatura = FaturaEslesmesi(
+        eslesen=_ic_kolonsuz(fatura_tablolari["eslesen"]),
+        bizde_var=_ic_kolonsuz(fatura_tablolari["bizde_var"]),
+        onlarda_var=_ic_kolonsuz(fatura_tablolari["onlarda_var"]),
+        anahtar="Match_ID", biz_dolu=len(izb), onlar_dolu=len(izo),
+        ortak=int(((y['iz_biz'] != 0) & (y['iz_onlar'] != 0)).sum()),
+        # Süreler delta'nın, eşleşme sayıları taşınanlarla birlikte tüm sonucun
+        gecisler=[dict(g, eslesen=int(kural_sayilari.get(g["kural"], 0))) for g in f.gecisler],
+    )
+    odeme = OdemeEslesmesi(eslesen=_ic_kolonsuz(odeme_tum), bizde_var=bizde_odeme, onlarda_var=onlarda_odeme,
+                           dagitim=toplu, dagitim_atlanan=atlanan)
+    sonuc = MutabakatSonucu(ozet=ozetle(biz, onlar), fatura=fatura, odeme=odeme, biz=biz, onlar=onlar)
+    return ArtimliSonuc(sonuc=sonuc, degisiklikler=degisiklikler, mod=mod, toplam_anahtar=len(indeks),
+                        degisen_anahtar=len(kirli), tasinan_odeme=len(odeme_eski))
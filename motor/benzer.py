@@ -0,0 +1,261 @@
+"""
+Benzer belge no eşleştirmesi (ikinci geçiş).
+
+Tam anahtar eşleşmesinden (Match_ID / Merge_Key) sonra iki tarafta da
+eşleşmeden kalan gruplanmış satırlar üzerinde çalışır. Karşı tarafın
+"FTR2024000123" yazdığı belgeyi bizim "2024/123" ile, ya da iki rakamı
+yer değiştirmiş numarayı bulur.
+
+Hiçbir zaman n·m karşılaştırma yapılmaz. Adaylar para birimi + tutar
+kovası + anahtar üzerinden eşit birleştirme (merge) ile üretilir.
+Anahtarlar belge no rakamlarından türetilir:
+  - on ek / son ek: ilk ve son `ek_uzunlugu` rakam (sondaki / baştaki yazım hatası)
+  - sıfırsız: tüm '0'lar atılmış rakamlar ("2024000123" ~ "2024123")
+  - sıralı: rakamların sıralanmış hali (yer değiştirmiş rakamlar)
+  - silme: numaranın kendisi ve tek rakamı silinmiş halleri; tek
+    işlemlik (değiştirme, ekleme/silme, yer değiştirme) her fark en az
+    bir ortak anahtar verir, bloklar küçük kalır
+Tutar kovası logaritmiktir (genişlik `tutar_toleransi`); karşı taraf
+komşu kovalarla da birleşir. Bir blokta taraf başına `maks_blok`'tan
+fazla satır varsa o blok o anahtar için atlanır (tekrarlayan kira
+faturası gibi aynı tutarlı yığınlar aday patlaması yapmasın).
+
+Adaylar belge no düzenleme mesafesi (komşu rakam yer değiştirmesi tek
+işlem), tutar ve tarih yakınlığı ile puanlanır; her satır en fazla bir
+eşleşmeye girer (karşılıklı en iyi aday turları).
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from motor.anahtar import match_id_serisi
+
+_MAKS_RAKAM = 24       # puanlamada belge no'nun son 24 rakamı kullanılır
+_PARCA = 200_000       # mesafe hesabında tek seferde işlenen aday çifti
+
+
+@dataclass
+class BenzerAyarlari:
+    min_skor: float = 0.8               # toplam puan eşiği (0-1)
+    min_belge_benzerligi: float = 0.8   # belge no benzerliği eşiği (0-1); 10 rakamda en çok 2 işlem
+    tutar_toleransi: float = 0.02       # oransal; tutar kovası genişliği ve tutar puanının sıfırlandığı fark
+    gun_penceresi: int = 60             # tarih puanının sıfırlandığı gün farkı
+    ek_uzunlugu: int = 4                # on ek / son ek anahtarlarının rakam sayısı
+    maks_blok: int = 50                 # bir anahtar bloğunda taraf başına en fazla satır
+    belge_agirligi: float = 0.6
+    tutar_agirligi: float = 0.3
+    tarih_agirligi: float = 0.1
+
+
+def benzer_ayarlari(deger) -> Optional[BenzerAyarlari]:
+    """Ayar dosyasındaki "benzer_belge" değeri: false/yok → None, true → varsayılanlar, dict → alanlar."""
+    if not deger:
+        return None
+    if isinstance(deger, BenzerAyarlari):
+        return deger
+    if deger is True:
+        return BenzerAyarlari()
+    return BenzerAyarlari(**deger)
+
+
+def _taraf(grp, ayarlar):
+    """Puanlama ve bloklama için gereken kolonlar (grp ile aynı sırada)."""
+    rakam = match_id_serisi(grp['Orijinal_Belge_No']).str[-_MAKS_RAKAM:]
+    tutar = np.abs((grp['Borc'] - grp['Alacak']).to_numpy(dtype=float))
+    kova = np.floor(np.log1p(np.nan_to_num(tutar)) / np.log1p(ayarlar.tutar_toleransi)).astype(np.int64)
+    sifirsiz = rakam.str.replace("0", "", regex=False)
+    k = ayarlar.ek_uzunlugu
+    kisa = rakam.str.len().to_numpy() < k
+    return pd.DataFrame({
+        'poz': np.arange(len(grp)),
+        'pb': grp['Para_Birimi'].astype(str).fillna("").to_numpy(dtype=object),
+        'kova': kova,
+        'rakam': rakam.to_numpy(dtype=object),
+        'tutar': tutar,
+        'tarih': grp['Tarih'].to_numpy(dtype='datetime64[ns]'),
+        # Ek uzunluğundan kısa numaralarda on/son ek tüm numaradır; tam eşitlik zaten ilk geçişte aranır
+        'on': np.where(kisa, "", rakam.str[:k].to_numpy(dtype=object)),
+        'son': np.where(kisa, "", rakam.str[-k:].to_numpy(dtype=object)),
+        'sifirsiz': sifirsiz.to_numpy(dtype=object),
+        'sirali': rakam.map(lambda s: ''.join(sorted(s))).to_numpy(dtype=object),
+    })[rakam.ne("").to_numpy()]
+
+
+def _silmeler(rakam):
+    """
+    Her numara + tek rakamı silinmiş halleri → (satır no, anahtar) dizileri.
+    Kod matrisinden sütun silinerek toplu üretilir; numaradan kısa
+    konumlarda silme numaranın kendisini verir, birleştirmede tekrar düşer.
+    """
+    kod, uzunluk = _kodlar(rakam)
+    L = max(int(uzunluk.max(initial=0)), 1)
+    kod = np.ascontiguousarray(kod[:, :L])
+    bos = np.zeros((len(kod), 1), dtype=np.uint32)
+    varyant = np.stack([kod] + [np.hstack([np.delete(kod, i, axis=1), bos]) for i in range(L)], axis=1)
+    return np.repeat(np.arange(len(kod)), L + 1), varyant.reshape(-1, L).view(f'U{L}').ravel().astype(object)
+
+
+def _anahtar_satirlari(taraf, anahtar):
+    """Bir anahtar için (satır no, anahtar değeri); boş anahtarlar atlanır."""
+    if anahtar == 'silme':
+        satir, deger = _silmeler(taraf['rakam'].to_numpy())
+    else:
+        satir, deger = np.arange(len(taraf)), taraf[anahtar].to_numpy(dtype=object)
+    dolu = deger != ""
+    return satir[dolu], deger[dolu]
+
+
+def _adaylar(b, o, ayarlar):
+    """
+    Anahtar başına (pb, kova, anahtar) eşit birleştirmesi → tekrarsız
+    (biz poz, onlar poz) çiftleri. Üçlü, metin yerine iki tarafta ortak
+    tek tamsayı blok koduna çevrilir; karşı taraf komşu kovalarla da
+    eşleşsin diye kovası -1/0/+1 kaydırılmış üç kopya halinde birleşir.
+    """
+    pb_kod, pb = pd.factorize(np.concatenate([b['pb'].to_numpy(), o['pb'].to_numpy()]))
+    kova = np.concatenate([b['kova'].to_numpy(), o['kova'].to_numpy()])
+    kova = kova - kova.min(initial=0) + 1
+    genislik = int(kova.max(initial=0)) + 2
+    n = len(b)
+
+    def blok(anahtar_kod, satir, kayma=0):
+        return ((anahtar_kod.astype(np.int64) * max(len(pb), 1) + pb_kod[satir]) * genislik
+                + kova[satir] + kayma)
+
+    def kucuk_bloklar(df):
+        return df[df.groupby('blok', sort=False)['blok'].transform('size') <= ayarlar.maks_blok]
+
+    poz_b, poz_o = b['poz'].to_numpy(), o['poz'].to_numpy()
+    parcalar = []
+    for anahtar in ('on', 'son', 'sifirsiz', 'sirali', 'silme'):
+        satir_b, deger_b = _anahtar_satirlari(b, anahtar)
+        satir_o, deger_o = _anahtar_satirlari(o, anahtar)
+        if not len(satir_b) or not len(satir_o):
+            continue
+        kod, _ = pd.factorize(np.concatenate([deger_b, deger_o]))
+        kod_b, kod_o = kod[:len(satir_b)], kod[len(satir_b):]
+        sol = pd.DataFrame({'poz_b': poz_b[satir_b], 'blok': blok(kod_b, satir_b)}).drop_duplicates()
+        sag = pd.DataFrame({'poz_o': poz_o[satir_o], 'blok': blok(kod_o, satir_o + n)}).drop_duplicates()
+        sag = pd.concat([sag.assign(blok=sag['blok'] + d) for d in (-1, 0, 1)], ignore_index=True)
+        sol, sag = kucuk_bloklar(sol), kucuk_bloklar(sag)
+        parcalar.append(sol.merge(sag, on='blok')[['poz_b', 'poz_o']])
+    if not parcalar:
+        return pd.DataFrame({'poz_b': [], 'poz_o': []}, dtype=np.int64)
+    return pd.concat(parcalar, ignore_index=True).drop_duplicates(ignore_index=True)
+
+
+def _kodlar(metinler):
+    """Rakam dizileri → (n, _MAKS_RAKAM) kod matrisi ve uzunluklar."""
+    dizi = np.asarray(metinler, dtype=f'U{_MAKS_RAKAM}')
+    return dizi.view(np.uint32).reshape(len(dizi), _MAKS_RAKAM), np.char.str_len(dizi)
+
+
+def duzenleme_mesafesi(a, b):
+    """
+    Çift çift düzenleme mesafesi (ekleme, silme, değiştirme ve komşu iki
+    karakterin yer değiştirmesi birer işlem; optimal string alignment).
+    Dinamik programlama satır satır, tüm çiftler için numpy ile birlikte
+    ilerler; maliyet çift başına değil uzunluk² başına Python adımıdır.
+    """
+    n = len(a)
+    sonuc = np.zeros(n, dtype=np.int64)
+    for bas in range(0, n, _PARCA):
+        ka, la = _kodlar(a[bas:bas + _PARCA])
+        kb, lb = _kodlar(b[bas:bas + _PARCA])
+        m, L = len(ka), max(int(la.max(initial=0)), int(lb.max(initial=0)))
+        satir = np.arange(m)
+        onceki2 = None
+        onceki = np.tile(np.arange(L + 1, dtype=np.int32), (m, 1))
+        parca = np.where(la == 0, lb, 0)
+        for i in range(1, L + 1):
+            simdi = np.empty_like(onceki)
+            simdi[:, 0] = i
+            for j in range(1, L + 1):
+                maliyet = (ka[:, i - 1] != kb[:, j - 1]).astype(np.int32)
+                d = np.minimum(np.minimum(onceki[:, j] + 1, simdi[:, j - 1] + 1), onceki[:, j - 1] + maliyet)
+                if i > 1 and j > 1:
+                    takas = (ka[:, i - 1] == kb[:, j - 2]) & (ka[:, i - 2] == kb[:, j - 1])
+                    d = np.where(takas, np.minimum(d, onceki2[:, j - 2] + 1), d)
+                simdi[:, j] = d
+            biten = la == i
+            parca[biten] = simdi[satir[biten], lb[biten]]
+            onceki2, onceki = onceki, simdi
+        sonuc[bas:bas + m] = parca
+    return sonuc
+
+
+def _benzerlik(a, b):
+    mesafe = duzenleme_mesafesi(a, b)
+    uzunluk = np.maximum(np.char.str_len(np.asarray(a, dtype=str)), np.char.str_len(np.asarray(b, dtype=str)))
+    return 1.0 - mesafe / np.maximum(uzunluk, 1)
+
+
+def _puanla(b, o, aday, ayarlar):
+    """
+    Adaylara belge/tutar/tarih puanı verir. Belge puanı tam olsa bile
+    `min_skor`'a ulaşamayacak çiftler pahalı mesafe hesabından önce düşülür.
+    """
+    bb = b.set_index('poz').loc[aday['poz_b'].to_numpy()]
+    oo = o.set_index('poz').loc[aday['poz_o'].to_numpy()]
+    toplam = ayarlar.belge_agirligi + ayarlar.tutar_agirligi + ayarlar.tarih_agirligi
+
+    tb, to = bb['tutar'].to_numpy(), oo['tutar'].to_numpy()
+    olcek = ayarlar.tutar_toleransi * np.maximum(np.maximum(tb, to), 1.0)
+    tutar = 1.0 - np.minimum(np.abs(tb - to) / olcek, 1.0)
+
+    gun = np.abs((bb['tarih'].to_numpy() - oo['tarih'].to_numpy()) / np.timedelta64(1, 'D'))
+    tarih = np.where(np.isnan(gun), 0.5, 1.0 - np.minimum(gun / max(ayarlar.gun_penceresi, 1), 1.0))
+
+    diger = ayarlar.tutar_agirligi * tutar + ayarlar.tarih_agirligi * tarih
+    umut = (ayarlar.belge_agirligi + diger) / toplam >= ayarlar.min_skor
+    bb, oo, diger = bb[umut], oo[umut], diger[umut]
+
+    # Sadece sıfır farkı olan numaralar ("2024000123" / "2024123") da güçlü aday:
+    # sıfırsız halin benzerliği küçük bir indirimle hesaba katılır
+    belge = np.maximum(_benzerlik(bb['rakam'].to_numpy(), oo['rakam'].to_numpy()),
+                       0.95 * _benzerlik(bb['sifirsiz'].to_numpy(), oo['sifirsiz'].to_numpy()))
+    return aday[umut].assign(belge=belge, skor=(ayarlar.belge_agirligi * belge + diger) / toplam)
+
+
+def _karsilikli_en_iyi(puanli):
+    """
+    Bire bir atama: her turda hem kendi satırı hem karşı satırı için en
+    yüksek puanlı olan çiftler kabul edilir, kullanılan satırlar düşülür.
+    En yüksek puanlı çift her zaman karşılıklıdır; her tur ilerler.
+    """
+    kalan = puanli.sort_values('skor', ascending=False, kind='stable')
+    secilen = []
+    while len(kalan):
+        en_iyi_b = kalan.drop_duplicates('poz_b').index
+        en_iyi_o = kalan.drop_duplicates('poz_o').index
+        tur = kalan.loc[en_iyi_b.intersection(en_iyi_o, sort=False)]
+        secilen.append(tur)
+        kalan = kalan[~kalan['poz_b'].isin(tur['poz_b']) & ~kalan['poz_o'].isin(tur['poz_o'])]
+    return pd.concat(secilen).sort_values('poz_b', kind='stable')
+
+
+def benzer_eslestir(kalan_biz, kalan_onlar, ayarlar=None):
+    """
+    Eşleşmeden kalan iki gruplanmış tablo → eşleşen çiftler:
+    DataFrame('poz_biz', 'poz_onlar', 'Benzerlik'); pozisyonlar girdilerin
+    satır sırasıdır (iloc), Benzerlik toplam puandır.
+    """
+    ayarlar = ayarlar or BenzerAyarlari()
+    bos = pd.DataFrame({'poz_biz': pd.Series(dtype=np.int64), 'poz_onlar': pd.Series(dtype=np.int64),
+                        'Benzerlik': pd.Series(dtype=float)})
+    if kalan_biz.empty or kalan_onlar.empty:
+        return bos
+    b, o = _taraf(kalan_biz, ayarlar), _taraf(kalan_onlar, ayarlar)
+    aday = _adaylar(b, o, ayarlar)
+    if aday.empty:
+        return bos
+    puanli = _puanla(b, o, aday, ayarlar)
+    puanli = puanli[(puanli['belge'] >= ayarlar.min_belge_benzerligi) & (puanli['skor'] >= ayarlar.min_skor)]
+    if puanli.empty:
+        return bos
+    secilen = _karsilikli_en_iyi(puanli)
+    return pd.DataFrame({'poz_biz': secilen['poz_b'].to_numpy(np.int64),
+                         'poz_onlar': secilen['poz_o'].to_numpy(np.int64),
+                         'Benzerlik': secilen['skor'].round(3).to_numpy()})
@@ -0,0 +1,184 @@
+"""
+Komut satırından mutabakat (Streamlit sunucusu gerekmez).
+
+Kullanım:
+    python -m motor biz.xlsx onlar.xlsx [onlar_2.xlsx ...] --ayarlar kolonlar.json --cikti Rapor.xlsx
+
+Ayar dosyası (arayüzdeki seçimlerin karşılığı):
+    {
+        "rol": "Biz Alıcıyız",
+        "biz":   {"tarih_col": "Tarih", "belge_col": "Belge No", "tutar_tipi": "Ayrı Kolonlar",
+                  "borc_col": "Borç", "alacak_col": "Alacak", "ekstra": ["Açıklama"],
+                  "ekstra_gruplama": {"Açıklama": "join"}},
+        "onlar": {"tarih_col": "Tarih", "belge_col": "Fatura No", "tutar_tipi": "Tek Kolon",
+                  "tutar_col": "Tutar"},
+        "odeme_toleransi": 0.0,
+        "valor_penceresi": 0,
+        "eslestirme_kurallari": ["match_id", "belge_no"],
+        "benzer_belge": false,
+        "toplu_odeme": false,
+        "okuma": {"motor": "Otomatik", "tum_sayfalar": false},
+        "hesap_motoru": "pandas"
+    }
+
+ekstra_gruplama: aynı belge no'lu satırlar toplanırken ek kolonun değeri
+(first = ilk dolu değer, varsayılan; last; join = farklı değerler ", " ile;
+count = dolu satır sayısı).
+
+eslestirme_kurallari: fatura eşleştirme kademesi; her kural önceki
+kurallardan eşleşmeden kalan satırlara uygulanır (match_id, belge_no,
+{"tur": "tutar_tarih", "gun": 3}, {"tur": "aciklama", "kolon": "Açıklama"},
+benzer; bkz. motor/kademe.py). Verilmezse önce Match_ID, sonra Belge No.
+Rapordaki Kural kolonu her çifti bulan kuralı gösterir.
+
+benzer_belge: true ise tam eşleşmeden sonra eşleşmeyen faturalar benzer
+belge no ile ikinci kez eşleştirilir; dict verilirse eşikler değiştirilir
+(ör. {"min_skor": 0.85}, alanlar için bkz. motor/benzer.py).
+
+toplu_odeme: true ise 1'e 1 eşleşmeyen ödemeler, karşı taraftaki birden
+çok ödemenin toplamıyla eşleştirilir ("Toplu Ödemeler" sayfası); dict ile
+pencere / aday / süre bütçesi değiştirilir (bkz. motor/dagitim.py).
+
+hesap_motoru: "polars" ise anahtar normalizasyonu (Match_ID / Payment_ID)
+ve gruplamada 'join' kolonlarının metin birleştirmesi Polars ile yapılır;
+tutar toplamları, özet ve eşleştirme pandas/numpy'da kalır (sonuç aynıdır;
+Polars kurulu değilse pandas kullanılır, bkz. motor/polars_motoru.py).
+
+--cikti .zip ile biterse Excel yerine tablo başına Parquet/CSV.gz ve
+manifest.json içeren paket yazılır (bkz. motor/aktarim.py).
+
+Karşı taraf dosyaları arayüzdeki gibi alt alta birleştirilir. --depo
+verilirse önceki çalıştırmanın sonuçları kullanılır ve rapora
+"Değişiklikler" sayfası eklenir (bkz. motor/artimli.py).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from motor import okuyucular
+from motor.aktarim import paket_yaz
+from motor.artimli import MutabakatDeposu, artimli_mutabakat
+from motor.benzer import benzer_ayarlari
+from motor.dagitim import dagitim_ayarlari
+from motor.kademe import kademe_kurallari
+from motor.mutabakat import hazirla, mutabakat_yap
+from motor.okuma import (YerelDosya, dosyalari_oku, gerekli_kolonlar, secili_kolonlar, sema_farklari,
+                         sema_farki_metni)
+from motor.olcum import Olcum
+from motor.polars_motoru import hesap_motoru_sec
+from motor.rapor import excel_indir_tek_sayfa, excel_yaz, rapor_sayfalari
+
+ROLLER = ("Biz Alıcıyız", "Biz Satıcıyız")
+
+
+def karsi_rol(rol_kodu):
+    return "Biz Satıcıyız" if rol_kodu == "Biz Alıcıyız" else "Biz Alıcıyız"
+
+
+def taraf_ayarlari(ayar, rol_kodu):
+    """JSON'daki taraf bloğu → (veri_hazirla config'i, rapora eklenecek kolonlar)."""
+    config = {k: v for k, v in ayar.items() if k != 'ekstra'}
+    config.setdefault('tutar_tipi', "Tek Kolon" if config.get('tutar_col') else "Ayrı Kolonlar")
+    config['rol_kodu'] = rol_kodu
+    return config, list(ayar.get('ekstra', []))
+
+
+def defter_oku(yollar, config, ekstra, okuma=None):
+    """
+    Dosyaları sadece gerekli kolonlarıyla okur ve tek defterde birleştirir
+    (bkz. `motor.okuma.dosyalari_oku`: paralel ayrıştırma, Kaynak Dosya
+    kolonu). Başlıkları ilk dosyadan farklı olanlar uyarı olarak yazılır;
+    eşleştirme kolonu eksik dosya varsa ValueError.
+    """
+    okuma = okuma or {}
+    dosyalar = [YerelDosya(yol) for yol in yollar]
+    basliklar = [okuyucular.oku(d.getvalue(), d.name, nrows=0, **okuma).columns.tolist() for d in dosyalar]
+    for ad, fark in sema_farklari({d.yol: b for d, b in zip(dosyalar, basliklar)}).items():
+        print(f"UYARI: {sema_farki_metni(ad, fark, yollar[0])}", file=sys.stderr)
+    df, _ = dosyalari_oku(dosyalar, kolonlar=[gerekli_kolonlar(config, ekstra, b) for b in basliklar],
+                          zorunlu=secili_kolonlar(config), **okuma)
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m motor", description="Cari hesap mutabakatı (komut satırı)")
+    parser.add_argument("biz", help="Bizim defter (xlsx/xls/csv/tsv/parquet)")
+    parser.add_argument("onlar", nargs="+", help="Karşı taraf defter(ler)i")
+    parser.add_argument("--ayarlar", required=True, help="Kolon eşleştirme JSON dosyası")
+    parser.add_argument("--cikti", default="Rapor.xlsx", help="Rapor dosyası (varsayılan: Rapor.xlsx; .zip → Parquet/CSV paketi)")
+    parser.add_argument("--tek-sayfa", action="store_true", help="Tüm tabloları tek sayfada listele")
+    parser.add_argument("--depo", help="Artımlı çalıştırma deposu (SQLite); verilirse sadece değişenler eşleştirilir")
+    parser.add_argument("--cari", help="Depodaki cari anahtarı (varsayılan: ilk karşı taraf dosyasının adı)")
+    parser.add_argument("--performans-log", help="Aşama süreleri/bellek kaydının ekleneceği JSON lines dosyası")
+    parser.add_argument("--performans", action="store_true", help="Aşama sürelerini ekrana yaz")
+    args = parser.parse_args(argv)
+
+    with open(args.ayarlar, "r", encoding="utf-8") as f:
+        ayarlar = json.load(f)
+
+    rol_kodu = ayarlar.get('rol', "Biz Alıcıyız")
+    if rol_kodu not in ROLLER:
+        parser.error(f"Geçersiz rol: {rol_kodu!r} (beklenen: {' / '.join(ROLLER)})")
+    cf1, ex_biz = taraf_ayarlari(ayarlar.get('biz', {}), rol_kodu)
+    cf2, ex_onlar = taraf_ayarlari(ayarlar.get('onlar', {}), karsi_rol(rol_kodu))
+
+    start = time.time()
+    olcum = Olcum(biz_dosyasi=os.path.basename(args.biz), onlar_dosyalari=[os.path.basename(y) for y in args.onlar],
+                  rol=rol_kodu, arac="cli")
+    with olcum.asama("okuma") as k:
+        d1 = defter_oku([args.biz], cf1, ex_biz, ayarlar.get('okuma'))
+        d2 = defter_oku(args.onlar, cf2, ex_onlar, ayarlar.get('okuma'))
+        k["cikti"] = len(d1) + len(d2)
+
+    tolerans = float(ayarlar.get('odeme_toleransi', 0.0))
+    gun_penceresi = int(ayarlar.get('valor_penceresi', 0)) or None
+    benzer = benzer_ayarlari(ayarlar.get('benzer_belge'))
+    dagitim = dagitim_ayarlari(ayarlar.get('toplu_odeme'))
+    kurallar = kademe_kurallari(ayarlar.get('eslestirme_kurallari'))
+    hesap = hesap_motoru_sec(ayarlar.get('hesap_motoru', "pandas"))
+    if args.depo:
+        cari = args.cari or os.path.splitext(os.path.basename(args.onlar[0]))[0]
+        with olcum.asama("veri_hazirla", girdi=len(d1) + len(d2)) as k:
+            biz = hazirla(d1, cf1, "Biz", ex_biz, hesap=hesap)
+            onlar = hazirla(d2, cf2, "Onlar", ex_onlar, hesap=hesap)
+            k["cikti"] = len(biz.ham) + len(onlar.ham)
+        with olcum.asama("artimli_mutabakat", girdi=len(biz.ham) + len(onlar.ham)) as k:
+            artimli = artimli_mutabakat(
+                biz, onlar, rol_kodu,
+                MutabakatDeposu(args.depo), cari, ayarlar={'biz': cf1, 'onlar': cf2},
+                tolerans=tolerans, gun_penceresi=gun_penceresi, benzer=benzer, dagitim=dagitim, kurallar=kurallar,
+            )
+            k["cikti"] = sum(len(t) for t in artimli.tablolar().values())
+        print(artimli.bilgi_metni())
+        sonuc, tablolar = artimli.sonuc, artimli.tablolar()
+    else:
+        sonuc = mutabakat_yap(d1, cf1, d2, cf2, rol_kodu, ex_biz, ex_onlar,
+                              tolerans=tolerans, gun_penceresi=gun_penceresi, olcum=olcum, benzer=benzer,
+                              dagitim=dagitim, kurallar=kurallar, hesap=hesap)
+        tablolar = sonuc.tablolar()
+    print(sonuc.fatura.bilgi_metni())
+    for uyari in sonuc.uyarilar():
+        print(f"UYARI: {uyari}", file=sys.stderr)
+
+    sayfalar = rapor_sayfalari(tablolar)
+    with olcum.asama("disa_aktarim", girdi=sum(len(df) for df in sayfalar.values())):
+        if args.cikti.lower().endswith(".zip"):
+            paket_yaz(args.cikti, tablolar,
+                      parametreler=dict(ayarlar, biz_dosyasi=args.biz, onlar_dosyalari=args.onlar),
+                      sureler={k['asama']: k['sure_sn'] for k in olcum.asamalar})
+        elif args.tek_sayfa:
+            with open(args.cikti, "wb") as f:
+                f.write(excel_indir_tek_sayfa(sayfalar))
+        else:
+            excel_yaz(args.cikti, sayfalar)
+
+    for sayfa, df in sayfalar.items():
+        print(f"{sayfa:<20} {len(df):>8} satır")
+    if args.performans:
+        print(olcum.tablo().to_string(index=False), file=sys.stderr)
+    if args.performans_log:
+        olcum.log_yaz(args.performans_log)
+    print(f"Rapor: {os.path.abspath(args.cikti)} ({time.time() - start:.2f} sn)")
+    return 0
@@ -0,0 +1,293 @@
+"""
+Toplu ödeme dağıtımı (1'e 1 ödeme eşleştirmesinden sonra).
+
+Karşı tarafın beş faturayı kapatan tek havalesi bizde beş ayrı ödeme
+satırıdır; iki parça halinde yapılan ödeme de karşı tarafta tek satırdır.
+Bunlar ref / tutar ile 1'e 1 eşleşmediği için eşleşmeyenlere düşer.
+Burada, eşleşmeden kalan ödemeler arasında bir taraftaki tek ödeme ile
+karşı taraftaki birden çok ödemenin toplamı (tolerans dahilinde) eşlenir.
+
+Bloklama: para birimi + tarih penceresi (Tarih_Odeme). Cari zaten
+çalıştırma başına tektir (toplu modda cari bazında bölünür). Hedefler
+büyükten küçüğe gezilir; her hedef için karşı tarafın henüz kullanılmamış,
+hedeften küçük ve pencereye uyan ödemelerinden tarihe en yakın
+`maks_aday` tanesi aday olur. Alt küme toplamı kuruş cinsinden tamsayı
+ile ortada buluşma (meet-in-the-middle) yöntemiyle aranır: adaylar ikiye
+bölünür, her yarının tüm alt küme toplamları (2^(maks_aday/2)) eleman
+sayısına göre ayrılıp sıralanır, en az parçalı çözüm ikili aramayla
+bulunur. Blok başına süre bütçesi (`blok_suresi`) dolunca kalan hedefler
+denenmez ve sayısı uyarı olarak bildirilir.
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from motor.odeme import odeme_tablolari
+from motor.sonuc import _ek_kolonlar, durum_kolonu, tarih_metni
+
+_BOS_PB = "\x00"
+_NAT = np.iinfo(np.int64).min
+
+
+@dataclass
+class DagitimAyarlari:
+    gun_penceresi: Optional[int] = 7    # hedef ile parçalar arasındaki en büyük valör farkı; None = sınırsız
+    maks_aday: int = 20                 # hedef başına aday ödeme (alt küme sayısı 2 × 2^(maks_aday/2))
+    maks_parca: int = 5                 # bir hedefin en çok kaç ödemeye dağıtılacağı
+    blok_suresi: float = 2.0            # para birimi bloğu başına süre bütçesi (sn)
+
+
+def dagitim_ayarlari(deger) -> Optional[DagitimAyarlari]:
+    """Ayar dosyasındaki "toplu_odeme" değeri: false/yok → None, true → varsayılanlar, dict → alanlar."""
+    if not deger:
+        return None
+    if isinstance(deger, DagitimAyarlari):
+        return deger
+    if deger is True:
+        return DagitimAyarlari()
+    return DagitimAyarlari(**deger)
+
+
+@dataclass
+class DagitimSonucu:
+    uyelik: pd.DataFrame    # grup, taraf ("Biz" / "Onlar"), hedef (bool), poz (ödeme tablosunda iloc)
+    atlanan: int = 0        # süre bütçesi dolduğu için denenmeyen hedef sayısı
+
+    def pozisyonlar(self, taraf):
+        return self.uyelik.loc[self.uyelik['taraf'] == taraf, 'poz'].to_numpy(np.int64)
+
+
+def _bos_sonuc(atlanan=0):
+    return DagitimSonucu(pd.DataFrame({'grup': pd.Series(dtype=np.int64), 'taraf': pd.Series(dtype=object),
+                                       'hedef': pd.Series(dtype=bool), 'poz': pd.Series(dtype=np.int64)}),
+                         atlanan)
+
+
+def _alt_kume_toplamlari(tutarlar):
+    """Tüm alt kümeler → (toplam, bit maskesi, eleman sayısı); 2^len satır."""
+    maske = np.arange(1 << len(tutarlar), dtype=np.int64)
+    bitler = (maske[:, None] >> np.arange(len(tutarlar))) & 1
+    return bitler @ tutarlar, maske, bitler.sum(axis=1)
+
+
+def iki_parca(tutarlar, hedef, tolerans, uzaklik=None):
+    """
+    tutarlar (kuruş, int64) içinde toplamı [hedef - tolerans, hedef + tolerans]
+    aralığında olan iki eleman (sıralı dizide ikili arama; aday sınırı
+    gerekmez). Birden çok çift varsa `uzaklik` (hedefe tarih uzaklığı)
+    toplamı en küçük olan seçilir. Dönüş: iki pozisyon veya None.
+    """
+    sira = np.argsort(tutarlar, kind='stable')
+    s = tutarlar[sira]
+    alt = np.maximum(np.searchsorted(s, hedef - tolerans - s, 'left'), np.arange(1, len(s) + 1))
+    ust = np.searchsorted(s, hedef + tolerans - s, 'right')
+    isabet = np.flatnonzero(ust > alt)
+    if not len(isabet):
+        return None
+    i = isabet[0]
+    if uzaklik is not None and len(isabet) > 1:
+        u = uzaklik[sira]
+        i = isabet[np.argmin(u[isabet] + u[alt[isabet]])]
+    return [int(sira[i]), int(sira[alt[i]])]
+
+
+def en_az_parcali_alt_kume(tutarlar, hedef, tolerans, maks_parca, en_az=2):
+    """
+    tutarlar (kuruş, int64) içinde toplamı [hedef - tolerans, hedef + tolerans]
+    aralığında olan, en az `en_az` en çok `maks_parca` elemanlı alt küme. Önce
+    en az elemanlı, eşitlikte hedefe en yakın toplamlı olan seçilir. Dönüş:
+    seçilen pozisyonlar veya None.
+    """
+    n = len(tutarlar)
+    h = n // 2
+    sa, ma, ka = _alt_kume_toplamlari(tutarlar[:h])
+    sb, mb, kb = _alt_kume_toplamlari(tutarlar[h:])
+    b_gruplari = {}
+    for b in range(min(maks_parca, n - h) + 1):
+        sec = np.flatnonzero(kb == b)
+        sira = sec[np.argsort(sb[sec], kind='stable')]
+        b_gruplari[b] = (sb[sira], mb[sira])
+
+    for k in range(en_az, min(maks_parca, n) + 1):
+        en_iyi = None  # (fark, maske_a, maske_b)
+        for a in range(max(0, k - (n - h)), min(k, h) + 1):
+            s_b, m_b = b_gruplari[k - a]
+            sec = ka == a
+            s_a, m_a = sa[sec], ma[sec]
+            if not len(s_a) or not len(s_b):
+                continue
+            alt = np.searchsorted(s_b, hedef - tolerans - s_a, 'left')
+            ust = np.searchsorted(s_b, hedef + tolerans - s_a, 'right')
+            isabet = np.flatnonzero(ust > alt)
+            if not len(isabet):
+                continue
+            # Aralıktaki en yakın toplam aralığın iki ucundan biridir
+            for j in (alt[isabet], ust[isabet] - 1):
+                fark = np.abs(s_a[isabet] + s_b[j] - hedef)
+                i = int(np.argmin(fark))
+                if en_iyi is None or fark[i] < en_iyi[0]:
+                    en_iyi = (fark[i], int(m_a[isabet[i]]), int(m_b[j[i]]))
+        if en_iyi is not None:
+            maske = en_iyi[1] | (en_iyi[2] << h)
+            return [i for i in range(n) if maske >> i & 1]
+    return None
+
+
+def _kurus(tutar):
+    return np.round(tutar * 100).astype(np.int64)
+
+
+def _uzaklik(tarihler, tarih):
+    """Hedefe valör uzaklığı (ns); NaT'lar en uzak sayılır."""
+    if tarih == _NAT:
+        return np.where(tarihler == _NAT, 1, 0).astype(np.float64)
+    return np.where(tarihler == _NAT, np.inf, np.abs(tarihler - tarih).astype(np.float64))
+
+
+def _blok_dagit(tutar, tarih, taraf, tolerans, pencere, ayarlar):
+    """
+    Tek PB bloğu. tutar: kuruş (int64, >0), tarih: ns (NaT = _NAT), taraf:
+    0 = biz, 1 = onlar. İki tur: önce tüm hedefler için iki parçalı
+    çözümler (tüm pencere üzerinde, en güvenilir eşleşmeler önce alınsın),
+    sonra kalan hedefler için 3..maks_parca parça, tarihe en yakın
+    `maks_aday` aday üzerinde. Dönüş: ([(hedef, [parçalar]), ...], atlanan);
+    indeksler blok içi pozisyondur.
+    """
+    bas = time.perf_counter()
+    kullanildi = np.zeros(len(tutar), dtype=bool)
+    gruplar = []
+    hedefler = np.lexsort((np.arange(len(tutar)), -tutar))
+    for tur in (2, 3):
+        for n_hedef, q in enumerate(hedefler):
+            if kullanildi[q]:
+                continue
+            if time.perf_counter() - bas > ayarlar.blok_suresi:
+                # İkinci tur hiç başlamadıysa açık kalan her hedef eksik denenmiştir
+                kalan = hedefler[n_hedef:] if tur == 3 else hedefler
+                return gruplar, int((~kullanildi[kalan]).sum())
+            uygun = ~kullanildi & (taraf != taraf[q]) & (tutar <= tutar[q] + tolerans)
+            if pencere is not None:
+                uygun &= (tarih != _NAT) & (tarih[q] != _NAT) & (np.abs(tarih - tarih[q]) <= pencere)
+            aday = np.flatnonzero(uygun)
+            if len(aday) < tur or tutar[aday].sum() < tutar[q] - tolerans:
+                continue
+            uzaklik = _uzaklik(tarih[aday], tarih[q])
+            if tur == 2:
+                secilen = iki_parca(tutar[aday], tutar[q], tolerans, uzaklik)
+            else:
+                if len(aday) > ayarlar.maks_aday:
+                    aday = aday[np.lexsort((aday, uzaklik))[:ayarlar.maks_aday]]
+                secilen = en_az_parcali_alt_kume(tutar[aday], tutar[q], tolerans, ayarlar.maks_parca, en_az=3)
+            if secilen is None:
+                continue
+            parcalar = aday[secilen]
+            kullanildi[q] = True
+            kullanildi[parcalar] = True
+            gruplar.append((int(q), parcalar.tolist()))
+    return gruplar, 0
+
+
+def _tutar(pay):
+    return (pay['Borc'] - pay['Alacak']).abs().to_numpy(np.float64)
+
+
+def _tarih_ns(seri):
+    return pd.to_datetime(pd.Series(seri)).to_numpy('datetime64[ns]').view(np.int64)
+
+
+def odeme_dagit(pay_biz, pay_onlar, eslesme, tolerans=0.0, ayarlar=None):
+    """
+    `odeme_eslestir` sonucunda (eslesme = (biz_poz, onlar_poz)) eşleşmeden
+    kalan ödemeler için toplu dağıtım. tolerans: grup toplamları arasında
+    kabul edilen en büyük fark (PB cinsinden; ödeme toleransıyla aynı).
+    """
+    ayarlar = ayarlar or DagitimAyarlari()
+    acik_b = np.ones(len(pay_biz), dtype=bool)
+    acik_o = np.ones(len(pay_onlar), dtype=bool)
+    acik_b[eslesme[0]] = False
+    acik_o[eslesme[1]] = False
+    tutar_b, tutar_o = _tutar(pay_biz), _tutar(pay_onlar)
+    acik_b &= tutar_b > 0
+    acik_o &= tutar_o > 0
+    poz = np.concatenate([np.flatnonzero(acik_b), np.flatnonzero(acik_o)])
+    if not acik_b.any() or not acik_o.any():
+        return _bos_sonuc()
+
+    taraf = np.repeat(np.array([0, 1], dtype=np.int8), [acik_b.sum(), acik_o.sum()])
+    tutar = _kurus(np.concatenate([tutar_b[acik_b], tutar_o[acik_o]]))
+    tarih = np.concatenate([_tarih_ns(pay_biz['Tarih_Odeme'])[acik_b], _tarih_ns(pay_onlar['Tarih_Odeme'])[acik_o]])
+    pb = np.concatenate([pd.Series(pay_biz['Para_Birimi']).astype(object).fillna(_BOS_PB).to_numpy()[acik_b],
+                         pd.Series(pay_onlar['Para_Birimi']).astype(object).fillna(_BOS_PB).to_numpy()[acik_o]])
+    tolerans = int(round(max(float(tolerans), 0.0) * 100))
+    pencere = None if ayarlar.gun_penceresi is None else int(ayarlar.gun_penceresi * 86_400 * 10**9)
+
+    satirlar, atlanan = [], 0
+    for deger in pd.unique(pb):
+        blok = np.flatnonzero(pb == deger)
+        if len(np.unique(taraf[blok])) < 2:
+            continue
+        gruplar, a = _blok_dagit(tutar[blok], tarih[blok], taraf[blok], tolerans, pencere, ayarlar)
+        atlanan += a
+        for hedef, parcalar in gruplar:
+            satirlar.append((True, blok[hedef]))
+            satirlar.extend((False, blok[i]) for i in parcalar)
+    if not satirlar:
+        return _bos_sonuc(atlanan)
+
+    hedef, blok_poz = map(np.array, zip(*satirlar))
+    return DagitimSonucu(pd.DataFrame({
+        'grup': np.cumsum(hedef).astype(np.int64),  # her grup hedef satırıyla başlar
+        'taraf': np.where(taraf[blok_poz] == 0, "Biz", "Onlar").astype(object),
+        'hedef': hedef.astype(bool),
+        'poz': poz[blok_poz].astype(np.int64),
+    }), atlanan)
+
+
+def dagitim_tablosu(pay_biz, pay_onlar, dagitim, ex_biz, ex_onlar):
+    """Toplu Ödemeler tablosu: her grupta önce hedef ödeme, sonra dağıtıldığı parçalar."""
+    u = dagitim.uyelik
+    if u.empty:
+        return pd.DataFrame()
+    parcalar = []
+    for taraf, pay, ex_cols, onek, isaret in (("Biz", pay_biz, ex_biz, "BİZ", 1.0),
+                                              ("Onlar", pay_onlar, ex_onlar, "KARŞI", -1.0)):
+        sec = u[u['taraf'] == taraf]
+        p = pay.iloc[sec['poz'].to_numpy()]
+        tutar = _tutar(p)
+        kolonlar = {
+            "_sira": sec.index.to_numpy(),
+            "_fark": isaret * tutar,
+            "Grup": sec['grup'].to_numpy(),
+            "Taraf": np.full(len(p), taraf, dtype=object),
+            "Ödeme Ref": p['Payment_ID'].to_numpy(),
+            "Tarih": tarih_metni(p['Tarih_Odeme']).to_numpy(),
+            "Tutar": tutar,
+            "PB": p['Para_Birimi'].to_numpy(),
+        }
+        kolonlar.update(_ek_kolonlar(p, ex_cols, onek, None))
+        parcalar.append(pd.DataFrame(kolonlar))
+    df = pd.concat(parcalar, ignore_index=True, sort=False).sort_values('_sira', ignore_index=True)
+
+    fark = df.groupby('Grup', sort=False)['_fark'].transform('sum').round(2).to_numpy()
+    df.insert(0, "Durum", durum_kolonu(np.where(np.abs(fark) < 0.01, "🟣 Toplu Ödeme", "🟣 Toplu Ödeme (Tutar Farkı)")))
+    df.insert(df.columns.get_loc("PB") + 1, "Fark (TL)", fark)
+    ek = [c for c in df.columns if c.startswith(("BİZ: ", "KARŞI: "))]
+    df[ek] = df[ek].fillna("")
+    return df.drop(columns=["_sira", "_fark"])
+
+
+def dagitimli_tablolar(pay_biz, pay_onlar, ex_biz, ex_onlar, eslesme, tolerans=0.0, ayarlar=None):
+    """
+    `odeme_tablolari` + toplu dağıtım: (Ödemeler, Bizde Var (Ödeme),
+    Onlarda Var (Ödeme), Toplu Ödemeler, atlanan hedef sayısı).
+    """
+    dagitim = odeme_dagit(pay_biz, pay_onlar, eslesme, tolerans, ayarlar)
+    eslesen, bizde_var, onlarda_var = odeme_tablolari(
+        pay_biz, pay_onlar, ex_biz, ex_onlar, eslesme=eslesme,
+        dagitilan=(dagitim.pozisyonlar("Biz"), dagitim.pozisyonlar("Onlar")),
+    )
+    return (eslesen, bizde_var, onlarda_var, dagitim_tablosu(pay_biz, pay_onlar, dagitim, ex_biz, ex_onlar),
+            dagitim.atlanan)
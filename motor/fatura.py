@@ -0,0 +1,182 @@
+"""
+Eşleşen fatura çiftleri için rol bazlı tutar / fark senaryosu seçimi.
+
+`hesap_fatura_tutar` tek satır (merged.iterrows) için referans davranıştır.
+`fatura_tutarlari` aynı seçimi tüm merged tablo üzerinde dört senaryonun
+fark matrisi ve maskelerle tek geçişte yapar.
+"""
+import numpy as np
+import pandas as pd
+
+from motor.sayisal import _to_float, tutar_serisi_cevir
+
+
+def hesap_fatura_tutar(m, rol_kodu):
+    """
+    Biz Alıcı / Biz Satıcı rolüne göre:
+      - Önce çapraz senaryoları dener (normal + iade)
+      - Çapraz işe yaramazsa paralel senaryolara bakar (Borc-Borc, Alacak-Alacak)
+      - En düşük mutlak farka sahip senaryonun tutarlarını döner.
+    """
+
+    # Değerleri güvenli al
+    bb = _to_float(m.get("Borc_Biz", 0))      # Biz Borç
+    ba = _to_float(m.get("Alacak_Biz", 0))    # Biz Alacak
+    ob = _to_float(m.get("Borc_Onlar", 0))    # Onlar Borç
+    oa = _to_float(m.get("Alacak_Onlar", 0))  # Onlar Alacak
+
+    cross_scenarios = []
+
+    # --- ROL TEMELLİ ÇAPRAZ SENARYOLAR ---
+
+    if rol_kodu == "Biz Alıcıyız":
+        # Normal: Biz Alacak, Onlar Borç
+        cross_scenarios.append(("normal_BizAlacak_OnlarBorc", ba, ob))
+        # İade: Biz Borç, Onlar Alacak
+        cross_scenarios.append(("iade_BizBorc_OnlarAlacak", bb, oa))
+    else:
+        # Biz Satıcıyız
+        # Normal: Biz Borç, Onlar Alacak
+        cross_scenarios.append(("normal_BizBorc_OnlarAlacak", bb, oa))
+        # İade: Biz Alacak, Onlar Borç
+        cross_scenarios.append(("iade_BizAlacak_OnlarBorc", ba, ob))
+
+    # --- PARALEL SENARYOLAR (işaret / kolon kayması için) ---
+    parallel_scenarios = [
+        ("parallel_Borc_Borc", bb, ob),
+        ("parallel_Alacak_Alacak", ba, oa),
+    ]
+
+    def with_diff(scenarios):
+        out = []
+        for name, my_amt, their_amt in scenarios:
+            diff = their_amt - my_amt
+            out.append({
+                "name": name,
+                "biz": my_amt,
+                "onlar": their_amt,
+                "diff": diff
+            })
+        return out
+
+    cross = with_diff(cross_scenarios)
+    parallel = with_diff(parallel_scenarios)
+
+    def both_nonzero(s):
+        return abs(s["biz"]) > 0.001 and abs(s["onlar"]) > 0.001
+
+    def any_nonzero(s):
+        return abs(s["biz"]) > 0.001 or abs(s["onlar"]) > 0.001
+
+    # 1) Önce rol kuralına uygun ÇAPRAZ senaryolarda iki tarafı da dolu olanlara bak
+    cross_both = [s for s in cross if both_nonzero(s)]
+    if cross_both:
+        best = min(cross_both, key=lambda x: abs(x["diff"]))
+        return best["biz"], best["onlar"], best["diff"]
+
+    # 2) Çaprazlar işe yaramadıysa, PARALEL senaryolarda (Borc-Borc / Alacak-Alacak)
+    #    iki tarafı da dolu olanlara bak (Vodafone iade örneğin burada yakalanıyor)
+    parallel_both = [s for s in parallel if both_nonzero(s)]
+    if parallel_both:
+        best = min(parallel_both, key=lambda x: abs(x["diff"]))
+        return best["biz"], best["onlar"], best["diff"]
+
+    # 3) Hâlâ yoksa, tüm senaryolar içinde en az bir tarafı dolu olanlardan
+    #    farkı en küçük olanı seç (çok edge case)
+    all_scenarios = cross + parallel
+    any_filled = [s for s in all_scenarios if any_nonzero(s)]
+    if any_filled:
+        best = min(any_filled, key=lambda x: abs(x["diff"]))
+        return best["biz"], best["onlar"], best["diff"]
+
+    # 4) Gerçekten tamamen boş satır
+    return 0.0, 0.0, 0.0
+
+
+def _senaryo_kolonlari(rol_kodu):
+    """(senaryo adı, biz kolonu, onlar kolonu) — skaler fonksiyondaki sırayla."""
+    if rol_kodu == "Biz Alıcıyız":
+        capraz = [
+            ("normal_BizAlacak_OnlarBorc", "Alacak_Biz", "Borc_Onlar"),
+            ("iade_BizBorc_OnlarAlacak", "Borc_Biz", "Alacak_Onlar"),
+        ]
+    else:
+        capraz = [
+            ("normal_BizBorc_OnlarAlacak", "Borc_Biz", "Alacak_Onlar"),
+            ("iade_BizAlacak_OnlarBorc", "Alacak_Biz", "Borc_Onlar"),
+        ]
+    paralel = [
+        ("parallel_Borc_Borc", "Borc_Biz", "Borc_Onlar"),
+        ("parallel_Alacak_Alacak", "Alacak_Biz", "Alacak_Onlar"),
+    ]
+    return capraz + paralel
+
+
+def _sirali_min(uygun, anahtar, adaylar):
+    """
+    `min(..., key=lambda x: abs(x["diff"]))` davranışını satır bazında
+    taklit eder: adaylar sırayla gezilir, sadece kesin küçük olan öne geçer
+    (eşitlikte ilk senaryo kalır, NaN fark sonradan öne geçemez).
+    Uygun aday yoksa -1 döner.
+    """
+    n = len(anahtar)
+    kazanan = np.full(n, -1)
+    en_iyi = np.full(n, np.nan)
+    for j in adaylar:
+        yeni = uygun[:, j] & ((kazanan == -1) | (anahtar[:, j] < en_iyi))
+        kazanan[yeni] = j
+        en_iyi[yeni] = anahtar[yeni, j]
+    return kazanan
+
+
+def fatura_tutarlari(merged, rol_kodu):
+    """
+    `hesap_fatura_tutar`'ın tüm merged tablo için toplu hali.
+
+    Borc_Biz, Alacak_Biz, Borc_Onlar, Alacak_Onlar kolonlarından dört
+    senaryonun (2 çapraz + 2 paralel) fark matrisi kurulur; öncelik sırası
+    aynıdır: çapraz iki taraf dolu → paralel iki taraf dolu → herhangi bir
+    tarafı dolu → 0.
+
+    Dönüş: merged ile aynı index'li DataFrame
+        'Tutar (Biz)', 'Tutar (Onlar)', 'Fark', 'Senaryo' (kazanan senaryo adı, yoksa "")
+    """
+    senaryolar = _senaryo_kolonlari(rol_kodu)
+    n = len(merged)
+
+    def kolon(ad):
+        if ad in merged.columns:
+            return tutar_serisi_cevir(merged[ad])[0].to_numpy()
+        return np.zeros(n)
+
+    degerler = {ad: kolon(ad) for ad in ("Borc_Biz", "Alacak_Biz", "Borc_Onlar", "Alacak_Onlar")}
+    biz = np.column_stack([degerler[b] for _, b, _ in senaryolar]) if n else np.zeros((0, 4))
+    onlar = np.column_stack([degerler[o] for _, _, o in senaryolar]) if n else np.zeros((0, 4))
+    with np.errstate(invalid='ignore'):
+        fark = onlar - biz  # inf - inf → NaN, skaler yoldaki gibi
+    anahtar = np.abs(fark)
+
+    dolu_biz = np.abs(biz) > 0.001
+    dolu_onlar = np.abs(onlar) > 0.001
+    iki_taraf = dolu_biz & dolu_onlar
+    tek_taraf = dolu_biz | dolu_onlar
+
+    # 1) çapraz iki taraf dolu  2) paralel iki taraf dolu  3) herhangi biri dolu
+    kazanan = _sirali_min(iki_taraf, anahtar, [0, 1])
+    for uygun, adaylar in ((iki_taraf, [2, 3]), (tek_taraf, [0, 1, 2, 3])):
+        acik = kazanan == -1
+        if not acik.any():
+            break
+        kazanan = np.where(acik, _sirali_min(uygun, anahtar, adaylar), kazanan)
+
+    secili = kazanan >= 0
+    satir = np.arange(n)
+    j = np.where(secili, kazanan, 0)
+    adlar = np.array([ad for ad, _, _ in senaryolar] + [""], dtype=object)
+
+    return pd.DataFrame({
+        "Tutar (Biz)": np.where(secili, biz[satir, j], 0.0),
+        "Tutar (Onlar)": np.where(secili, onlar[satir, j], 0.0),
+        "Fark": np.where(secili, fark[satir, j], 0.0),
+        "Senaryo": adlar[kazanan],
+    }, index=merged.index)
@@ -0,0 +1,142 @@
+"""
+Sonuç tablolarının sunucu tarafında süzülüp sayfalanması.
+
+Arayüz tablonun tamamını `df.style.apply(...)` ile tarayıcıya göndermez:
+süzme (Durum, PB, tarih aralığı, tutar eşiği, belge no araması) ve
+sıralama burada satır pozisyonları üzerinde yapılır, tarayıcıya sadece
+görünen sayfa gider. Renk/kalınlık da sadece o sayfa için, kolon bazında
+hesaplanır.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+TARIH_KOLONLARI = ("Tarih (Biz)", "Tarih", "Tarih (Onlar)")
+ARAMA_KOLONLARI = ("Belge No", "Ödeme Ref")
+TUTAR_KOLONLARI = ("Fark (TL)", "Tutar (Biz)", "Tutar (Onlar)", "Tutar", "Fark (Döviz)")
+SAYFA_BOYLARI = (100, 500, 1000, 5000)
+
+FARK_RENGI = 'background-color: #ffe6e6'
+
+
+@dataclass
+class Filtre:
+    durumlar: list = field(default_factory=list)  # boş: hepsi
+    para_birimleri: list = field(default_factory=list)
+    tarih_bas: object = None
+    tarih_bit: object = None
+    tutar_kolonu: str = None
+    min_tutar: float = 0.0  # |tutar| >= min_tutar
+    arama: str = ""
+    siralama: str = None
+    artan: bool = True
+
+
+class TabloGorunumu:
+    """
+    Bir sonuç tablosunun süzme/sıralama görünümü. Tarih metinlerinin
+    ('gg.aa.yyyy') çözülmüş hali ve arama için küçük harfli belge
+    numaraları ilk ihtiyaçta bir kez hesaplanıp saklanır; nesne oturumda
+    tutulursa sonraki rerun'lar bunları tekrar hesaplamaz.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._tarihler = {}
+        self._arama = None
+
+    def kolon(self, adaylar):
+        return next((c for c in adaylar if c in self.df.columns), None)
+
+    def secenekler(self, kolon):
+        if kolon not in self.df.columns:
+            return []
+        return sorted(self.df[kolon].dropna().astype(str).unique().tolist())
+
+    def tarih(self, kolon):
+        if kolon not in self._tarihler:
+            self._tarihler[kolon] = pd.to_datetime(self.df[kolon], format='%d.%m.%Y', errors='coerce').to_numpy()
+        return self._tarihler[kolon]
+
+    def _arama_metni(self):
+        if self._arama is None:
+            kolonlar = [c for c in ARAMA_KOLONLARI if c in self.df.columns]
+            self._arama = [self.df[c].astype(str).str.casefold().reset_index(drop=True) for c in kolonlar]
+        return self._arama
+
+    def maske(self, filtre):
+        df = self.df
+        m = np.ones(len(df), dtype=bool)
+        if filtre.durumlar and "Durum" in df.columns:
+            m &= df["Durum"].isin(filtre.durumlar).to_numpy()
+        if filtre.para_birimleri and "PB" in df.columns:
+            m &= df["PB"].astype(str).isin(filtre.para_birimleri).to_numpy()
+        tarih_kolonu = self.kolon(TARIH_KOLONLARI)
+        if tarih_kolonu and (filtre.tarih_bas is not None or filtre.tarih_bit is not None):
+            tarih = self.tarih(tarih_kolonu)
+            if filtre.tarih_bas is not None:
+                m &= tarih >= np.datetime64(pd.Timestamp(filtre.tarih_bas))
+            if filtre.tarih_bit is not None:
+                m &= tarih <= np.datetime64(pd.Timestamp(filtre.tarih_bit))
+        if filtre.min_tutar and filtre.tutar_kolonu in df.columns:
+            tutar = pd.to_numeric(df[filtre.tutar_kolonu], errors='coerce').abs().to_numpy()
+            m &= tutar >= filtre.min_tutar
+        aranan = (filtre.arama or "").strip().casefold()
+        if aranan:
+            bulunan = np.zeros(len(df), dtype=bool)
+            for metin in self._arama_metni():
+                bulunan |= metin.str.contains(aranan, regex=False).to_numpy(dtype=bool, na_value=False)
+            m &= bulunan
+        return m
+
+    def pozisyonlar(self, filtre):
+        """Süzülmüş ve sıralanmış satır pozisyonları."""
+        poz = np.flatnonzero(self.maske(filtre))
+        kolon = filtre.siralama
+        if kolon not in self.df.columns or not len(poz):
+            return poz
+        if kolon in TARIH_KOLONLARI:
+            anahtar = pd.Series(self.tarih(kolon)[poz])
+        else:
+            anahtar = self.df[kolon].iloc[poz].reset_index(drop=True)
+        sira = anahtar.sort_values(ascending=filtre.artan, kind='stable', na_position='last').index.to_numpy()
+        return poz[sira]
+
+    def durum_sayilari(self, poz):
+        """Süzülmüş satırların Durum dağılımı (sadece sayılar)."""
+        if "Durum" not in self.df.columns:
+            return pd.Series(dtype=int)
+        # Kategorik Durum'da value_counts hiç görünmeyen değerleri de 0 ile
+        # listelerdi; görünüş sırasıyla sadece bulunanlar sayılır
+        durum = self.df["Durum"].iloc[poz]
+        return durum.groupby(durum, observed=True, sort=False).size().rename("count")
+
+    def sayfa(self, poz, sayfa_no, sayfa_boyu):
+        """1'den başlayan sayfa numarasıyla görünen satırlar (orijinal index korunur)."""
+        bas = (sayfa_no - 1) * sayfa_boyu
+        return self.df.iloc[poz[bas:bas + sayfa_boyu]]
+
+
+def sayfa_sayisi(satir, sayfa_boyu):
+    return max(1, -(-satir // sayfa_boyu))
+
+
+def sayfa_stili(df, kalin_kolonlar=(), fark_satirlari=False, hassasiyet=None):
+    """
+    Sadece verilen (görünen) satırlar için Styler. CSS tablosu satır satır
+    Python fonksiyonu çağırmadan, kolon maskelerinden kurulur.
+    """
+    def css(x):
+        stil = np.full(x.shape, '', dtype=object)
+        kalin = np.isin(x.columns, list(kalin_kolonlar))
+        stil[:, kalin] = 'font-weight: bold'
+        if fark_satirlari and "Durum" in x.columns:
+            fark = x["Durum"].astype(str).str.contains("❌", regex=False).to_numpy()
+            stil[fark, :] = np.where(stil[fark, :] == '', FARK_RENGI, stil[fark, :] + '; ' + FARK_RENGI)
+        return pd.DataFrame(stil, index=x.index, columns=x.columns)
+
+    stil = df.style.apply(css, axis=None)
+    if hassasiyet is not None:
+        stil = stil.format(precision=hassasiyet)
+    return stil
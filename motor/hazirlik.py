@@ -0,0 +1,287 @@
+"""
+Ham defterin standart şemaya çevrilmesi (`veri_hazirla`) ve aynı
+Match_ID'li satırların tek belgeye toplanması (`grupla`).
+
+Çıktı kolonları: Tarih, Tarih_Odeme, Orijinal_Belge_No, Match_ID,
+Payment_ID, Kaynak, Para_Birimi, Doviz_Tutari, Borc, Alacak (+ rapora
+eklenecek kolonlar).
+
+Şema bellekte sıkıştırılmış tutulur: Match_ID, Kaynak ve Para_Birimi
+kategoriktir, girdi kopyalanmaz, rapora eklenecek kolonlar ham haliyle
+taşınıp sadece rapor yazılırken metne çevrilir.
+
+`hesap="polars"` ile anahtar normalizasyonu ve grup içi birleştirmeler
+`motor.polars_motoru` üzerinden yapılır; çıktı aynıdır.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from motor import polars_motoru
+from motor.anahtar import match_id_serisi, payment_id_serisi
+from motor.sayisal import tutar_serisi_cevir
+
+# Hazırlık çıktısının şeması (kolon tipleri) değişince artırılır; artımlı
+# depodaki satır izleri bu sürümle birlikte geçersiz sayılır.
+SEMA_SURUMU = 2
+
+
+def veri_hazirla(df, config, taraf_adi, extra_cols=None, hesap="pandas"):
+    if extra_cols is None:
+        extra_cols = []
+
+    # Aynı isimli kolonları temizle (girdi kopyalanmaz, sadece okunur)
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # --- 1) Ana tablo (fatura + ödeme karışık) ---
+    # Kolonlar önce dict'te toplanır, tablo sonda tek seferde kurulur
+    kolonlar = {}
+
+    # Extra kolonlar: ham kolona referansla taşınır; metne rapor yazılırken
+    # çevrilir (sonuc._ek_kolonlar). Tarih kolonlarının metni tüm kolona
+    # bakılarak biçimlendiği için onlar burada çevrilir.
+    for col in extra_cols:
+        if col in df.columns:
+            kolonlar[col] = df[col].astype(str) if pd.api.types.is_datetime64_any_dtype(df[col]) else df[col]
+
+    # Tarihler
+    kolonlar['Tarih'] = pd.to_datetime(df[config['tarih_col']], dayfirst=True, errors='coerce')
+
+    if config.get('tarih_odeme_col') and config['tarih_odeme_col'] != "Seçiniz...":
+        kolonlar['Tarih_Odeme'] = pd.to_datetime(
+            df[config['tarih_odeme_col']], dayfirst=True, errors='coerce'
+        )
+    else:
+        kolonlar['Tarih_Odeme'] = kolonlar['Tarih']
+
+    # Belge No / Match_ID
+    base = df[config['belge_col']].astype(str)
+
+    # Boş / NaN / "nan" olanları tespit et
+    mask_empty = base.isna() | base.str.strip().eq("") | base.str.strip().str.lower().eq("nan")
+
+    # Eğer başka bir "Referans / Reference" kolonu varsa, boşları onunla doldur
+    alt_ref_cols = [c for c in df.columns
+                    if c != config['belge_col'] and re.search(r'ref|referans', str(c), re.IGNORECASE)]
+    
+    if alt_ref_cols:
+        alt = df[alt_ref_cols[0]].astype(str)
+        base = base.where(~mask_empty, alt)
+
+    kolonlar['Orijinal_Belge_No'] = base
+
+    # Sadece rakamlar, baştaki sıfırlar atılmış (tek geçişte, tüm kolon).
+    # Kategorik: çok satırlı faturalar aynı anahtarı paylaşır, gruplama kodlar üzerinden yapılır
+    if hesap == "polars":
+        kolonlar['Match_ID'] = polars_motoru.match_id_kategorik(kolonlar['Orijinal_Belge_No'])
+    else:
+        kolonlar['Match_ID'] = match_id_serisi(kolonlar['Orijinal_Belge_No']).astype('category')
+
+    # Payment_ID (Ödeme Ref / Dekont)
+    if config.get('odeme_ref_col') and config['odeme_ref_col'] != "Seçiniz...":
+        if hesap == "polars":
+            kolonlar['Payment_ID'] = polars_motoru.payment_id_serisi(df[config['odeme_ref_col']])
+        else:
+            kolonlar['Payment_ID'] = payment_id_serisi(df[config['odeme_ref_col']])
+    else:
+        kolonlar['Payment_ID'] = ""
+
+    kolonlar['Kaynak'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [taraf_adi])
+
+    # Döviz
+    doviz_aktif = False
+    if config.get('doviz_cinsi_col') and config['doviz_cinsi_col'] != "Seçiniz...":
+        kolonlar['Para_Birimi'] = df[config['doviz_cinsi_col']].astype(str).str.upper().str.strip()
+        kolonlar['Para_Birimi'] = kolonlar['Para_Birimi'].replace({'TL': 'TRY', 'TRL': 'TRY'}).astype('category')
+        doviz_aktif = True
+    else:
+        kolonlar['Para_Birimi'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), ["TRY"])
+
+    if config.get('doviz_tutar_col') and config['doviz_tutar_col'] != "Seçiniz...":
+        kolonlar['Doviz_Tutari'] = pd.to_numeric(
+            df[config['doviz_tutar_col']], errors='coerce'
+        ).fillna(0).abs()
+        doviz_aktif = True
+    else:
+        kolonlar['Doviz_Tutari'] = 0.0
+
+    # Tutar
+    parse_hatalari = {}
+    if "Tek Kolon" in config.get('tutar_tipi', ''):
+        col_name = config['tutar_col']
+
+        # Virgüllü, noktalı, string her şeyi güvenli çevir (kolon bazlı)
+        ham, parse_hatalari[col_name] = tutar_serisi_cevir(df[col_name])
+        rol = config.get('rol_kodu', 'Biz Alıcıyız')
+
+        if rol == "Biz Alıcıyız":
+            kolonlar['Borc'] = ham.where(ham > 0, 0)
+            kolonlar['Alacak'] = ham.where(ham < 0, 0).abs()
+        else:
+            kolonlar['Alacak'] = ham.where(ham > 0, 0)
+            kolonlar['Borc'] = ham.where(ham < 0, 0).abs()
+
+    else:
+        # Ayrı kolonlar da aynı şekilde güvenli parse edilsin
+        kolonlar['Borc'], parse_hatalari[config['borc_col']] = tutar_serisi_cevir(df[config['borc_col']])
+        kolonlar['Alacak'], parse_hatalari[config['alacak_col']] = tutar_serisi_cevir(df[config['alacak_col']])
+
+    df_new = pd.DataFrame(kolonlar, index=df.index)
+
+    # Sayıya çevrilemeyen hücre sayıları (kolon → adet); arayüzde uyarı olarak gösterilir
+    df_new.attrs['parse_hatalari'] = {k: v for k, v in parse_hatalari.items() if v}
+
+    # --- 2) Ödeme satırlarını ayır ---
+    # Ödeme = Payment_ID dolu satırlar
+    # unique_idx ödeme eşleştirmede kullanılıyor; assign dilimin kopyasına yazar
+    df_pay_final = df_new[df_new['Payment_ID'] != ""].assign(unique_idx=lambda d: d.index)
+
+    # Fatura tarafı için (raw_biz/raw_onlar) df_new aynen dönüyor
+    return df_new, df_pay_final, doviz_aktif
+
+
+# Rapora eklenecek kolonların grup içi birleştirme seçenekleri (varsayılan 'first')
+EKSTRA_GRUPLAMALARI = ("first", "last", "join", "count")
+_AYIRICI = ", "
+
+_SABIT_KURALLAR = {
+    'Tarih': 'first', 'Tarih_Odeme': 'first', 'Orijinal_Belge_No': 'first',
+    'Payment_ID': 'first', 'Kaynak': 'first', 'Borc': 'sum', 'Alacak': 'sum',
+    'Para_Birimi': 'first'
+}
+
+
+def _metin_birlestir(seri, kod, grup_sayisi):
+    """Grup içindeki dolu, birbirinden farklı değerler görünüş sırasıyla ', ' ile."""
+    metin = seri.astype(str)
+    dolu = seri.notna().to_numpy() & metin.str.strip().ne("").to_numpy()
+    parca = pd.DataFrame({'k': kod[dolu], 'v': metin[dolu].to_numpy()}).drop_duplicates()
+    birlesik = parca.groupby('k', sort=False)['v'].agg(_AYIRICI.join)
+    return birlesik.reindex(range(grup_sayisi), fill_value="").to_numpy()
+
+
+def _uc_konumlar(kod, gecerli, grup_sayisi, son=False):
+    """Her grubun ilk (son=True: son) geçerli satırının konumu; geçerli satırı olmayan grup -1."""
+    poz = np.flatnonzero(gecerli)
+    konum = np.full(grup_sayisi, -1, dtype=np.intp)
+    if son:
+        konum[kod[poz]] = poz
+    else:
+        # Tekrarlı indekste son yazılan kalır: ters sırada yazınca ilk satır kazanır
+        konum[kod[poz[::-1]]] = poz[::-1]
+    return konum
+
+
+def _sirali_kategorik(seri):
+    return isinstance(seri.dtype, pd.CategoricalDtype) and seri.cat.categories.is_monotonic_increasing
+
+
+def _bos_anahtar(match_id):
+    """Match_ID == "" maskesi; sıralı kategorilerde "" ikili aramayla bulunur (kategoriler hash'lenmez)."""
+    if _sirali_kategorik(match_id):
+        kategoriler = match_id.cat.categories
+        i = kategoriler.searchsorted("")
+        if i < len(kategoriler) and kategoriler[i] == "":
+            return match_id.cat.codes.to_numpy() == i
+        return np.zeros(len(match_id), dtype=bool)
+    return (match_id == "").to_numpy()
+
+
+def _grup_kodlari(match_id):
+    """
+    Match_ID → (0..n-1 grup kodu, sıralı grup anahtarları). Kategorik
+    Match_ID'de (hazırlık çıktısı) kategoriler zaten sıralı olduğundan
+    kodlar yeniden hash'lenmeden, sadece kullanılanlar sıkıştırılarak alınır.
+    """
+    if _sirali_kategorik(match_id):
+        kodlar = match_id.cat.codes.to_numpy()
+        kullanilan = np.bincount(kodlar, minlength=len(match_id.cat.categories)) > 0
+        yeni_kod = np.cumsum(kullanilan) - 1
+        return yeni_kod[kodlar], pd.Categorical.from_codes(np.flatnonzero(kullanilan), dtype=match_id.dtype)
+    return pd.factorize(match_id, sort=True)
+
+
+def grupla(df, is_doviz_aktif, ekstra_kurallari=None, hesap="pandas"):
+    """
+    Aynı Match_ID'li satırları tek belgeye toplar; Match_ID'siz satırlar
+    olduğu gibi sona eklenir.
+
+    Match_ID bir kez sıralı kodlanır; 'first' / 'last' kolonlar (groupby
+    gibi boş değerleri atlayarak) grubun ilk / son dolu satırından `take`
+    ile alınır, toplamlar tek groupby geçişinde yapılır. Dövizde sadece
+    TRY dışı satırların Doviz_Tutari'sı sayılır: TRY satırları NaN'a
+    maskelenmiş kolonun toplamı (TRY dışı satırı olmayan grup 0.0).
+    ekstra_kurallari: {kolon: 'first' | 'last' | 'join' | 'count'}; verilmeyen
+    ek kolonlar 'first' ile toplanır. hesap="polars" ile 'join' kolonları
+    tek Polars group_by geçişinde birleştirilir.
+    """
+    if df.empty:
+        return df
+    mask_ids = ~_bos_anahtar(df['Match_ID'])
+    df_ids = df[mask_ids]
+    df_noids = df[~mask_ids]
+
+    if df_ids.empty:
+        return df_noids
+
+    ekstra_kurallari = ekstra_kurallari or {}
+    agg_rules = dict(_SABIT_KURALLAR)
+    for col in df.columns:
+        if col not in agg_rules and col not in ['Match_ID', 'unique_idx', 'Doviz_Tutari']:
+            agg_rules[col] = ekstra_kurallari.get(col, 'first')
+    gecersiz = {k: v for k, v in agg_rules.items() if k not in _SABIT_KURALLAR and v not in EKSTRA_GRUPLAMALARI}
+    if gecersiz:
+        raise ValueError(f"Geçersiz gruplama: {gecersiz} (beklenen: {', '.join(EKSTRA_GRUPLAMALARI)})")
+
+    kod, match_idler = _grup_kodlari(df_ids['Match_ID'])
+    n = len(match_idler)
+
+    toplamlar = {col: df_ids[col] for col, kural in agg_rules.items() if kural == 'sum'}
+    if is_doviz_aktif:
+        toplamlar['Doviz_Tutari'] = df_ids['Doviz_Tutari'].where(~df_ids['Para_Birimi'].isin(['TRY', 'TL']))
+    # Kodlar 0..n-1 ve hepsi kullanılıyor: kategorik anahtar yeniden hash'lenmez.
+    # Toplamlar iki motorda da pandas'ın dengelenmiş (Kahan) toplamıyla yapılır:
+    # tutar eşitliği kararları motordan bağımsız, son bitine kadar aynı kalır
+    grup = pd.Categorical.from_codes(kod, pd.RangeIndex(n))
+    toplam = pd.DataFrame(toplamlar).groupby(grup, observed=False).sum()
+    birlesik = {}
+    birlestirilecek = [col for col, kural in agg_rules.items() if kural == 'join']
+    if hesap == "polars" and birlestirilecek:
+        birlesik = polars_motoru.metin_birlestir(df_ids, birlestirilecek, kod)
+
+    kolonlar = {'Match_ID': match_idler}
+    uclar = {}
+    for col, kural in agg_rules.items():
+        if kural == 'sum':
+            kolonlar[col] = toplam[col].to_numpy()
+            continue
+        seri = df_ids[col]
+        if kural == 'join':
+            kolonlar[col] = birlesik[col] if col in birlesik else _metin_birlestir(seri, kod, n)
+            continue
+        dolu = seri.notna().to_numpy()
+        if kural == 'count':
+            kolonlar[col] = np.bincount(kod[dolu], minlength=n).astype(np.int64)
+            continue
+        # Boş hücresi olmayan kolonlar (çoğu) aynı konum dizisini paylaşır
+        iz = (kural, None) if dolu.all() else (kural, col)
+        if iz not in uclar:
+            uclar[iz] = _uc_konumlar(kod, dolu, n, son=kural == 'last')
+        konum = uclar[iz]
+        degerler = seri.to_numpy() if isinstance(seri.dtype, np.dtype) else seri.array
+        kolonlar[col] = pd.api.extensions.take(degerler, konum, allow_fill=True)
+    kolonlar['Doviz_Tutari'] = toplam['Doviz_Tutari'].to_numpy() if is_doviz_aktif else 0.0
+    df_grp = pd.DataFrame(kolonlar)
+
+    if isinstance(match_idler.dtype, pd.CategoricalDtype):
+        # Çok kategorili Match_ID birleştirmede dtype karşılaştırması için
+        # baştan hash'lenirdi; kodlar ayrıca birleştirilip kolon sonra kurulur
+        bos = df_noids['Match_ID'].cat.codes.to_numpy()
+        final = pd.concat([df_grp.drop(columns='Match_ID'), df_noids.drop(columns='Match_ID')], ignore_index=True)
+        final.insert(0, 'Match_ID', pd.Categorical.from_codes(
+            np.concatenate([match_idler.codes, bos]), dtype=match_idler.dtype))
+    else:
+        final = pd.concat([df_grp, df_noids], ignore_index=True)
+    final['unique_idx'] = final.index
+    return final
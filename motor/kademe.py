@@ -0,0 +1,261 @@
+"""
+Çok geçişli fatura eşleştirme kademesi.
+
+Eskiden anahtar tekti ve ya hep ya hiçti: iki tarafta da Match_ID varsa
+Match_ID, yoksa boşluksuz/büyük harf Orijinal_Belge_No (Merge_Key). Bir
+tarafta birkaç Match_ID bulunması, geri kalan tüm satırlar için belge no
+yedeğini kapatıyordu. Kademe sıralı kurallardan oluşur; her geçiş sadece
+önceki geçişlerde eşleşmeden kalan gruplanmış satırlar üzerinde çalışır
+ve birebir eşleşme üretir (her satır en fazla bir çifte girer):
+
+  - match_id    : Match_ID eşitliği
+  - belge_no    : boşluksuz/büyük harf Orijinal_Belge_No eşitliği (iki tarafta
+                  da tek geçen numaralar)
+  - tutar_tarih : PB + tutar (isteğe bağlı tolerans) + belge tarihi penceresi
+  - aciklama    : bir tarafın açıklama kolonunda geçen numara = karşı tarafın Match_ID'si
+  - benzer      : benzer belge no (motor/benzer.py)
+
+Anahtar eşitliği olan geçişler anahtar + tekrar sırası üzerinden tek
+merge ile (`motor.odeme._sirali_join`), tutar/tarih geçişi ödeme
+eşleştirmesinin tutar + PB aşamasıyla yapılır; satır bazlı döngü yoktur.
+
+Kurallar JSON'a yazılabilir ("eslestirme_kurallari": ["match_id",
+{"tur": "tutar_tarih", "gun": 5}]) ve arayüzde kolon ayarlarıyla birlikte
+saklanır. Her eşleşen satır kendisini bulan kuralın adını (Kural kolonu),
+her geçiş de süresini ve eşleşme sayısını taşır.
+"""
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from motor.anahtar import match_id_serisi
+from motor.benzer import BenzerAyarlari, benzer_ayarlari, benzer_eslestir
+from motor.odeme import _sirali_join, odeme_eslestir
+
+KURAL_ADLARI = {
+    "match_id": "Match_ID",
+    "belge_no": "Belge No",
+    "tutar_tarih": "Tutar + Tarih",
+    "aciklama": "Açıklamada Belge No",
+    "benzer": "Benzer Belge No",
+}
+
+# Eskiden Match_ID'nin kapattığı belge no yedeği artık kalanlar için her zaman çalışır
+VARSAYILAN_KURALLAR = ("match_id", "belge_no")
+
+# Sonucu sadece aynı Match_ID'li (ya da Match_ID'siz) satırlara bağlı kurallar;
+# artımlı mod (motor/artimli.py) sadece bunlarla çalışabilir
+ANAHTAR_BAZLI = frozenset({"match_id", "belge_no"})
+
+# Belge no'su okunamamış hücrelerin metin hali; bunlar birbiriyle eşleşmez
+_BOS_BELGE = frozenset({"", "NAN", "NONE", "<NA>", "NAT"})
+
+
+@dataclass
+class EslestirmeKurali:
+    tur: str
+    gun: Optional[int] = 3            # tutar_tarih: belge tarihi farkı üst sınırı; None = sınırsız
+    tolerans: float = 0.0             # tutar_tarih: kabul edilen tutar farkı (PB cinsinden)
+    kolon: str = ""                   # aciklama: iki tarafta da rapora eklenmiş açıklama kolonu
+    min_uzunluk: int = 4              # aciklama: numara sayılacak en kısa rakam dizisi
+    benzer: Optional[BenzerAyarlari] = None   # benzer: ayarlar (None → varsayılanlar)
+
+    @property
+    def ad(self):
+        if self.tur == "tutar_tarih":
+            return "Tutar + PB" if self.gun is None else f"Tutar + Tarih (±{self.gun} gün)"
+        return KURAL_ADLARI[self.tur]
+
+
+def kademe_kurallari(deger=None):
+    """
+    Ayar dosyasındaki "eslestirme_kurallari" değeri → EslestirmeKurali
+    listesi. Boş/yok → VARSAYILAN_KURALLAR. Elemanlar kural türü
+    ("belge_no") ya da {"tur": ..., alanlar} dict'idir; benzer kuralında
+    diğer alanlar BenzerAyarlari'na gider.
+    """
+    kurallar = []
+    for k in deger or VARSAYILAN_KURALLAR:
+        if isinstance(k, EslestirmeKurali):
+            kurallar.append(k)
+            continue
+        k = {"tur": k} if isinstance(k, str) else dict(k)
+        tur = k.pop("tur", None)
+        if tur not in KURAL_ADLARI:
+            raise ValueError(f"Geçersiz eşleştirme kuralı: {tur!r} (beklenen: {', '.join(KURAL_ADLARI)})")
+        if tur == "benzer":
+            kural = EslestirmeKurali(tur, benzer=benzer_ayarlari(k.get("benzer", k) or True))
+        else:
+            kural = EslestirmeKurali(tur, **k)
+        if tur == "aciklama" and not kural.kolon:
+            raise ValueError("'aciklama' kuralı için 'kolon' gerekli")
+        kurallar.append(kural)
+    return kurallar
+
+
+def kurallari_yaz(kurallar):
+    """`kademe_kurallari`'nın tersi: JSON'a yazılabilir liste (varsayılan alanlar yazılmaz)."""
+    varsayilan = EslestirmeKurali("")
+    yazilan = []
+    for k in kademe_kurallari(kurallar):
+        if k.tur == "benzer":
+            alanlar = {a: v for a, v in asdict(k.benzer).items() if v != getattr(BenzerAyarlari(), a)}
+        else:
+            alanlar = {a: getattr(k, a) for a in ("gun", "tolerans", "kolon", "min_uzunluk")
+                       if getattr(k, a) != getattr(varsayilan, a)}
+        yazilan.append({"tur": k.tur, **alanlar} if alanlar else k.tur)
+    return yazilan
+
+
+def anahtar_bazli(kurallar):
+    return all(k.tur in ANAHTAR_BAZLI for k in kademe_kurallari(kurallar))
+
+
+def _bos_cift():
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), {}
+
+
+def _anahtar_eslestir(anahtar_b, anahtar_o, bos=frozenset({""}), tekil=False):
+    """
+    Eşit anahtarlı satırları geliş sırasıyla eşler; boş anahtarlar
+    eşleşmez. tekil=True ise bir tarafta birden çok geçen anahtarlar
+    ("NAKİT", "mahsup" gibi belge no yerine yazılmış metinler) atlanır.
+    """
+    def uygun(anahtar):
+        seri = pd.Series(anahtar)
+        maske = ~seri.isin(bos)
+        if tekil:
+            maske &= ~seri.duplicated(keep=False)
+        return np.flatnonzero(maske.to_numpy())
+
+    ib, io = uygun(anahtar_b), uygun(anahtar_o)
+    bp, op = _sirali_join(pd.DataFrame({'k': np.asarray(anahtar_b, dtype=object)[ib]}),
+                          pd.DataFrame({'k': np.asarray(anahtar_o, dtype=object)[io]}))
+    return ib[bp], io[op], {}
+
+
+def _match_id(kural, b, o):
+    return _anahtar_eslestir(b['Match_ID'].to_numpy(dtype=object), o['Match_ID'].to_numpy(dtype=object))
+
+
+def merge_key(grp):
+    """Belge no yedek anahtarı: büyük harf, boşluksuz Orijinal_Belge_No."""
+    return grp["Orijinal_Belge_No"].astype(str).str.upper().str.strip().str.replace(" ", "", regex=False)
+
+
+def _belge_no(kural, b, o):
+    return _anahtar_eslestir(merge_key(b).to_numpy(dtype=object), merge_key(o).to_numpy(dtype=object),
+                             _BOS_BELGE, tekil=True)
+
+
+def _tutar_tarih(kural, b, o):
+    def odeme_gibi(grp):
+        return pd.DataFrame({'Payment_ID': "", 'Borc': grp['Borc'].to_numpy(), 'Alacak': grp['Alacak'].to_numpy(),
+                             'Para_Birimi': grp['Para_Birimi'].to_numpy(), 'Tarih_Odeme': grp['Tarih'].to_numpy()})
+
+    # Tutarı sıfır olan satırlar (iptal, yalnızca açıklama) tutarla eşleşmez
+    ib = np.flatnonzero((b['Borc'] - b['Alacak']).abs().to_numpy(dtype=float) >= 0.005)
+    io = np.flatnonzero((o['Borc'] - o['Alacak']).abs().to_numpy(dtype=float) >= 0.005)
+    if not len(ib) or not len(io):
+        return _bos_cift()
+    bp, op = odeme_eslestir(odeme_gibi(b.iloc[ib]), odeme_gibi(o.iloc[io]), kural.tolerans, kural.gun)
+    return ib[bp], io[op], {}
+
+
+def _numaralar(metin, min_uzunluk):
+    """Açıklama metnindeki numaralar: (satır pozisyonu, Match_ID biçiminde numara), metindeki sırayla."""
+    parca = metin.astype(str).reset_index(drop=True).str.split(r"[\s,;:]+", regex=True).explode()
+    numara = match_id_serisi(parca)
+    uygun = numara.str.len().to_numpy() >= min_uzunluk
+    return pd.DataFrame({'poz': parca.index.to_numpy()[uygun], 'no': numara.to_numpy()[uygun]}).drop_duplicates()
+
+
+def _aciklama_yonu(metin_taraf, id_taraf, kural):
+    """metin_taraf'ın açıklamasında geçen numara → id_taraf'ın Match_ID'si; birebir."""
+    if kural.kolon not in metin_taraf.columns or metin_taraf.empty or id_taraf.empty:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    numara = _numaralar(metin_taraf[kural.kolon], kural.min_uzunluk)
+    mid = id_taraf['Match_ID'].to_numpy(dtype=object)
+    dolu = np.flatnonzero(mid != "")
+    # Her Match_ID bir kez (gruplanmış tabloda zaten tektir)
+    hedef = pd.DataFrame({'no': mid[dolu], 'hedef': dolu}).drop_duplicates('no')
+    aday = numara.merge(hedef, on='no', sort=False)
+    # Önce numarayı ilk anan satır kazanır, sonra her satırın ilk numarası
+    aday = aday.drop_duplicates('hedef').drop_duplicates('poz')
+    return aday['poz'].to_numpy(np.int64), aday['hedef'].to_numpy(np.int64)
+
+
+def _aciklama(kural, b, o):
+    bp, op = _aciklama_yonu(b, o, kural)
+    kalan_b = np.setdiff1d(np.arange(len(b)), bp)
+    kalan_o = np.setdiff1d(np.arange(len(o)), op)
+    op2, bp2 = _aciklama_yonu(o.iloc[kalan_o], b.iloc[kalan_b], kural)
+    bp = np.concatenate([bp, kalan_b[bp2]])
+    op = np.concatenate([op, kalan_o[op2]])
+    sira = np.argsort(bp, kind="stable")
+    return bp[sira], op[sira], {}
+
+
+def _benzer(kural, b, o):
+    cift = benzer_eslestir(b, o, kural.benzer)
+    return (cift['poz_biz'].to_numpy(np.int64), cift['poz_onlar'].to_numpy(np.int64),
+            {'Benzerlik': cift['Benzerlik'].to_numpy()})
+
+
+_GECISLER = {
+    "match_id": _match_id,
+    "belge_no": _belge_no,
+    "tutar_tarih": _tutar_tarih,
+    "aciklama": _aciklama,
+    "benzer": _benzer,
+}
+
+
+def _yan_yana(grp_biz, grp_onlar, poz_b, poz_o):
+    """Çiftlerin iki tarafı yan yana; iki tarafta olan kolonlar merge'deki gibi _Biz/_Onlar sonekli."""
+    ortak = set(grp_biz.columns) & set(grp_onlar.columns)
+    sol = grp_biz.take(poz_b).rename(columns={c: c + "_Biz" for c in ortak}).reset_index(drop=True)
+    sag = grp_onlar.take(poz_o).rename(columns={c: c + "_Onlar" for c in ortak}).reset_index(drop=True)
+    return pd.concat([sol, sag], axis=1)
+
+
+def kademeli_eslestir(grp_biz, grp_onlar, kurallar=None):
+    """
+    Kuralları sırayla uygular. Dönüş: (merged, poz_b, poz_o, gecisler).
+    merged eşleşen çiftlerin yan yana hali (`Kural` kolonu eşleştiren
+    kuralın adı; benzer geçişi varsa `Benzerlik`), geçiş sırasıyla ve
+    geçiş içinde bizim satır sırasıyla. poz_b / poz_o çiftlerin girdi
+    tablolarındaki konumlarıdır. gecisler her kural için
+    {"kural", "eslesen", "sure_sn"}.
+    """
+    acik_b = np.ones(len(grp_biz), dtype=bool)
+    acik_o = np.ones(len(grp_onlar), dtype=bool)
+    poz_b, poz_o, kural_kodu, ekler, gecisler = [], [], [], [], []
+    kurallar = kademe_kurallari(kurallar)
+    for i, kural in enumerate(kurallar):
+        t0 = time.perf_counter()
+        kalan_b, kalan_o = np.flatnonzero(acik_b), np.flatnonzero(acik_o)
+        bp, op, ek = _bos_cift()
+        if len(kalan_b) and len(kalan_o):
+            bp, op, ek = _GECISLER[kural.tur](kural, grp_biz.iloc[kalan_b], grp_onlar.iloc[kalan_o])
+        bp, op = kalan_b[bp], kalan_o[op]
+        acik_b[bp] = False
+        acik_o[op] = False
+        poz_b.append(bp)
+        poz_o.append(op)
+        kural_kodu.append(np.full(len(bp), i, dtype=np.int16))
+        ekler.append((len(bp), ek))
+        gecisler.append({"kural": kural.ad, "eslesen": len(bp), "sure_sn": round(time.perf_counter() - t0, 4)})
+
+    poz_b, poz_o = np.concatenate(poz_b), np.concatenate(poz_o)
+    merged = _yan_yana(grp_biz, grp_onlar, poz_b, poz_o)
+    adlar = [k.ad for k in kurallar]
+    merged["Kural"] = pd.Categorical(np.asarray(adlar, dtype=object)[np.concatenate(kural_kodu)],
+                                     categories=list(dict.fromkeys(adlar)))
+    for ad in {a for _, ek in ekler for a, v in ek.items() if len(v)}:
+        merged[ad] = np.concatenate([np.asarray(ek[ad], dtype=float) if ad in ek else np.full(n, np.nan)
+                                     for n, ek in ekler])
+    return merged, poz_b, poz_o, gecisler
@@ -0,0 +1,128 @@
+"""
+Kolon eşleştirme hafızası: dosya düzenine (başlık satırına) göre kayıtlı
+kolon seçimleri.
+
+Kayıt anahtarı dosya adı değil başlıkların parmak izidir: "Ekstre_Kasim.xlsx"
+ile "Ekstre_Ekim.xlsx" aynı başlıklara sahipse Ekim'de yapılan seçimler
+Kasım dosyasına da uygulanır. İz kolon sırasından bağımsızdır (aynı
+kolonların yeri değişmiş bir dışa aktarım da aynı düzendir); birleştirilmiş
+dosyalardaki "Kaynak Dosya" kolonu ize girmez. Kayıtlar taraf ("biz" /
+"onlar") başınadır: iki defter aynı ERP'nin aynı düzendeki dökümü olsa da
+birinin seçimleri diğerininkini ezmez. İz bulunamazsa aynı taraf ve dosya
+adıyla en son kaydedilen seçimler kullanılır (tarafı bilinmeyen eski
+ayarlar.json kayıtları da bu yolla, iki tarafa da gelir). Kayıtlı bir
+kolon dosyada yoksa arayüz onu zaten yok sayar.
+
+Depo yerel bir SQLite dosyasıdır: (taraf, iz) birincil anahtar olduğundan
+arama binlerce düzende de tek indeks okumasıdır, her kayıt tek satırlık
+bir upsert'tür (dosyanın tamamı yeniden yazılmaz). WAL kipinde okumalar
+yazmaları beklemez; aynı sunucudaki oturumların eşzamanlı kayıtları
+sırayla işlenir ve birbirini ezmez.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from motor.okuma import KAYNAK_KOLONU
+
+KOLON_HAFIZASI = "kolon_hafizasi.db"
+
+# Dosya adına göre tutulan eski kayıtlar (tek seferlik aktarılır)
+ESKI_AYAR_DOSYASI = "ayarlar.json"
+
+TARAFLAR = ("biz", "onlar")
+
+_SEMA = """
+CREATE TABLE IF NOT EXISTS duzenler (
+    taraf TEXT NOT NULL,
+    iz TEXT NOT NULL,
+    dosya TEXT NOT NULL,
+    ayarlar TEXT NOT NULL,
+    zaman REAL NOT NULL,
+    PRIMARY KEY (taraf, iz)
+);
+CREATE INDEX IF NOT EXISTS duzenler_dosya ON duzenler (dosya, zaman);
+"""
+
+
+def baslik_izi(kolonlar):
+    """Başlıkların sıradan bağımsız parmak izi (Kaynak Dosya kolonu hariç)."""
+    adlar = sorted({str(c).strip() for c in kolonlar} - {KAYNAK_KOLONU})
+    return hashlib.blake2b("\x1f".join(adlar).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _taraf_kontrol(taraf):
+    if taraf not in TARAFLAR:
+        raise ValueError(f"Geçersiz taraf: {taraf!r} (beklenen: {', '.join(TARAFLAR)})")
+
+
+class KolonHafizasi:
+    """
+    (taraf, başlık izi) → kolon seçimleri (JSON). Her işlem kendi bağlantısı ve
+    transaction'ıyla yapılır; nesne thread'ler arasında paylaşılabilir.
+    """
+
+    def __init__(self, yol=KOLON_HAFIZASI):
+        self.yol = yol
+        with self._baglanti() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SEMA)
+
+    @contextlib.contextmanager
+    def _baglanti(self):
+        db = sqlite3.connect(self.yol, timeout=60)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def bul(self, taraf, kolonlar, dosya=None):
+        """Bu tarafın bu başlıklara (yoksa bu dosya adına) kayıtlı seçimleri; hiç kayıt yoksa {}."""
+        _taraf_kontrol(taraf)
+        with self._baglanti() as db:
+            satir = db.execute("SELECT ayarlar FROM duzenler WHERE taraf = ? AND iz = ?",
+                               (taraf, baslik_izi(kolonlar))).fetchone()
+            if satir is None and dosya:
+                satir = db.execute("SELECT ayarlar FROM duzenler WHERE dosya = ? AND taraf IN (?, '') "
+                                   "ORDER BY zaman DESC LIMIT 1", (dosya, taraf)).fetchone()
+        return json.loads(satir[0]) if satir else {}
+
+    def kaydet(self, taraf, kolonlar, dosya, ayarlar):
+        """Bu tarafın bu düzendeki seçimlerini yazar (varsa üzerine); diğer kayıtlara dokunmaz."""
+        _taraf_kontrol(taraf)
+        with self._baglanti() as db:
+            db.execute(
+                "INSERT INTO duzenler VALUES (?, ?, ?, ?, ?) ON CONFLICT (taraf, iz) DO UPDATE SET "
+                "dosya = excluded.dosya, ayarlar = excluded.ayarlar, zaman = excluded.zaman",
+                (taraf, baslik_izi(kolonlar), dosya, json.dumps(ayarlar, ensure_ascii=False), time.time()),
+            )
+
+    def eski_ayarlari_aktar(self, json_yolu=ESKI_AYAR_DOSYASI):
+        """
+        Dosya adına göre tutulan eski JSON ayarlarını aktarır (başlıkları
+        ve tarafı bilinmediğinden sadece ad ile, iki taraf için de bulunurlar) ve dosyayı '.aktarildi'
+        uzantısıyla kenara alır; sonraki çağrılar bir şey yapmaz.
+        Dönüş: aktarılan kayıt sayısı.
+        """
+        if not os.path.exists(json_yolu):
+            return 0
+        try:
+            with open(json_yolu, "r", encoding="utf-8") as f:
+                eski = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        kayitlar = [(f"ad:{ad}", ad, json.dumps(ayarlar, ensure_ascii=False))
+                    for ad, ayarlar in eski.items() if isinstance(ayarlar, dict)]
+        with self._baglanti() as db:
+            db.executemany("INSERT OR IGNORE INTO duzenler VALUES ('', ?, ?, ?, 0)", kayitlar)
+        with contextlib.suppress(OSError):
+            os.replace(json_yolu, json_yolu + ".aktarildi")
+        return len(kayitlar)
+
+    def __len__(self):
+        with self._baglanti() as db:
+            return db.execute("SELECT COUNT(*) FROM duzenler").fetchone()[0]
@@ -0,0 +1,246 @@
+"""
+Streamlit'ten bağımsız mutabakat akışı.
+
+Aşamalar ayrı ayrı çağrılabilir (betik, benchmark, gece çalışan toplu
+işler) ya da `mutabakat_yap` ile tek seferde:
+
+    biz = hazirla(df_biz, config_biz, "Biz", ekstra)
+    onlar = hazirla(df_onlar, config_onlar, "Onlar", ekstra)
+    grp_biz, grp_onlar = grupla(biz), grupla(onlar)
+    fatura = faturalari_eslestir(grp_biz, grp_onlar, rol_kodu, ...)
+    odeme = odemeleri_eslestir(biz, onlar, ...)
+    ozet = ozetle(biz, onlar)
+
+Hiçbir fonksiyon `st.*` çağırmaz; arayüzde gösterilen bilgi metinleri
+sonuç nesnelerinden üretilir.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from motor import hazirlik
+from motor.dagitim import dagitimli_tablolar
+from motor.fatura import fatura_tutarlari
+from motor.kademe import EslestirmeKurali, kademe_kurallari, kademeli_eslestir
+from motor.odeme import odeme_eslestir, odeme_tablolari
+from motor.olcum import OLCUM_YOK
+from motor.ozet import ozet_rapor_olustur
+from motor.polars_motoru import hesap_motoru_sec
+from motor.sonuc import bizde_var_tablosu, eslesen_tablosu, onlarda_var_tablosu, tablolari_birlestir
+
+
+@dataclass
+class HazirlikSonucu:
+    """Bir tarafın standart şemaya çevrilmiş defteri."""
+    taraf: str
+    ham: pd.DataFrame                 # fatura + ödeme satırları birlikte
+    odemeler: pd.DataFrame            # Payment_ID dolu satırlar (unique_idx ile)
+    doviz_aktif: bool
+    ekstra: list = field(default_factory=list)
+    parse_hatalari: dict = field(default_factory=dict)  # kolon → sayıya çevrilemeyen hücre sayısı
+    gruplama: dict = field(default_factory=dict)        # ek kolon → 'first' / 'last' / 'join' / 'count'
+    hesap: str = "pandas"                               # hazırlık / gruplama motoru (motor/polars_motoru.py)
+
+
+@dataclass
+class FaturaEslesmesi:
+    eslesen: pd.DataFrame
+    bizde_var: pd.DataFrame
+    onlarda_var: pd.DataFrame
+    anahtar: str                      # "Match_ID" ya da yedek "Merge_Key"
+    biz_dolu: int
+    onlar_dolu: int
+    ortak: int
+    benzer: int = 0                   # ikinci geçişte benzer belge no ile eşleşen çift
+    gecisler: list = field(default_factory=list)   # kademe geçişleri: kural, eslesen, sure_sn
+    ciftler: Optional[tuple] = field(default=None, repr=False)  # (biz_poz, onlar_poz): eslesen satırlarının grp konumları
+
+    def bilgi_metni(self):
+        ek = f" | Benzer belge no: {self.benzer}" if self.benzer else ""
+        if self.gecisler:
+            kademe = " → ".join(f"{g['kural']}: {g['eslesen']} ({g['sure_sn']:.2f} sn)" for g in self.gecisler)
+            return (f"[Kademe] {kademe} | Match_ID dolu: Biz {self.biz_dolu}, Onlar {self.onlar_dolu} | "
+                    f"Ortak Match_ID sayısı: {self.ortak}")
+        if self.anahtar == "Match_ID":
+            return (f"[Match_ID] Biz (boş olmayan): {self.biz_dolu} | "
+                    f"Onlar (boş olmayan): {self.onlar_dolu} | "
+                    f"Ortak Match_ID sayısı: {self.ortak}" + ek)
+        return (f"[Fallback: Orijinal_Belge_No] Biz (boş olmayan): {self.biz_dolu} | "
+                f"Onlar (boş olmayan): {self.onlar_dolu} | "
+                f"Ortak Belge No sayısı: {self.ortak}" + ek)
+
+
+@dataclass
+class OdemeEslesmesi:
+    eslesen: pd.DataFrame
+    bizde_var: pd.DataFrame
+    onlarda_var: pd.DataFrame
+    dagitim: Optional[pd.DataFrame] = None    # Toplu Ödemeler; dağıtım kapalıysa None
+    dagitim_atlanan: int = 0                  # süre bütçesi yüzünden denenmeyen hedef ödeme
+
+
+@dataclass
+class MutabakatSonucu:
+    ozet: pd.DataFrame
+    fatura: FaturaEslesmesi
+    odeme: OdemeEslesmesi
+    biz: HazirlikSonucu
+    onlar: HazirlikSonucu
+
+    def tablolar(self):
+        """Arayüzün session_state['sonuclar'] ve raporun kullandığı tablolar."""
+        tablolar = {
+            "ozet": self.ozet,
+            "eslesen": self.fatura.eslesen,
+            "odeme": self.odeme.eslesen,
+            "un_biz": tablolari_birlestir(self.fatura.bizde_var, self.odeme.bizde_var),
+            "un_onlar": tablolari_birlestir(self.fatura.onlarda_var, self.odeme.onlarda_var),
+        }
+        if self.odeme.dagitim is not None:
+            tablolar["dagitim"] = self.odeme.dagitim
+        return tablolar
+
+    def uyarilar(self):
+        """Sayıya çevrilemeyen tutar hücreleri için kullanıcıya gösterilecek mesajlar."""
+        uyarilar = [f"{h.taraf}: '{kolon}' kolonunda {adet} hücre sayıya çevrilemedi (0 kabul edildi)."
+                    for h in (self.biz, self.onlar) for kolon, adet in h.parse_hatalari.items()]
+        if self.odeme.dagitim_atlanan:
+            uyarilar.append(f"Toplu ödeme dağıtımı: süre bütçesi dolduğu için {self.odeme.dagitim_atlanan} "
+                            "ödeme denenmedi.")
+        return uyarilar
+
+
+def hazirla(df, config, taraf, ekstra=None, hesap="pandas"):
+    """hesap: 'pandas' | 'polars' (kurulu değilse pandas); gruplama da bu motorla yapılır."""
+    hesap = hesap_motoru_sec(hesap)
+    ham, odemeler, doviz_aktif = hazirlik.veri_hazirla(df, config, taraf, ekstra, hesap=hesap)
+    return HazirlikSonucu(
+        taraf=taraf, ham=ham, odemeler=odemeler, doviz_aktif=doviz_aktif,
+        ekstra=list(ekstra or []), parse_hatalari=dict(ham.attrs.get('parse_hatalari', {})),
+        gruplama=dict(config.get('ekstra_gruplama') or {}), hesap=hesap,
+    )
+
+
+def grupla(hazir):
+    return hazirlik.grupla(hazir.ham, hazir.doviz_aktif, hazir.gruplama, hesap=hazir.hesap)
+
+
+def faturalari_eslestir(grp_biz, grp_onlar, rol_kodu, doviz_raporda=False, ex_biz=(), ex_onlar=(),
+                        anahtar=None, benzer=None, kurallar=None):
+    """
+    Gruplanmış iki defteri eşleştirme kademesinden geçirir (motor/kademe.py);
+    kurallar verilmezse önce Match_ID, kalanlar için boşluksuz/büyük harf
+    Orijinal_Belge_No. `anahtar` ("Match_ID" / "Merge_Key") verilirse
+    sadece o anahtarla tek geçiş yapılır. `benzer`
+    (motor.benzer.BenzerAyarlari) verilirse kademede benzer kuralı yoksa
+    sona eklenir. Girdi tabloları değiştirilmez.
+    """
+    grp_biz = grp_biz.copy(deep=False)
+    grp_onlar = grp_onlar.copy(deep=False)
+    grp_biz["Match_ID"] = grp_biz["Match_ID"].fillna("").astype(str)
+    grp_onlar["Match_ID"] = grp_onlar["Match_ID"].fillna("").astype(str)
+    # Hiç Match_ID'si olmayan tarafta grupla unique_idx üretmez; eşleşmeyenler tablosu için konum
+    for grp in (grp_biz, grp_onlar):
+        if "unique_idx" not in grp.columns:
+            grp["unique_idx"] = np.arange(len(grp))
+
+    if anahtar is not None:
+        kurallar = ["match_id" if anahtar == "Match_ID" else "belge_no"]
+    kurallar = kademe_kurallari(kurallar)
+    if benzer is not None and not any(k.tur == "benzer" for k in kurallar):
+        kurallar.append(EslestirmeKurali("benzer", benzer=benzer))
+
+    biz_dolu = grp_biz["Match_ID"].ne("")
+    onlar_dolu = grp_onlar["Match_ID"].ne("")
+    ortak = set(grp_biz.loc[biz_dolu, "Match_ID"]) & set(grp_onlar.loc[onlar_dolu, "Match_ID"])
+    merged, poz_b, poz_o, gecisler = kademeli_eslestir(grp_biz, grp_onlar, kurallar)
+
+    # Rol kuralına göre tutarları tüm merged için tek seferde seç
+    tutarlar = fatura_tutarlari(merged, rol_kodu)
+    return FaturaEslesmesi(
+        eslesen=eslesen_tablosu(merged, tutarlar, doviz_raporda, list(ex_biz), list(ex_onlar)),
+        bizde_var=bizde_var_tablosu(grp_biz, merged, list(ex_biz)),
+        onlarda_var=onlarda_var_tablosu(grp_onlar, merged, list(ex_onlar)),
+        anahtar="Match_ID" if biz_dolu.any() and onlar_dolu.any() else "Merge_Key",
+        biz_dolu=int(biz_dolu.sum()),
+        onlar_dolu=int(onlar_dolu.sum()),
+        ortak=len(ortak),
+        benzer=sum(g["eslesen"] for k, g in zip(kurallar, gecisler) if k.tur == "benzer"),
+        gecisler=gecisler,
+        ciftler=(poz_b, poz_o),
+    )
+
+
+def odemeleri_eslestir(biz, onlar, tolerans=0.0, gun_penceresi=None, dagitim=None):
+    """
+    1'e 1 ödeme eşleştirmesi; `dagitim` (motor.dagitim.DagitimAyarlari)
+    verilirse kalanlar toplu ödeme dağıtımından da geçer.
+    """
+    if dagitim is None or biz.odemeler.empty or onlar.odemeler.empty:
+        eslesen, bizde_var, onlarda_var = odeme_tablolari(
+            biz.odemeler, onlar.odemeler, biz.ekstra, onlar.ekstra,
+            tolerans=tolerans, gun_penceresi=gun_penceresi,
+        )
+        return OdemeEslesmesi(eslesen=eslesen, bizde_var=bizde_var, onlarda_var=onlarda_var,
+                              dagitim=None if dagitim is None else pd.DataFrame())
+    eslesme = odeme_eslestir(biz.odemeler, onlar.odemeler, tolerans, gun_penceresi)
+    eslesen, bizde_var, onlarda_var, toplu, atlanan = dagitimli_tablolar(
+        biz.odemeler, onlar.odemeler, biz.ekstra, onlar.ekstra, eslesme, tolerans, dagitim)
+    return OdemeEslesmesi(eslesen=eslesen, bizde_var=bizde_var, onlarda_var=onlarda_var,
+                          dagitim=toplu, dagitim_atlanan=atlanan)
+
+
+def ozetle(biz, onlar):
+    # Ödeme satırları hem ham'da hem odemeler'de olduğu için özete iki kez
+    # girer (mevcut rapor davranışı); parçalar birleştirilmeden verilir
+    return ozet_rapor_olustur([biz.ham, biz.odemeler], [onlar.ham, onlar.odemeler])
+
+
+def hazir_mutabakat(biz, onlar, rol_kodu, tolerans=0.0, gun_penceresi: Optional[int] = None, olcum=None,
+                    benzer=None, dagitim=None, kurallar=None):
+    """
+    Hazırlanmış iki taraf için gruplama → özet → fatura → ödeme eşleştirme.
+    olcum (`motor.olcum.Olcum`) verilirse her aşamanın süresi, satır
+    sayıları ve bellek değişimi ona kaydedilir (fatura aşamasına kademe
+    geçişleri de). kurallar fatura eşleştirme kademesidir
+    (`motor.kademe.kademe_kurallari`; None → Match_ID, sonra Belge No). benzer
+    (`motor.benzer.BenzerAyarlari`) verilirse faturada benzer belge no geçişi,
+    dagitim (`motor.dagitim.DagitimAyarlari`) verilirse toplu ödeme dağıtımı yapılır.
+    """
+    olcum = olcum or OLCUM_YOK
+    with olcum.asama("grupla", girdi=len(biz.ham) + len(onlar.ham)) as k:
+        grp_biz = grupla(biz)
+        grp_onlar = grupla(onlar)
+        k["cikti"] = len(grp_biz) + len(grp_onlar)
+
+    with olcum.asama("ozet", girdi=len(biz.ham) + len(onlar.ham)) as k:
+        ozet = ozetle(biz, onlar)
+        k["cikti"] = len(ozet)
+    with olcum.asama("fatura", girdi=len(grp_biz) + len(grp_onlar)) as k:
+        fatura = faturalari_eslestir(grp_biz, grp_onlar, rol_kodu, biz.doviz_aktif or onlar.doviz_aktif,
+                                     biz.ekstra, onlar.ekstra, benzer=benzer, kurallar=kurallar)
+        k["cikti"] = len(fatura.eslesen) + len(fatura.bizde_var) + len(fatura.onlarda_var)
+        k["gecisler"] = fatura.gecisler
+    with olcum.asama("odeme", girdi=len(biz.odemeler) + len(onlar.odemeler)) as k:
+        odeme = odemeleri_eslestir(biz, onlar, tolerans=tolerans, gun_penceresi=gun_penceresi, dagitim=dagitim)
+        k["cikti"] = (len(odeme.eslesen) + len(odeme.bizde_var) + len(odeme.onlarda_var)
+                      + len(odeme.dagitim if odeme.dagitim is not None else ()))
+    return MutabakatSonucu(ozet=ozet, fatura=fatura, odeme=odeme, biz=biz, onlar=onlar)
+
+
+def mutabakat_yap(df_biz, config_biz, df_onlar, config_onlar, rol_kodu,
+                  ex_biz=None, ex_onlar=None, tolerans=0.0, gun_penceresi: Optional[int] = None, olcum=None,
+                  benzer=None, dagitim=None, kurallar=None, hesap="pandas"):
+    """
+    Tüm akış: hazırlık → gruplama → özet → fatura → ödeme eşleştirme.
+    hesap="polars" ile hazırlık ve gruplamanın metin işleri Polars ile yapılır.
+    """
+    olcum = olcum or OLCUM_YOK
+    with olcum.asama("veri_hazirla", girdi=len(df_biz) + len(df_onlar)) as k:
+        biz = hazirla(df_biz, config_biz, "Biz", ex_biz, hesap=hesap)
+        onlar = hazirla(df_onlar, config_onlar, "Onlar", ex_onlar, hesap=hesap)
+        k["cikti"] = len(biz.ham) + len(onlar.ham)
+    return hazir_mutabakat(biz, onlar, rol_kodu, tolerans=tolerans, gun_penceresi=gun_penceresi, olcum=olcum,
+                           benzer=benzer, dagitim=dagitim, kurallar=kurallar)
@@ -0,0 +1,253 @@
+"""
+Ödeme eşleştirme motoru (ref → tutar/PB, tolerans ve valör penceresi ile).
+
+Eski yol karşı taraf ödemelerini `(tutar, PB)` float anahtarlı bir dict'e
+koyup her ödemeyi `iterrows` ile tek tek arıyordu: 1.000,00 ile 999,999
+hiç eşleşmiyor, süre satır sayısıyla doğrusal Python döngüsüne bağlı
+kalıyordu. Burada:
+
+1) Payment_ID üzerinden hash join: aynı referanslı ödemeler sırayla
+   (i. bizdeki ↔ i. onlardaki) eşleşir; referans önceliği tüm tablo için
+   geçerlidir.
+2) Kalanlar için PB bazında sıralı tutar dizileri: tolerans ve valör
+   penceresi yoksa (tutar, PB, sıra) üzerinden vektörel join; varsa ikili
+   arama + "sıradaki boş aday" işaretçileriyle açgözlü atama. Her ödeme
+   için en yakın tutar seçilir, eşitlikte karşı taraftaki ilk kayıt kazanır,
+   bu yüzden sonuç her çalıştırmada aynıdır.
+"""
+import numpy as np
+import pandas as pd
+
+from motor.sonuc import _ek_kolonlar, durum_kolonu, sabit_durum, tarih_metni
+
+# PB boş (NaN) olan ödemeler kendi aralarında eşleşebilsin diye iç anahtar
+_BOS_PB = "\x00"
+
+
+def _pb_anahtari(seri):
+    return pd.Series(seri).astype(object).where(pd.Series(seri).notna(), _BOS_PB).to_numpy()
+
+
+def _sirali_join(anahtar_biz, anahtar_onlar):
+    """
+    Aynı anahtarlı kayıtları geliş sırasıyla eşler (i. bizdeki ↔ i. onlardaki).
+    Sıralı açgözlü "ilk boş aday" aramasıyla birebir aynı sonucu verir.
+    Dönüş: (biz_pozisyonlari, onlar_pozisyonlari)
+    """
+    if not len(anahtar_biz) or not len(anahtar_onlar):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    b = pd.DataFrame(anahtar_biz)
+    b['_poz'] = np.arange(len(b))
+    b['_sira'] = b.groupby(list(anahtar_biz.columns), sort=False).cumcount()
+    o = pd.DataFrame(anahtar_onlar)
+    o['_poz'] = np.arange(len(o))
+    o['_sira'] = o.groupby(list(anahtar_onlar.columns), sort=False).cumcount()
+    m = b.merge(o, on=list(anahtar_biz.columns) + ['_sira'], suffixes=('_b', '_o'))
+    return m['_poz_b'].to_numpy(np.int64), m['_poz_o'].to_numpy(np.int64)
+
+
+def _bul(isaretci, i):
+    """Silinmemiş ilk elemanı bulur (path halving'li union-find)."""
+    while isaretci[i] != i:
+        isaretci[i] = isaretci[isaretci[i]]
+        i = isaretci[i]
+    return i
+
+
+def _toleransli_eslestir(b_tutar, b_tarih, o_tutar, o_tarih, tolerans, pencere):
+    """
+    Tek PB içindeki açgözlü eşleştirme. Bizim ödemeler sırayla gezilir;
+    her biri [x - tolerans, x + tolerans] aralığındaki, valör penceresine
+    uyan, henüz kullanılmamış en yakın tutarlı karşı kaydı alır.
+    Tarihler int64 (ns), NaT = iNaT. Dönüş: biz için onlar pozisyonu / -1.
+    """
+    sonuc = np.full(len(b_tutar), -1, dtype=np.int64)
+    sira = np.lexsort((np.arange(len(o_tutar)), o_tutar))  # (tutar, geliş sırası)
+    A = o_tutar[sira]
+    m = len(A)
+    if m == 0:
+        return sonuc
+
+    poz = np.searchsorted(A, b_tutar, 'left')
+    alt = np.searchsorted(A, b_tutar - tolerans, 'left')
+    ust = np.searchsorted(A, b_tutar + tolerans, 'right')
+    bas = np.searchsorted(A, A, 'left')  # aynı tutar grubunun ilk pozisyonu
+
+    A_l = A.tolist()
+    sira_l = sira.tolist()
+    bas_l = bas.tolist()
+    o_t = o_tarih[sira].tolist()
+    nat = np.iinfo(np.int64).min
+
+    sag = list(range(m + 1))      # sag[i]: i veya sağındaki ilk boş pozisyon
+    sol = list(range(m + 1))      # sol[i + 1]: i veya solundaki ilk boş pozisyon (+1 kaydırmalı)
+
+    def uygun(j, t):
+        if pencere is None:
+            return True
+        return t != nat and o_t[j] != nat and abs(o_t[j] - t) <= pencere
+
+    for q, (x, t, p, lo, hi) in enumerate(zip(b_tutar.tolist(), b_tarih.tolist(),
+                                              poz.tolist(), alt.tolist(), ust.tolist())):
+        if lo >= hi or x != x:
+            continue
+
+        # Sağ taraf: x'e eşit veya büyük en küçük tutar (eşitlerde ilk gelen)
+        j = _bul(sag, max(p, lo))
+        while j < hi and not uygun(j, t):
+            j = _bul(sag, j + 1)
+        aday_sag = j if j < hi else -1
+
+        # Sol taraf: x'ten küçük en büyük tutar, sonra o tutarın ilk geleni
+        aday_sol = -1
+        if p > lo:
+            k = _bul(sol, p) - 1
+            while k >= lo and not uygun(k, t):
+                k = _bul(sol, k) - 1
+            if k >= lo:
+                j = _bul(sag, bas_l[k])
+                while j < k and not uygun(j, t):
+                    j = _bul(sag, j + 1)
+                aday_sol = j
+
+        if aday_sag < 0 and aday_sol < 0:
+            continue
+        if aday_sol < 0:
+            secilen = aday_sag
+        elif aday_sag < 0:
+            secilen = aday_sol
+        else:
+            fark_sag, fark_sol = A_l[aday_sag] - x, x - A_l[aday_sol]
+            if fark_sol != fark_sag:
+                secilen = aday_sol if fark_sol < fark_sag else aday_sag
+            else:
+                secilen = aday_sol if sira_l[aday_sol] < sira_l[aday_sag] else aday_sag
+
+        sonuc[q] = sira_l[secilen]
+        sag[secilen] = secilen + 1
+        sol[secilen + 1] = secilen
+    return sonuc
+
+
+def _tarih_ns(seri):
+    return pd.to_datetime(pd.Series(seri)).to_numpy('datetime64[ns]').view(np.int64)
+
+
+def odeme_eslestir(pay_biz, pay_onlar, tolerans=0.0, gun_penceresi=None):
+    """
+    Ödemeleri eşleştirir. Dönüş: (biz_poz, onlar_poz) pozisyon dizileri,
+    bizim ödeme sırasına göre sıralı.
+
+    tolerans      : kabul edilen en büyük tutar farkı (PB cinsinden)
+    gun_penceresi : Tarih_Odeme (valör) farkı üst sınırı, gün; None = sınırsız
+    """
+    n_b, n_o = len(pay_biz), len(pay_onlar)
+    eslesme = np.full(n_b, -1, dtype=np.int64)
+    if not n_b or not n_o:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    pid_b = pay_biz['Payment_ID'].fillna('').astype(object).to_numpy()
+    pid_o = pay_onlar['Payment_ID'].fillna('').astype(object).to_numpy()
+    tutar_b = (pay_biz['Borc'] - pay_biz['Alacak']).abs().to_numpy(np.float64)
+    tutar_o = (pay_onlar['Borc'] - pay_onlar['Alacak']).abs().to_numpy(np.float64)
+    pb_b = _pb_anahtari(pay_biz['Para_Birimi'])
+    pb_o = _pb_anahtari(pay_onlar['Para_Birimi'])
+
+    # 1) Referans: Payment_ID hash join
+    ref_b, ref_o = np.flatnonzero(pid_b != ''), np.flatnonzero(pid_o != '')
+    bp, op = _sirali_join(pd.DataFrame({'pid': pid_b[ref_b]}), pd.DataFrame({'pid': pid_o[ref_o]}))
+    eslesme[ref_b[bp]] = ref_o[op]
+    kullanildi = np.zeros(n_o, dtype=bool)
+    kullanildi[ref_o[op]] = True
+
+    # 2) Tutar + PB: kalanlar üzerinde (NaN tutar hiçbir şeyle eşleşmez)
+    kalan_b = np.flatnonzero((eslesme < 0) & ~np.isnan(tutar_b))
+    kalan_o = np.flatnonzero(~kullanildi & ~np.isnan(tutar_o))
+
+    if tolerans <= 0 and gun_penceresi is None:
+        bp, op = _sirali_join(
+            pd.DataFrame({'pb': pb_b[kalan_b], 'tutar': tutar_b[kalan_b]}),
+            pd.DataFrame({'pb': pb_o[kalan_o], 'tutar': tutar_o[kalan_o]}),
+        )
+        eslesme[kalan_b[bp]] = kalan_o[op]
+    else:
+        pencere = None if gun_penceresi is None else int(gun_penceresi * 86_400 * 10**9)
+        t_b = _tarih_ns(pay_biz['Tarih_Odeme'])
+        t_o = _tarih_ns(pay_onlar['Tarih_Odeme'])
+        for pb in pd.unique(pb_b[kalan_b]):
+            bi = kalan_b[pb_b[kalan_b] == pb]
+            oi = kalan_o[pb_o[kalan_o] == pb]
+            if not len(oi):
+                continue
+            sec = _toleransli_eslestir(tutar_b[bi], t_b[bi], tutar_o[oi], t_o[oi],
+                                       max(float(tolerans), 0.0), pencere)
+            eslesme[bi[sec >= 0]] = oi[sec[sec >= 0]]
+
+    biz_poz = np.flatnonzero(eslesme >= 0)
+    return biz_poz, eslesme[biz_poz]
+
+
+def odeme_tablolari(pay_biz, pay_onlar, ex_biz, ex_onlar, tolerans=0.0, gun_penceresi=None, eslesme=None,
+                    dagitilan=None):
+    """
+    Ödeme sonuç tabloları: (Ödemeler, Bizde Var (Ödeme), Onlarda Var (Ödeme)).
+    İki taraftan biri boşsa ödeme karşılaştırması yapılmaz, üçü de boş döner.
+    `eslesme` verilirse ((biz_poz, onlar_poz), `odeme_eslestir` çıktısı)
+    eşleştirme tekrar yapılmaz ve taraflardan biri boş olsa da eşleşmeyenler
+    listelenir. `dagitilan` ((biz_poz, onlar_poz), toplu ödeme dağıtımına
+    giren ödemeler, bkz. motor/dagitim.py) eşleşmeyen listelerine yazılmaz.
+    """
+    if eslesme is None:
+        if pay_biz.empty or pay_onlar.empty:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        eslesme = odeme_eslestir(pay_biz, pay_onlar, tolerans, gun_penceresi)
+    biz_poz, onlar_poz = eslesme
+
+    tutar_b = (pay_biz['Borc'] - pay_biz['Alacak']).abs().to_numpy(np.float64)
+    tutar_o = (pay_onlar['Borc'] - pay_onlar['Alacak']).abs().to_numpy(np.float64)
+
+    eslesen = pd.DataFrame()
+    if len(biz_poz):
+        b = pay_biz.iloc[biz_poz]
+        o = pay_onlar.iloc[onlar_poz]
+        fark = tutar_b[biz_poz] - tutar_o[onlar_poz]
+        pid_b = b['Payment_ID'].to_numpy(dtype=object)
+        kolonlar = {
+            "Durum": durum_kolonu(np.where(np.abs(fark) < 0.01, "✅ Ödeme Eşleşti", "🟡 Tutar Farkı")),
+            "Ödeme Ref": np.where(pd.Series(pid_b).fillna('').ne('').to_numpy(), pid_b,
+                                  o['Payment_ID'].to_numpy(dtype=object)),
+            "Tarih (Biz)": tarih_metni(b['Tarih_Odeme']).to_numpy(),
+            "Tarih (Onlar)": tarih_metni(o['Tarih_Odeme']).to_numpy(),
+            "Tutar (Biz)": tutar_b[biz_poz],
+            "Tutar (Onlar)": tutar_o[onlar_poz],
+            "Fark (TL)": fark,
+            "PB": b['Para_Birimi'].to_numpy(),
+        }
+        kolonlar.update(_ek_kolonlar(b, ex_biz, "BİZ", None))
+        kolonlar.update(_ek_kolonlar(o, ex_onlar, "KARŞI", None))
+        eslesen = pd.DataFrame(kolonlar)
+
+    def eslesmeyen(pay, tutar, kullanilan, durum, ex_cols, onek):
+        maske = np.ones(len(pay), dtype=bool)
+        maske[kullanilan] = False
+        if not maske.any():
+            return pd.DataFrame()
+        p = pay[maske]
+        kolonlar = {
+            "Durum": sabit_durum(len(p), durum),
+            "Ödeme Ref": p['Payment_ID'].to_numpy(),
+            "Tarih": tarih_metni(p['Tarih_Odeme']).to_numpy(),
+            "Tutar": tutar[maske],
+            "PB": p['Para_Birimi'].to_numpy(),
+        }
+        kolonlar.update(_ek_kolonlar(p, ex_cols, onek, None))
+        return pd.DataFrame(kolonlar)
+
+    if dagitilan is not None:
+        biz_poz = np.concatenate([biz_poz, dagitilan[0]]).astype(np.int64)
+        onlar_poz = np.concatenate([onlar_poz, dagitilan[1]]).astype(np.int64)
+    return (
+        eslesen,
+        eslesmeyen(pay_biz, tutar_b, biz_poz, "🔴 Bizde Var (Ödeme)", ex_biz, "BİZ"),
+        eslesmeyen(pay_onlar, tutar_o, onlar_poz, "🔵 Onlarda Var (Ödeme)", ex_onlar, "KARŞI"),
+    )
@@ -0,0 +1,281 @@
+"""
+Yüklenen dosyaların okunması ve rerun'lar arası önbelleklenmesi.
+
+Streamlit her widget değişiminde scripti baştan çalıştırır; dosyayı her
+seferinde yeniden okumak büyük çalışma kitaplarında
+her tıklamaya 10-30 sn ekliyordu. Önbellek anahtarı dosya içeriğinin
+hash'i + okuma seçenekleridir (dosya adı değil), boyutu sınırlıdır ve en
+uzun süredir kullanılmayan kayıt önce atılır (LRU).
+
+Karşı tarafın birden çok dosyası (ör. 12 aylık ekstre) `dosyalari_oku` ile
+okunur: önbellekte olmayanlar süreç havuzunda paralel ayrıştırılır, her
+satıra geldiği dosyanın adı yazılır ve parçalar tek concat ile birleşir.
+"""
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from motor import okuyucular
+
+# Aylık ekstreler tek tek kayıt tutar (önizleme ve tam okuma ayrı); asıl sınır boyut
+ONBELLEK_MAKS_ADET = 64
+ONBELLEK_MAKS_MB = 1024
+
+# Kolon eşleştirme ekranı için okunan örnek satır sayısı
+ONIZLEME_SATIR = 20
+
+# Eşleştirmede kullanılan config anahtarları (Başlat'ta okunacak kolonlar)
+KOLON_ANAHTARLARI = ['tarih_col', 'belge_col', 'tutar_col', 'borc_col', 'alacak_col',
+                     'doviz_cinsi_col', 'doviz_tutar_col', 'tarih_odeme_col', 'odeme_ref_col']
+
+# Birden çok dosya birleştirilirken satırın geldiği dosya adı bu kolona yazılır
+KAYNAK_KOLONU = "Kaynak Dosya"
+
+
+class YerelDosya:
+    """Diskteki dosya, yüklenen dosya arayüzüyle (.name / .getvalue()); komut satırı için."""
+
+    def __init__(self, yol):
+        self.yol = yol
+        self.name = os.path.basename(yol)
+
+    def getvalue(self):
+        with open(self.yol, 'rb') as f:
+            return f.read()
+
+
+def icerik_hash(veri):
+    return hashlib.blake2b(veri, digest_size=16).hexdigest()
+
+
+class OkumaOnbellegi:
+    """
+    İçerik hash'i + okuma seçenekleriyle anahtarlanmış, adet ve bellek
+    sınırlı LRU önbellek. Streamlit oturumları aynı süreçte ayrı thread'lerde
+    çalıştığı için erişim kilitlidir.
+    """
+
+    def __init__(self, maks_adet=ONBELLEK_MAKS_ADET, maks_mb=ONBELLEK_MAKS_MB):
+        self.maks_adet = maks_adet
+        self.maks_bayt = maks_mb * 1024 * 1024
+        self._kayitlar = OrderedDict()  # anahtar → (df, bayt)
+        self._toplam_bayt = 0
+        self._kilit = threading.Lock()
+
+    @staticmethod
+    def anahtar(veri, secenekler):
+        return icerik_hash(veri), tuple(sorted((k, repr(v)) for k, v in secenekler.items()))
+
+    def al(self, anahtar):
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is None:
+                return None
+            self._kayitlar.move_to_end(anahtar)
+            return kayit[0]
+
+    def koy(self, anahtar, df):
+        bayt = int(df.memory_usage(index=True, deep=True).sum())
+        with self._kilit:
+            if anahtar in self._kayitlar:
+                self._toplam_bayt -= self._kayitlar.pop(anahtar)[1]
+            self._kayitlar[anahtar] = (df, bayt)
+            self._toplam_bayt += bayt
+            # Son eklenen tek başına sınırı aşsa bile tutulur; diğerleri atılır
+            while len(self._kayitlar) > 1 and (
+                len(self._kayitlar) > self.maks_adet or self._toplam_bayt > self.maks_bayt
+            ):
+                _, (_, eski_bayt) = self._kayitlar.popitem(last=False)
+                self._toplam_bayt -= eski_bayt
+
+    def temizle(self):
+        with self._kilit:
+            self._kayitlar.clear()
+            self._toplam_bayt = 0
+
+    def __len__(self):
+        return len(self._kayitlar)
+
+
+# Süreç genelinde tek önbellek: script her rerun'da yeniden çalışsa da modül bir kez yüklenir
+onbellek = OkumaOnbellegi()
+
+
+def dosya_oku(dosya, **secenekler):
+    """
+    Yüklenen dosyayı (Streamlit UploadedFile veya .name/.getvalue() olan
+    herhangi bir nesne) uzantısına uygun okuyucuyla okur; aynı içerik +
+    seçenekler daha önce okunduysa önbellekten döner. Seçenekler
+    `okuyucular.oku`'ya aynen geçer (nrows, kolonlar, tum_sayfalar, motor).
+
+    Dönüş: (df, bilgi) — bilgi: {'dosya', 'isabet', 'sure'}
+    Dönen DataFrame önbellekteki nesnenin yüzeysel kopyasıdır; yerinde
+    değer değiştirilmemelidir.
+    """
+    t0 = time.perf_counter()
+    veri = dosya.getvalue()
+    ad = getattr(dosya, 'name', '')
+    anahtar = _onbellek_anahtari(veri, ad, secenekler)
+
+    df = onbellek.al(anahtar)
+    isabet = df is not None
+    if not isabet:
+        df = okuyucular.oku(veri, ad, **secenekler)
+        onbellek.koy(anahtar, df)
+
+    bilgi = {'dosya': ad, 'isabet': isabet, 'sure': time.perf_counter() - t0}
+    return df.copy(deep=False), bilgi
+
+
+def _onbellek_anahtari(veri, ad, secenekler):
+    # Aynı bayt dizisi farklı uzantıyla farklı okunur (csv/xlsx); uzantı anahtara girer
+    return onbellek.anahtar(veri, dict(secenekler, uzanti=os.path.splitext(ad)[1].lower()))
+
+
+def okuma_bilgisi_metni(bilgi):
+    durum = "önbellekten" if bilgi['isabet'] else "okundu"
+    return f"📄 {bilgi['dosya']} — {durum} ({bilgi['sure']:.2f} sn)"
+
+
+def baslik_oku(dosya, nrows=ONIZLEME_SATIR, **secenekler):
+    """
+    1. aşama: sadece başlık + ilk `nrows` satır. Kolon seçim kutuları ve
+    önizleme için yeterlidir; tam okuma Başlat'a bırakılır.
+    """
+    return dosya_oku(dosya, nrows=nrows, **secenekler)
+
+
+def secili_kolonlar(config):
+    """Config'de eşleştirme için seçilmiş kolonlar (her dosyada bulunması gerekenler)."""
+    return [v for k, v in config.items() if k in KOLON_ANAHTARLARI and v and v != "Seçiniz..."]
+
+
+def gerekli_kolonlar(config, extra_cols, basliklar):
+    """
+    Başlat'ta gerçekten okunması gereken kolonlar (başlık sırasıyla):
+    seçilen eşleştirme kolonları, rapora eklenecek kolonlar ve Belge No
+    boşken yedek olarak kullanılan "Ref / Referans" kolonları
+    (veri_hazirla içindeki arama ile aynı desen).
+    """
+    secili = set(secili_kolonlar(config))
+    secili.update(extra_cols or [])
+    belge = config.get('belge_col')
+    return [c for c in basliklar
+            if c in secili or (c != belge and re.search(r'ref|referans', str(c), re.IGNORECASE))]
+
+
+def kolonlari_oku(dosya, kolonlar, **secenekler):
+    """
+    2. aşama: tam okuma, ama sadece `kolonlar`. Kolonlar 1. aşamadaki
+    adlarıyla seçilir; okuyucular tekrar eden başlıkları pandas gibi
+    adlandırdığı için ('Tutar', 'Tutar.1') iki aşamada da aynı ada
+    karşılık gelir. Seçilmeyen kolonlar hiç dönüştürülmez.
+    """
+    return dosya_oku(dosya, kolonlar=list(kolonlar), **secenekler)
+
+
+def sema_farklari(basliklar):
+    """
+    {dosya adı: başlıklar} → ilk dosyanın başlıklarından farklı olan dosyalar:
+    {dosya adı: {'eksik': [...], 'fazla': [...]}}. Birleştirmede eksik
+    kolonlar NaN olacağından arayüz bunları kullanıcıya gösterir.
+    """
+    if not basliklar:
+        return {}
+    adlar = list(basliklar)
+    referans = list(basliklar[adlar[0]])
+    farklar = {}
+    for ad in adlar[1:]:
+        kolonlar = list(basliklar[ad])
+        eksik = [c for c in referans if c not in kolonlar]
+        fazla = [c for c in kolonlar if c not in referans]
+        if eksik or fazla:
+            farklar[ad] = {'eksik': eksik, 'fazla': fazla}
+    return farklar
+
+
+def sema_farki_metni(ad, fark, referans_ad):
+    parcalar = []
+    if fark['eksik']:
+        parcalar.append("eksik: " + ", ".join(map(str, fark['eksik'])))
+    if fark['fazla']:
+        parcalar.append("fazla: " + ", ".join(map(str, fark['fazla'])))
+    return f"{ad} başlıkları {referans_ad} ile farklı ({'; '.join(parcalar)})"
+
+
+def _dosya_ayristir(veri, ad, secenekler):
+    """İşçi süreçte tek dosyanın ayrıştırılması → (df, süre)."""
+    t0 = time.perf_counter()
+    return okuyucular.oku(veri, ad, **secenekler), time.perf_counter() - t0
+
+
+def dosyalari_oku(dosyalar, kolonlar=None, zorunlu=(), is_sayisi=None, **secenekler):
+    """
+    Birden çok dosyayı okuyup tek concat ile alt alta birleştirir.
+
+    kolonlar verilirse dosya başına okunacak kolon listesidir (dosyalar ile
+    aynı sırada; `gerekli_kolonlar` her dosyanın kendi başlığıyla). Önbellekte
+    olmayan dosyalar tam okumada (nrows yok) süreç havuzunda paralel
+    ayrıştırılır; xlsx ayrıştırma CPU'ya bağlı olduğundan 12 aylık ekstre
+    çekirdek sayısı kadar hızlanır. zorunlu kolonlardan (eşleştirme
+    kolonları) biri bir dosyada yoksa ValueError verilir: o dosyanın
+    satırları sessizce NaN ile dolmaz. Birden çok dosya varsa her satırın
+    dosya adı KAYNAK_KOLONU'na (kategorik) yazılır.
+
+    Dönüş: (df, bilgiler) — bilgiler dosya başına `dosya_oku` bilgisi,
+    ayrıca 'kolonlar' (dosyanın okunan başlıkları).
+    """
+    if kolonlar is None:
+        kolonlar = [None] * len(dosyalar)
+    parcalar, bilgiler, eksikler = [None] * len(dosyalar), [None] * len(dosyalar), []
+    for i, (dosya, k) in enumerate(zip(dosyalar, kolonlar)):
+        t0 = time.perf_counter()
+        sec = secenekler if k is None else dict(secenekler, kolonlar=list(k))
+        veri, ad = dosya.getvalue(), getattr(dosya, 'name', '')
+        anahtar = _onbellek_anahtari(veri, ad, sec)
+        df = onbellek.al(anahtar)
+        if df is None:
+            eksikler.append((i, veri, ad, sec, anahtar))
+        else:
+            parcalar[i] = df.copy(deep=False)
+            bilgiler[i] = {'dosya': ad, 'isabet': True, 'sure': time.perf_counter() - t0}
+
+    if len(eksikler) > 1 and secenekler.get('nrows') is None and is_sayisi != 1:
+        # spawn: Streamlit sunucusu çok thread'lidir; fork başka thread'lerin tuttuğu
+        # kilitleri (logging, önbellek) kilitli haliyle kopyalayıp çocuğu kilitleyebilir
+        with ProcessPoolExecutor(max_workers=min(is_sayisi or os.cpu_count() or 1, len(eksikler)),
+                                 mp_context=multiprocessing.get_context("spawn")) as havuz:
+            isler = [havuz.submit(_dosya_ayristir, veri, ad, sec) for _, veri, ad, sec, _ in eksikler]
+            okunanlar = [is_.result() for is_ in isler]
+    else:
+        okunanlar = [_dosya_ayristir(veri, ad, sec) for _, veri, ad, sec, _ in eksikler]
+    for (i, _, ad, _, anahtar), (df, sure) in zip(eksikler, okunanlar):
+        onbellek.koy(anahtar, df)
+        parcalar[i] = df.copy(deep=False)
+        bilgiler[i] = {'dosya': ad, 'isabet': False, 'sure': sure}
+
+    for bilgi, df in zip(bilgiler, parcalar):
+        bilgi['kolonlar'] = df.columns.tolist()
+    eksik_kolonlar = {b['dosya']: [c for c in zorunlu if c not in b['kolonlar']] for b in bilgiler}
+    eksik_kolonlar = {ad: k for ad, k in eksik_kolonlar.items() if k}
+    if eksik_kolonlar:
+        raise ValueError("Eşleştirme kolonları bazı dosyalarda yok: " + "; ".join(
+            f"{ad}: {', '.join(map(str, k))}" for ad, k in eksik_kolonlar.items()))
+
+    if len(parcalar) == 1:
+        return parcalar[0], bilgiler
+    df = pd.concat(parcalar, ignore_index=True)
+    adlar = [b['dosya'] for b in bilgiler]
+    kategoriler = list(dict.fromkeys(adlar))
+    kodlar = np.repeat(np.array([kategoriler.index(a) for a in adlar], dtype=np.int32),
+                       [len(p) for p in parcalar])
+    df[KAYNAK_KOLONU] = pd.Categorical.from_codes(kodlar, kategoriler)
+    return df, bilgiler
@@ -0,0 +1,266 @@
+"""
+Dosya okuyucu arka uçları: Excel (openpyxl akış modu / calamine), CSV/TSV,
+Parquet.
+
+Hepsi aynı imzayı kullanır:
+    okuyucu(veri: bytes, nrows=None, kolonlar=None, sayfa=0) -> DataFrame
+
+`kolonlar` verilirse sadece o başlıklar (pandas'ın tekrar eden başlık
+adlandırmasıyla: 'Tutar', 'Tutar.1') okunur; `nrows` başlık hariç satır
+sınırıdır. `oku` dosya uzantısına ve seçilen motora göre doğru arka ucu
+çağırır, istenirse çalışma kitabındaki tüm sayfaları tek deftere birleştirir.
+"""
+import csv
+import importlib.util
+import io
+import os
+import re
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+MOTORLAR = ["Otomatik", "calamine", "openpyxl", "pandas"]
+
+EXCEL_UZANTILARI = {".xlsx", ".xlsm", ".xls"}
+CSV_UZANTILARI = {".csv", ".tsv", ".txt"}
+PARQUET_UZANTILARI = {".parquet", ".pq"}
+DESTEKLENEN_UZANTILAR = sorted(u.lstrip(".") for u in EXCEL_UZANTILARI | CSV_UZANTILARI | PARQUET_UZANTILARI)
+
+# values_only modunda hata hücreleri metin olarak gelir; pandas bunları NaN yapar
+_EXCEL_HATALARI = {"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"}
+
+# Nokta ondalıklı sayı ('17383.21', '-0.5', '1e-05') ve Türkçe binlik yazımı ('1.000', '12.345.678')
+_NOKTA_ONDALIK = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+_TURKCE_BINLIK = re.compile(r'[+-]?\d{1,3}(?:\.\d{3})+')
+
+# Türkçe Windows dosyaları için sırayla denenen kodlamalar (latin-1 hiç hata vermez)
+_KODLAMALAR = ["utf-8-sig", "cp1254", "iso-8859-9", "latin-1"]
+
+
+def calamine_var_mi():
+    return importlib.util.find_spec("python_calamine") is not None
+
+
+def _uzanti(dosya_adi):
+    return os.path.splitext(str(dosya_adi))[1].lower()
+
+
+def _basliklar(baslik_satiri):
+    """Ham başlık satırını pandas'ın vereceği kolon adlarına çevirir ('Unnamed: 3', 'A.1')."""
+    return TextParser([list(baslik_satiri)], header=0).read().columns.tolist()
+
+
+def _pozisyonlar(basliklar, kolonlar):
+    if kolonlar is None:
+        return list(range(len(basliklar)))
+    istenen = set(kolonlar)
+    return [i for i, c in enumerate(basliklar) if c in istenen]
+
+
+# --- Excel: openpyxl read-only akış modu ---
+
+def _hucre(v):
+    # pandas'ın openpyxl okuyucusundaki dönüşümle aynı
+    if v is None:
+        return ""
+    if type(v) is float:
+        return int(v) if v.is_integer() else v
+    if type(v) is str and v in _EXCEL_HATALARI:
+        return float("nan")
+    return v
+
+
+def openpyxl_oku(veri, nrows=None, kolonlar=None, sayfa=0):
+    """
+    openpyxl read_only + values_only ile satır satır okur. Hücre nesnesi
+    oluşturulmaz, istenmeyen kolonlar dönüştürülmeden atlanır ve `nrows`
+    dolunca okuma durur; geniş ERP dökümlerinde asıl kazanç buradadır.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(veri), read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[sayfa] if isinstance(sayfa, str) else wb.worksheets[sayfa]
+        ws.reset_dimensions()
+        satirlar = ws.iter_rows(values_only=True)
+
+        baslik_satiri = next(satirlar, None)
+        if baslik_satiri is None:
+            return pd.DataFrame()
+        baslik_satiri = list(baslik_satiri)
+        while baslik_satiri and baslik_satiri[-1] is None:
+            baslik_satiri.pop()
+        basliklar = _basliklar([_hucre(v) for v in baslik_satiri])
+        poz = _pozisyonlar(basliklar, kolonlar)
+
+        veri_satirlari = []
+        son_dolu = -1
+        for satir in satirlar:
+            if nrows is not None and len(veri_satirlari) >= nrows:
+                break
+            # Sondaki boş satırlar pandas'taki gibi atılır (seçilmeyen kolonlar da sayılır)
+            if any(v is not None for v in satir):
+                son_dolu = len(veri_satirlari)
+            n = len(satir)
+            veri_satirlari.append([_hucre(satir[i]) if i < n else "" for i in poz])
+        del veri_satirlari[son_dolu + 1:]
+    finally:
+        wb.close()
+
+    adlar = [basliklar[i] for i in poz]
+    if not veri_satirlari:
+        return pd.DataFrame(columns=adlar)
+    return TextParser(veri_satirlari, header=None, names=adlar, skip_blank_lines=False).read()
+
+
+def excel_sayfa_adlari(veri, motor="openpyxl"):
+    """Sayfa adları, seçilen motorla (pandas: .xls için xlrd; openpyxl .xls açamaz)."""
+    if motor == "calamine":
+        from python_calamine import CalamineWorkbook
+        return CalamineWorkbook.from_filelike(io.BytesIO(veri)).sheet_names
+    if motor == "pandas":
+        with pd.ExcelFile(io.BytesIO(veri)) as kitap:
+            return kitap.sheet_names
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(veri), read_only=True, keep_links=False)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def _pandas_excel_oku(veri, nrows=None, kolonlar=None, sayfa=0, engine=None):
+    # Seçilmeyen kolonlar ayrıştırıcıda atlanır (geniş dökümlerde bellek ve süre)
+    secili = None if kolonlar is None else set(kolonlar)
+    return pd.read_excel(io.BytesIO(veri), sheet_name=sayfa, nrows=nrows, engine=engine,
+                         usecols=None if secili is None else (lambda c: c in secili))
+
+
+def calamine_oku(veri, nrows=None, kolonlar=None, sayfa=0):
+    """Rust tabanlı calamine motoru (python-calamine kuruluysa); xlsx ve xls okur."""
+    return _pandas_excel_oku(veri, nrows, kolonlar, sayfa, engine="calamine")
+
+
+def pandas_oku(veri, nrows=None, kolonlar=None, sayfa=0):
+    """pandas'ın varsayılan motoru (.xls için xlrd gerekir)."""
+    return _pandas_excel_oku(veri, nrows, kolonlar, sayfa)
+
+
+# --- CSV / TSV ---
+
+def _metne_cevir(veri):
+    for kodlama in _KODLAMALAR:
+        try:
+            return veri.decode(kodlama), kodlama
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Dosya kodlaması çözülemedi")
+
+
+def csv_oku(veri, nrows=None, kolonlar=None, sayfa=0, ayirici=None):
+    """
+    CSV/TSV: kodlama (UTF-8 / Windows-1254 / ISO-8859-9) ve ayırıcı (; , TAB |)
+    koklanarak bulunur. Hücreler metin okunur: "1.000" gibi Türkçe binlik
+    yazımlar C parser'ın 1.0'ına dönüşmesin, tutar ayrıştırıcısına olduğu
+    gibi gitsin. Nokta ondalıklı kolonlar ise float'a çevrilir (bkz.
+    `_nokta_ondalik_cevir`); yoksa Türkçe ayrıştırıcı noktaları binlik
+    sanıp "17383.21"i 1738321 yapardı.
+    """
+    metin, _ = _metne_cevir(veri)
+    if ayirici is None:
+        ornek = metin[:64 * 1024]
+        try:
+            ayirici = csv.Sniffer().sniff(ornek, delimiters=";,\t|").delimiter
+        except csv.Error:
+            ayirici = ";" if ornek.count(";") > ornek.count(",") else ","
+
+    basliklar = pd.read_csv(io.StringIO(metin), sep=ayirici, nrows=0).columns.tolist()
+    poz = _pozisyonlar(basliklar, kolonlar)
+    df = pd.read_csv(io.StringIO(metin), sep=ayirici, nrows=nrows, usecols=poz, dtype=str)
+    df.columns = [basliklar[i] for i in poz]
+    return _nokta_ondalik_cevir(df)
+
+
+def _nokta_ondalik_cevir(df):
+    """
+    Dolu hücrelerinin hepsi nokta ondalıklı sayı olan ve en az bir hücresi
+    Türkçe binlik yazımıyla okunamayan ('17383.21', '5.5', '1234.567')
+    kolonları float yapar. Tamsayı kolonları (belge no) ve sadece '1.000'
+    gibi iki türlü okunabilen değerlerden oluşanlar metin kalır.
+    """
+    for c in df.columns:
+        seri = df[c].dropna().str.strip()
+        seri = seri[seri.ne("")]
+        if not len(seri) or not seri.str.contains(".", regex=False).any():
+            continue
+        if not seri.str.fullmatch(_NOKTA_ONDALIK).all():
+            continue
+        noktali = seri[seri.str.contains(".", regex=False)]
+        if noktali.str.fullmatch(_TURKCE_BINLIK).all():
+            continue
+        df[c] = pd.to_numeric(df[c].str.strip().replace("", None), errors="coerce").astype("float64")
+    return df
+
+
+def tsv_oku(veri, nrows=None, kolonlar=None, sayfa=0):
+    return csv_oku(veri, nrows, kolonlar, sayfa, ayirici="\t")
+
+
+# --- Parquet ---
+
+def parquet_oku(veri, nrows=None, kolonlar=None, sayfa=0):
+    if nrows is not None:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return pd.read_parquet(io.BytesIO(veri), columns=kolonlar).head(nrows)
+        pf = pq.ParquetFile(io.BytesIO(veri))
+        parca = next(pf.iter_batches(batch_size=max(nrows, 1), columns=kolonlar), None)
+        if parca is None:
+            return pf.schema_arrow.empty_table().to_pandas()
+        return parca.to_pandas().head(nrows)
+    return pd.read_parquet(io.BytesIO(veri), columns=kolonlar)
+
+
+EXCEL_MOTORLARI = {
+    "openpyxl": openpyxl_oku,
+    "calamine": calamine_oku,
+    "pandas": pandas_oku,
+}
+
+
+def excel_motoru_sec(dosya_adi, motor="Otomatik"):
+    """'Otomatik': calamine kuruluysa o, değilse xlsx için openpyxl akış modu, xls için pandas."""
+    if motor in EXCEL_MOTORLARI:
+        return motor
+    if calamine_var_mi():
+        return "calamine"
+    return "pandas" if _uzanti(dosya_adi) == ".xls" else "openpyxl"
+
+
+def oku(veri, dosya_adi, nrows=None, kolonlar=None, tum_sayfalar=False, motor="Otomatik"):
+    """
+    Dosyayı uzantısına göre uygun arka uçla okur.
+
+    tum_sayfalar=True ise çalışma kitabındaki bütün sayfalar okunup tek
+    concat ile alt alta eklenir (aynı başlık yapısı beklenir; eksik kolonlar
+    NaN olur). CSV/Parquet için yok sayılır.
+    """
+    uzanti = _uzanti(dosya_adi)
+    if uzanti in CSV_UZANTILARI:
+        okuyucu = tsv_oku if uzanti == ".tsv" else csv_oku
+        return okuyucu(veri, nrows=nrows, kolonlar=kolonlar)
+    if uzanti in PARQUET_UZANTILARI:
+        return parquet_oku(veri, nrows=nrows, kolonlar=kolonlar)
+
+    secilen = excel_motoru_sec(dosya_adi, motor)
+    okuyucu = EXCEL_MOTORLARI[secilen]
+    if not tum_sayfalar:
+        return okuyucu(veri, nrows=nrows, kolonlar=kolonlar)
+
+    sayfalar = excel_sayfa_adlari(veri, secilen)
+    parcalar = [okuyucu(veri, nrows=nrows, kolonlar=kolonlar, sayfa=ad) for ad in sayfalar]
+    parcalar = [p for p in parcalar if len(p.columns)]
+    if not parcalar:
+        return pd.DataFrame()
+    return pd.concat(parcalar, ignore_index=True)
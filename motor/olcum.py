@@ -0,0 +1,131 @@
+"""
+Aşama bazlı performans ölçümü.
+
+Motorun aşamaları (`hazirla`, `grupla`, özet, fatura, ödeme) ve arayüzün
+okuma/dışa aktarım adımları `Olcum.asama(...)` bloklarıyla sarılır: her
+blok için süre, giren/çıkan satır sayısı ve bellek değişimi kaydedilir.
+Ölçüm ucuzdur (perf_counter + işletim sisteminden RSS), tracemalloc
+kullanılmaz; o yüzden her çalıştırmada açık tutulabilir.
+
+Kayıtlar arayüzde "Performans" panelinde gösterilir ve JSON lines olarak
+yerel log dosyasına eklenir; çok sayıda çalıştırmanın logları birleştirilip
+gerçek verideki darboğazlar bulunabilir.
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERFORMANS_LOG = "performans.jsonl"
+
+
+def rss_mb():
+    """Sürecin şu anki bellek kullanımı (MB); ölçülemiyorsa None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def tepe_rss_mb():
+    """Sürecin şimdiye kadarki en yüksek bellek kullanımı (MB); ölçülemiyorsa None."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _fark(once, sonra):
+    if once is None or sonra is None:
+        return None
+    return round(sonra - once, 1)
+
+
+class Olcum:
+    """Bir çalıştırmanın aşama kayıtları."""
+
+    def __init__(self, **bilgi):
+        self.calisma_id = uuid.uuid4().hex[:12]
+        self.bilgi = bilgi  # dosya adları, satır sayıları gibi çalıştırma bilgisi
+        self.asamalar = []
+
+    @contextmanager
+    def asama(self, ad, girdi=None):
+        """
+        with olcum.asama("grupla", girdi=len(df)) as kayit:
+            ...
+            kayit["cikti"] = len(sonuc)
+        """
+        kayit = {"asama": ad, "girdi": girdi, "cikti": None}
+        rss0, tepe0 = rss_mb(), tepe_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield kayit
+        finally:
+            kayit["sure_sn"] = round(time.perf_counter() - t0, 4)
+            kayit["bellek_degisim_mb"] = _fark(rss0, rss_mb())
+            kayit["tepe_artis_mb"] = _fark(tepe0, tepe_rss_mb())
+            self.asamalar.append(kayit)
+
+    def toplam_sure(self):
+        return round(sum(k["sure_sn"] for k in self.asamalar), 4)
+
+    def tablo(self):
+        """Panelde gösterilecek tablo: çalışma sırasıyla, her aşamanın toplam süredeki payıyla."""
+        if not self.asamalar:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.asamalar).rename(columns={
+            "asama": "Aşama", "girdi": "Giren Satır", "cikti": "Çıkan Satır", "sure_sn": "Süre (sn)",
+            "bellek_degisim_mb": "Bellek Δ (MB)", "tepe_artis_mb": "Tepe Artışı (MB)",
+        })
+        df[["Giren Satır", "Çıkan Satır"]] = df[["Giren Satır", "Çıkan Satır"]].astype("Int64")
+        toplam = df["Süre (sn)"].sum()
+        df["Pay (%)"] = (df["Süre (sn)"] / toplam * 100).round(1) if toplam else 0.0
+        return df[["Aşama", "Giren Satır", "Çıkan Satır", "Süre (sn)", "Pay (%)", "Bellek Δ (MB)", "Tepe Artışı (MB)"]]
+
+    def kayit(self, asamalar=None):
+        asamalar = self.asamalar if asamalar is None else asamalar
+        tepe = tepe_rss_mb()
+        return {
+            "zaman": datetime.now().isoformat(timespec="seconds"),
+            "calisma_id": self.calisma_id,
+            **self.bilgi,
+            "toplam_sn": round(sum(k["sure_sn"] for k in asamalar), 4),
+            "tepe_rss_mb": None if tepe is None else round(tepe, 1),
+            "asamalar": asamalar,
+        }
+
+    def log_yaz(self, yol=PERFORMANS_LOG, son=None):
+        """
+        Kaydı JSON lines dosyasına ekler. son=n verilirse sadece son n aşama
+        yazılır (çalıştırmadan sonra tıklanan dışa aktarım gibi; aynı
+        calisma_id ile). Log yazılamazsa çalıştırma bozulmaz.
+        """
+        asamalar = self.asamalar[-son:] if son else self.asamalar
+        try:
+            with open(yol, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.kayit(asamalar), ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass
+
+
+class _OlcumYok:
+    """Ölçüm istenmediğinde kullanılan boş ölçüm (motor kodu dallanmasın diye)."""
+
+    @contextmanager
+    def asama(self, ad, girdi=None):
+        yield {}
+
+
+OLCUM_YOK = _OlcumYok()
@@ -0,0 +1,48 @@
+"""
+Para birimi + ay bazında borç/alacak özeti ve kümüle bakiye farkı
+(ÖZET_BAKIYE sayfası).
+"""
+import pandas as pd
+
+
+def _aylik_toplamlar(parcalar, onek):
+    """
+    Parçaların (defter + ödemeler) para birimi × ay toplamları. Parçalar
+    alt alta birleştirilmez ve kopyalanmaz; her biri kendi içinde gruplanır,
+    küçük grup sonuçları toplanır.
+    """
+    if isinstance(parcalar, pd.DataFrame):
+        parcalar = [parcalar]
+    toplamlar = [
+        df.groupby([df['Para_Birimi'], df['Tarih'].dt.to_period('M').rename('Yil_Ay')], observed=True)
+          [['Borc', 'Alacak']].sum()
+        for df in parcalar if len(df)
+    ]
+    if not toplamlar:
+        grp = pd.DataFrame({'Para_Birimi': pd.Series(dtype=str), 'Yil_Ay': pd.Series(dtype='period[M]'),
+                            'Borc': pd.Series(dtype=float), 'Alacak': pd.Series(dtype=float)})
+    else:
+        grp = toplamlar[0] if len(toplamlar) == 1 else pd.concat(toplamlar).groupby(level=[0, 1], observed=True).sum()
+        grp = grp.reset_index()
+        grp['Para_Birimi'] = grp['Para_Birimi'].astype(str)
+    grp['Net'] = grp['Borc'] - grp['Alacak']
+    grp.columns = ['Para_Birimi', 'Yil_Ay', f'{onek}_Borc', f'{onek}_Alacak', f'{onek}_Net']
+    return grp
+
+
+def ozet_rapor_olustur(df_biz_raw, df_onlar_raw):
+    """df_*_raw: hazırlanmış defter ya da defter parçalarının listesi ([ham, ödemeler])."""
+    grp_biz = _aylik_toplamlar(df_biz_raw, 'Biz')
+    grp_onlar = _aylik_toplamlar(df_onlar_raw, 'Onlar')
+
+    ozet = pd.merge(grp_biz, grp_onlar, on=['Para_Birimi', 'Yil_Ay'], how='outer').fillna(0)
+    ozet = ozet.sort_values(['Para_Birimi', 'Yil_Ay'])
+    
+    ozet['Biz_Bakiye'] = ozet.groupby('Para_Birimi')['Biz_Net'].cumsum()
+    ozet['Onlar_Bakiye'] = ozet.groupby('Para_Birimi')['Onlar_Net'].cumsum()
+    ozet['Kümüle_Fark'] = ozet['Biz_Bakiye'] + ozet['Onlar_Bakiye']
+    
+    ozet['Yil_Ay'] = ozet['Yil_Ay'].astype(str)
+    cols = ['Para_Birimi', 'Yil_Ay', 'Biz_Borc', 'Biz_Alacak', 'Biz_Bakiye', 
+            'Onlar_Borc', 'Onlar_Alacak', 'Onlar_Bakiye', 'Kümüle_Fark']
+    return ozet[cols]
@@ -0,0 +1,119 @@
+"""
+İsteğe bağlı Polars hesap motoru.
+
+`hesap="polars"` seçilince hazırlığın metin ağırlıklı adımları (Match_ID ve
+Payment_ID normalizasyonu) ve `grupla`'da 'join' kolonlarının grup içi
+birleştirmesi Polars ifadeleriyle (Rust, çok çekirdekli) yapılır.
+Girdi ve çıktı yine pandas'tır; tablolar pandas motoruyla aynı değer, kolon
+sırası ve tiplerle çıkar (kontrol: benchmarks/motor_parite.py).
+
+Kapsam bilinçli olarak dardır. Tutar toplamları (gruplama), aylık özet,
+birleştirmeler ve eşleştirme (numpy kodları üzerinde), tarih okuma
+(dayfirst), Türkçe tutar çevirme ve para birimi kodları iki motorda
+ortaktır; Polars'a taşınmış bir lazy akış yoktur. Polars'ın float
+toplamları pandas'ın dengelenmiş (Kahan) toplamından son bitlerde
+ayrışır; tutar ve eşleşme kararları ise motordan bağımsız, birebir aynı
+kalmalı. Eşitlik uç durumlarla birlikte benchmarks/motor_parite.py
+--sadece-kontrol ile denetlenir. Polars kurulu değilse `hesap_motoru_sec`
+pandas'a düşer.
+"""
+import functools
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+from motor.anahtar import _rakam_disi_deseni
+
+HESAP_MOTORLARI = ["pandas", "polars"]
+
+
+def polars_var_mi():
+    return importlib.util.find_spec("polars") is not None
+
+
+def hesap_motoru_sec(motor="pandas"):
+    """Seçilen motor; 'polars' seçilip kurulu değilse 'pandas'."""
+    if motor not in HESAP_MOTORLARI:
+        raise ValueError(f"Geçersiz hesap motoru: {motor!r} (beklenen: {', '.join(HESAP_MOTORLARI)})")
+    if motor == "polars" and not polars_var_mi():
+        return "pandas"
+    return motor
+
+
+@functools.lru_cache(maxsize=None)
+def _bosluklar():
+    """
+    Python `str.strip()`'in attığı karakterler (Polars'ın varsayılanı Rust'ın
+    boşluk tanımıdır, '\\x1c'-'\\x1f' gibi ayırıcıları atmaz). Hepsi temel
+    düzlemde olduğundan tarama 0x10000'de kesilir.
+    """
+    return ''.join(chr(c) for c in range(0x10000) if chr(c).isspace())
+
+
+def _metin(seri):
+    """
+    Hücrelerin `str()` hali Polars String kolonu olarak. Metne çevirme
+    pandas'ta yapılır (sayı/tarih hücrelerinin yazımı birebir aynı kalsın);
+    boş hücreler null olur.
+    """
+    import polars as pl
+    return pl.from_pandas(pd.Series(seri).astype(str).reset_index(drop=True))
+
+
+def _str_seri(degerler, index):
+    """Polars String → pandas `str` dtype Series (pandas motorunun `astype(str)` çıktısı gibi)."""
+    return pd.Series(degerler.to_arrow(), index=index, dtype=str)
+
+
+def _kategorik(degerler, index):
+    """Polars String → sıralı kategorilerle pandas Categorical Series (`astype('category')` gibi; null → NaN)."""
+    import polars as pl
+    kategoriler = degerler.drop_nulls().unique().sort()
+    kodlar = degerler.cast(pl.Enum(kategoriler)).to_physical().fill_null(-1).to_numpy()
+    dtype = pd.CategoricalDtype(pd.Index(kategoriler.to_arrow(), dtype=str))
+    return pd.Series(pd.Categorical.from_codes(kodlar.astype(np.int32, copy=False), dtype=dtype), index=index)
+
+
+def match_id_kategorik(seri):
+    """`match_id_serisi(seri).astype('category')` ile aynı sonuç."""
+    seri = pd.Series(seri)
+    rakamlar = _metin(seri).str.replace_all(_rakam_disi_deseni().pattern, "").fill_null("")
+    return _kategorik(rakamlar.str.strip_chars_start("0"), seri.index)
+
+
+def payment_id_serisi(seri):
+    """`motor.anahtar.payment_id_serisi` ile aynı sonuç."""
+    import polars as pl
+    seri = pd.Series(seri)
+    bos = pl.Series(seri.isna().to_numpy())
+    metin = _metin(seri).str.strip_chars(_bosluklar())
+    rakamlar = metin.str.replace_all(r"\D+", "")
+    sonuc = (pl.select(pl.when(bos).then(pl.lit(""))
+                       .when(rakamlar.eq(""))
+                       .then(metin.str.to_uppercase())
+                       .otherwise(rakamlar))
+             .to_series())
+    return _str_seri(sonuc, seri.index)
+
+
+def metin_birlestir(df_ids, kolonlar, kod):
+    """
+    `hazirlik._metin_birlestir`'in çok kolonlu hali, tek Polars group_by
+    geçişinde: her grubun dolu, birbirinden farklı değerleri görünüş
+    sırasıyla ', ' ile. kod: 0..n-1 grup kodları. Dönüş: kolon → object dizi.
+    """
+    import polars as pl
+    veri = {"_kod": kod}
+    for i, col in enumerate(kolonlar):
+        seri = df_ids[col]
+        metin = seri.astype(str)
+        dolu = seri.notna().to_numpy() & metin.str.strip().ne("").to_numpy()
+        veri[f"c{i}"] = pl.from_pandas(metin.where(dolu).reset_index(drop=True))
+    sonuc = (pl.DataFrame(veri).lazy()
+             .group_by("_kod")
+             .agg(pl.col(f"c{i}").drop_nulls().unique(maintain_order=True).str.join(", ")
+                  for i in range(len(kolonlar)))
+             .sort("_kod")
+             .collect())
+    return {col: sonuc[f"c{i}"].to_numpy().astype(object) for i, col in enumerate(kolonlar)}
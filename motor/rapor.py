@@ -0,0 +1,196 @@
+"""
+Sonuç tablolarının Excel rapora yazılması.
+
+Yazım akış halindedir (xlsxwriter constant_memory, yoksa openpyxl
+write_only): satırlar sırayla diske/çıktıya gider, çalışma kitabı bellekte
+kurulmaz. Kalın kolonlar ve genişlikler hücre hücre değil kolon bazında
+verilir. Excel'in satır sınırını aşan tablolar otomatik bölünür.
+"""
+import hashlib
+import importlib.util
+import io
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+EXCEL_MAKS_SATIR = 1_048_576  # başlık dahil
+KOLON_GENISLIGI = 20
+KALIN_KOLONLAR = {'Biz_Bakiye', 'Onlar_Bakiye', 'Kümüle_Fark', 'Durum', 'Fark (TL)'}
+
+# Sonuç anahtarı → rapordaki sayfa adı (arayüz ve komut satırı aynı raporu üretir)
+SAYFA_ADLARI = {
+    "ozet": "ÖZET_BAKIYE",
+    "eslesen": "Eşleşenler",
+    "odeme": "Ödemeler",
+    "un_biz": "Bizde Var - Yok",
+    "un_onlar": "Onlarda Var - Yok",
+}
+
+# Sadece sonuçta varsa eklenen sayfalar (toplu ödeme dağıtımı, artımlı çalıştırmanın değişiklik listesi)
+EK_SAYFA_ADLARI = {
+    "dagitim": "Toplu Ödemeler",
+    "degisiklik": "Değişiklikler",
+}
+
+
+def rapor_sayfalari(tablolar):
+    sayfalar = {sayfa: tablolar.get(anahtar, pd.DataFrame()) for anahtar, sayfa in SAYFA_ADLARI.items()}
+    sayfalar.update({sayfa: tablolar[anahtar] for anahtar, sayfa in EK_SAYFA_ADLARI.items() if anahtar in tablolar})
+    return sayfalar
+
+
+def xlsxwriter_var_mi():
+    return importlib.util.find_spec("xlsxwriter") is not None
+
+
+def sayfa_adi(ad):
+    return re.sub(r'[\\/*?:\[\]]', '-', str(ad))[:30]
+
+
+def sayfa_parcalari(ad, df, maks_satir=EXCEL_MAKS_SATIR - 1):
+    """
+    Excel'in satır sınırını aşan tabloyu ardışık sayfalara böler:
+    'Eşleşenler', 'Eşleşenler (2)', ... (başlık satırı her sayfada tekrarlanır).
+    """
+    ad = sayfa_adi(ad)
+    if len(df) <= maks_satir:
+        yield ad, df
+        return
+    for k, bas in enumerate(range(0, len(df), maks_satir), 1):
+        yield (ad if k == 1 else f"{ad[:25]} ({k})"), df.iloc[bas:bas + maks_satir]
+
+
+def _kolon_degerleri(seri):
+    """Yazıcıya gidecek Python değerleri; NaN/NaT boş hücre (None) olur."""
+    degerler = seri.to_numpy(dtype=object, copy=True)
+    bos = pd.isna(degerler)
+    if bos.any():
+        degerler[bos] = None
+    return degerler
+
+
+def _satirlar(df):
+    return zip(*(_kolon_degerleri(df.iloc[:, i]) for i in range(df.shape[1])))
+
+
+def _xlsxwriter_yaz(hedef, sayfalar):
+    import xlsxwriter
+
+    # constant_memory: satırlar yazıldıkça diske akar, bellek sayfa boyundan bağımsızdır
+    wb = xlsxwriter.Workbook(hedef, {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    })
+    kalin = wb.add_format({'bold': True})
+    baslik = wb.add_format()
+    for ad, df in sayfalar.items():
+        for parca_adi, parca in sayfa_parcalari(ad, df):
+            ws = wb.add_worksheet(parca_adi)
+            if not len(parca.columns):
+                continue
+            # Biçim ve genişlik kolon bazında; hücreler biçimsiz yazılıp kolonunkini alır
+            for i, kolon in enumerate(parca.columns):
+                ws.set_column(i, i, KOLON_GENISLIGI, kalin if kolon in KALIN_KOLONLAR else None)
+            ws.write_row(0, 0, [str(c) for c in parca.columns], baslik)
+            for r, satir in enumerate(_satirlar(parca), 1):
+                ws.write_row(r, 0, satir)
+    wb.close()
+
+
+def _openpyxl_yaz(hedef, sayfalar):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    # write_only: satırlar XML'e akar, hücre nesneleri bellekte tutulmaz
+    wb = Workbook(write_only=True)
+    kalin = Font(bold=True)
+    for ad, df in sayfalar.items():
+        for parca_adi, parca in sayfa_parcalari(ad, df):
+            ws = wb.create_sheet(parca_adi)
+            for i in range(len(parca.columns)):
+                ws.column_dimensions[get_column_letter(i + 1)].width = KOLON_GENISLIGI
+            if not len(parca.columns):
+                continue
+            kalin_kolon = [c in KALIN_KOLONLAR for c in parca.columns]
+            ws.append([str(c) for c in parca.columns])
+            for satir in _satirlar(parca):
+                hucreler = list(satir)
+                for i, k in enumerate(kalin_kolon):
+                    if k and hucreler[i] is not None:
+                        hucreler[i] = WriteOnlyCell(ws, value=hucreler[i])
+                        hucreler[i].font = kalin
+                ws.append(hucreler)
+    wb.save(hedef)
+
+
+def excel_yaz(hedef, sayfalar, motor=None):
+    """
+    {sayfa adı: DataFrame} → Excel. hedef: dosya yolu veya BytesIO.
+    motor: "xlsxwriter" (kuruluysa varsayılan, constant_memory) / "openpyxl" (write_only).
+    """
+    motor = motor or ("xlsxwriter" if xlsxwriter_var_mi() else "openpyxl")
+    (_xlsxwriter_yaz if motor == "xlsxwriter" else _openpyxl_yaz)(hedef, sayfalar)
+
+
+def excel_indir_coklu(dfs_dict):
+    output = io.BytesIO()
+    excel_yaz(output, dfs_dict)
+    return output.getvalue()
+
+
+def excel_indir_tek_sayfa(dfs_dict):
+    """Tüm tablolar 'Kategori' kolonuyla alt alta, tek sayfada (tek concat)."""
+    output = io.BytesIO()
+    parcalar = [df.assign(Kategori=category)[["Kategori", *df.columns]]
+                for category, df in dfs_dict.items() if not df.empty]
+    master_df = pd.concat(parcalar, ignore_index=True) if parcalar else pd.DataFrame()
+    excel_yaz(output, {'Tum_Mutabakat_Verisi': master_df})
+    return output.getvalue()
+
+
+def sonuc_izi(tablolar):
+    """
+    Sonuç kümesinin parmak izi (tablo adları, kolonlar, dtype'lar ve
+    değerler). Analiz bittiğinde bir kez hesaplanır; indirme baytları bu
+    ize göre önbelleklenir.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for ad, df in tablolar.items():
+        h.update(repr((ad, list(df.columns), [str(t) for t in df.dtypes], df.shape)).encode("utf-8"))
+        if len(df) and len(df.columns):
+            h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+RAPOR_TURLERI = {
+    "coklu": excel_indir_coklu,
+    "tek": excel_indir_tek_sayfa,
+}
+
+_rapor_onbellegi = OrderedDict()  # (iz, tür) → bayt
+_rapor_kilidi = threading.Lock()
+RAPOR_ONBELLEK_ADET = 4
+
+
+def rapor_baytlari(iz, tur, sayfalar):
+    """
+    İstendiğinde üretilen, ize göre önbelleklenmiş rapor baytları. Aynı
+    sonuç için ikinci istek (başka bir rerun ya da oturum) yeniden yazmaz.
+    """
+    anahtar = (iz, tur)
+    with _rapor_kilidi:
+        if anahtar in _rapor_onbellegi:
+            _rapor_onbellegi.move_to_end(anahtar)
+            return _rapor_onbellegi[anahtar]
+    veri = RAPOR_TURLERI[tur](sayfalar)
+    with _rapor_kilidi:
+        _rapor_onbellegi[anahtar] = veri
+        while len(_rapor_onbellegi) > RAPOR_ONBELLEK_ADET:
+            _rapor_onbellegi.popitem(last=False)
+    return veri
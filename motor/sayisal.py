@@ -0,0 +1,171 @@
+"""
+Tutar kolonlarının toplu (kolon bazlı) sayıya çevrilmesi.
+
+`_to_float` / `_num` hücre hücre çalışan referans fonksiyonlardır.
+`tutar_serisi_cevir` aynı sonucu tüm Series üzerinde maske ve `str`
+accessor işlemleriyle üretir; sadece çevrilemeyen (nadir) hücreler için
+skaler yola düşer ve kaç hücrenin çevrilemediğini raporlar.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _num(x):
+   """NaN, None, boş string vs. ne gelirse gelsin güvenli şekilde float'a çevir, boşsa 0 yap."""
+   try:
+       if x is None:
+           return 0.0
+       if isinstance(x, str):
+           s = x.strip().replace(",", ".")
+           if s == "":
+               return 0.0
+           return float(s)
+       # pandas NaN kontrolü
+       if pd.isna(x):
+           return 0.0
+       return float(x)
+   except:
+       return 0.0
+
+def _to_float(val):
+    """
+    NaN, None, boş string, karışık tip vs. ne gelirse gelsin
+    güvenli şekilde float'a çevirir. Boş ise 0 döner.
+    """
+    try:
+        if isinstance(val, (pd.Series, list, tuple)):
+            val = val.iloc[0] if hasattr(val, "iloc") else val[0]
+    except Exception:
+        pass
+
+    # pandas NaN kontrolü
+    try:
+        if pd.isna(val):
+            return 0.0
+    except Exception:
+        pass
+
+    if val is None:
+        return 0.0
+
+    if isinstance(val, str):
+        s = val.strip()
+        if s == "":
+            return 0.0
+        # 1.000,50 → 1000.50 dönüştürme
+        s = s.replace(".", "").replace(",", ".")
+        try:
+            return float(s)
+        except Exception:
+            return 0.0
+
+    try:
+        return float(val)
+    except Exception:
+        return 0.0
+
+
+def _float_dizisi(degerler):
+    """
+    object dizisini float64'e çevirir; (sonuç, çevrilemeyen_maske) döner.
+
+    numpy'nin object → float64 dönüşümü her eleman için Python `float()`
+    kullanır, yani skaler yol ile bit bit aynı sonucu verir. Dizinin tamamı
+    temizse tek adımda biter; değilse şüpheli elemanlar `pd.to_numeric`
+    ile bulunup sadece onlar tek tek denenir ("nan", "1_000" gibi
+    `float()`'un kabul ettiği ama to_numeric'in reddettiği yazımlar dahil).
+    """
+    n = len(degerler)
+    hatali = np.zeros(n, dtype=bool)
+    if n == 0:
+        return np.zeros(0), hatali
+    try:
+        return degerler.astype(np.float64), hatali
+    except (ValueError, TypeError):
+        pass
+
+    sonuc = np.zeros(n)
+    supheli = pd.isna(pd.to_numeric(pd.Series(degerler, dtype=object), errors='coerce')).to_numpy()
+    try:
+        sonuc[~supheli] = degerler[~supheli].astype(np.float64)
+    except (ValueError, TypeError):
+        supheli[:] = True
+
+    for i in np.flatnonzero(supheli):
+        try:
+            sonuc[i] = float(degerler[i])
+        except Exception:
+            hatali[i] = True
+    return sonuc, hatali
+
+
+def tutar_serisi_cevir(seri, binlik_nokta=True):
+    """
+    Bir tutar kolonunu toplu olarak float'a çevirir.
+
+    binlik_nokta=True  → `_to_float` ile aynı ("1.000,50" → 1000.50)
+    binlik_nokta=False → `_num` ile aynı ("1,5" → 1.5, nokta ondalık kalır)
+
+    Dönüş: (float Series, çevrilemeyen hücre sayısı). Boş / NaN hücreler
+    hata sayılmaz, sessizce 0.0 olur; çevrilemeyenler de 0.0 olur ama
+    sayılır.
+    """
+    seri = pd.Series(seri)
+    n = len(seri)
+
+    # Saf sayısal kolon (int, float, bool, nullable): maske ile NaN → 0
+    if pd.api.types.is_numeric_dtype(seri) or pd.api.types.is_bool_dtype(seri):
+        sonuc = seri.to_numpy(dtype=np.float64, na_value=np.nan)
+        sonuc = np.where(np.isnan(sonuc), 0.0, sonuc)
+        return pd.Series(sonuc, index=seri.index, dtype=np.float64), 0
+
+    degerler = seri.to_numpy(dtype=object)
+    bos = pd.isna(seri).to_numpy()
+    sonuc = np.zeros(n)
+    hatali = np.zeros(n, dtype=bool)
+
+    tip = pd.api.types.infer_dtype(seri, skipna=True)
+    if tip in ('string', 'empty'):
+        metin = ~bos
+    elif tip in ('floating', 'integer', 'mixed-integer-float', 'boolean', 'decimal'):
+        metin = np.zeros(n, dtype=bool)
+    else:
+        # Karışık kolon (Excel'de sayı + metin birlikte): sadece tip maskesi hücre bazlı
+        metin = seri.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+
+    # --- Metin hücreleri: str accessor ile toplu temizlik ---
+    if metin.any():
+        # Orijinal dtype korunur: pyarrow destekli string kolonlarda işlemler C'de kalır
+        s = seri[metin]
+        if s.dtype != object and not pd.api.types.is_string_dtype(s):
+            s = s.astype(object)
+        s = s.str.strip()
+        dolu = s.ne("").to_numpy()
+        if binlik_nokta:
+            s = s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        else:
+            s = s.str.replace(",", ".", regex=False)
+        ara = np.zeros(len(s))
+        ara_hata = np.zeros(len(s), dtype=bool)
+        ara[dolu], ara_hata[dolu] = _float_dizisi(s.to_numpy(dtype=object)[dolu])
+        sonuc[metin] = ara
+        hatali[metin] = ara_hata
+
+    # --- Metin olmayan dolu hücreler (int/float/Decimal/tarih/liste...) ---
+    diger = ~bos & ~metin
+    if diger.any():
+        idx = np.flatnonzero(diger)
+        try:
+            sonuc[idx] = degerler[idx].astype(np.float64)
+        except (ValueError, TypeError):
+            # Tarih, liste vb. nadir hücreler: referans skaler fonksiyona bırak
+            ref = _to_float if binlik_nokta else _num
+            for i in idx:
+                v = degerler[i]
+                try:
+                    sonuc[i] = float(v)
+                except Exception:
+                    sonuc[i] = ref(v)
+                    hatali[i] = sonuc[i] == 0.0
+
+    return pd.Series(sonuc, index=seri.index, dtype=np.float64), int(hatali.sum())
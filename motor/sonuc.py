@@ -0,0 +1,173 @@
+"""
+Sonuç tablolarının (Eşleşenler / Bizde Var / Onlarda Var) kolon bazlı
+kurulması.
+
+Eskiden her satır `iterrows()` ile bir dict'e çevriliyor, tarihler
+`safe_strftime` ile tek tek yazılıyor ve eşleşmeyenler Python set'leri
+üzerinden ayıklanıyordu. Buradaki fonksiyonlar aynı şemayı ve kolon
+sırasını koruyarak tabloyu doğrudan kolonlardan üretir.
+"""
+import numpy as np
+import pandas as pd
+
+from motor.sayisal import tutar_serisi_cevir
+
+
+def safe_strftime(val):
+    if isinstance(val, (pd.Series, list, tuple)):
+        val = val.iloc[0] if hasattr(val, 'iloc') else val[0]
+    if pd.isna(val):
+        return ""
+    try:
+        return val.strftime('%d.%m.%Y')
+    except:
+        return ""
+
+
+def tarih_metni(seri):
+    """`safe_strftime`'ın kolon hali: 'gg.aa.yyyy', boş/NaT → ""."""
+    seri = pd.Series(seri)
+    if pd.api.types.is_datetime64_any_dtype(seri):
+        return seri.dt.strftime('%d.%m.%Y').astype(object).fillna("")
+    return seri.map(safe_strftime).astype(object)
+
+
+def metin_kolonu(seri):
+    """Satır bazlı `str(deger)` ile aynı sonucu verir (NaN → 'nan')."""
+    return pd.Series(seri).astype(object).map(str)
+
+
+def durum_kolonu(degerler):
+    """Durum kolonu kategorik tutulur (birkaç farklı değer, çok satır)."""
+    return pd.Categorical(degerler)
+
+
+def sabit_durum(adet, durum):
+    return pd.Categorical.from_codes(np.zeros(adet, dtype=np.int8), [durum])
+
+
+def durum_kategorik(df):
+    """Birleştirmede kategorileri farklı parçalar object'e döner; Durum'u yeniden kategorik yapar."""
+    if "Durum" in df.columns and not isinstance(df["Durum"].dtype, pd.CategoricalDtype):
+        df["Durum"] = df["Durum"].astype("category")
+    return df
+
+
+def _ek_kolonlar(df, kolonlar, onek, sonek):
+    """
+    Rapora eklenecek kolonlar: 'BİZ: x' / 'KARŞI: x'. merge sonrası iki
+    tarafta da olan kolon sonekli ('x_Biz') gelir, yoksa adıyla aranır;
+    hiç yoksa boş metin yazılır. Hazırlık bu kolonları ham haliyle taşır;
+    metne burada, sadece rapordaki satırlar için çevrilir.
+    """
+    sonuc = {}
+    for c in kolonlar:
+        ad = c + sonek if sonek and c + sonek in df.columns else c
+        if ad in df.columns:
+            sonuc[f"{onek}: {c}"] = metin_kolonu(df[ad].astype(str)).to_numpy()
+        else:
+            sonuc[f"{onek}: {c}"] = np.full(len(df), "", dtype=object)
+    return sonuc
+
+
+def eslesen_tablosu(merged, tutarlar, doviz_raporda, ex_biz, ex_onlar):
+    """
+    Eşleşenler tablosu. `tutarlar`, `fatura_tutarlari(merged, rol_kodu)`
+    sonucudur (aynı index).
+    """
+    if merged.empty:
+        return pd.DataFrame()
+
+    fark = tutarlar["Fark"].to_numpy()
+    tutar_esit = np.abs(fark) < 1
+    durum = np.where(tutar_esit, "✅ Tam Eşleşme", "❌ Tutar Farkı")
+    benzer = "Benzerlik" in merged.columns
+    if benzer:
+        # İkinci geçişte (motor/benzer.py) benzer belge no ile eşleşen satırlar
+        benzer_satir = merged["Benzerlik"].notna().to_numpy()
+        durum = np.where(benzer_satir, np.where(tutar_esit, "🟠 Benzer Belge No", "🟠 Benzer Belge No (Tutar Farkı)"),
+                         durum)
+    kolonlar = {
+        "Durum": durum_kolonu(durum),
+        "Belge No": merged["Orijinal_Belge_No_Biz"].to_numpy(),
+    }
+    if "Kural" in merged.columns:
+        # Çifti bulan kademe kuralı (motor/kademe.py)
+        kolonlar["Kural"] = merged["Kural"].to_numpy()
+    if benzer:
+        kolonlar["Belge No (Onlar)"] = merged["Orijinal_Belge_No_Onlar"].to_numpy()
+        kolonlar["Benzerlik"] = merged["Benzerlik"].to_numpy()
+    kolonlar.update({
+        "Tarih (Biz)": tarih_metni(merged["Tarih_Biz"]).to_numpy(),
+        "Tarih (Onlar)": tarih_metni(merged["Tarih_Onlar"]).to_numpy(),
+        "Tutar (Biz)": tutarlar["Tutar (Biz)"].to_numpy(),
+        "Tutar (Onlar)": tutarlar["Tutar (Onlar)"].to_numpy(),
+        "Fark (TL)": fark,
+    })
+
+    if doviz_raporda:
+        def doviz(ad):
+            if ad in merged.columns:
+                return tutar_serisi_cevir(merged[ad])[0].to_numpy()
+            return np.zeros(len(merged))
+
+        dv_biz = doviz("Doviz_Tutari_Biz")
+        dv_onlar = doviz("Doviz_Tutari_Onlar")
+        kolonlar["PB"] = merged["Para_Birimi_Biz"].to_numpy()
+        kolonlar["Döviz (Biz)"] = dv_biz
+        kolonlar["Döviz (Onlar)"] = dv_onlar
+        kolonlar["Fark (Döviz)"] = dv_biz - dv_onlar
+
+    kolonlar.update(_ek_kolonlar(merged, ex_biz, "BİZ", "_Biz"))
+    kolonlar.update(_ek_kolonlar(merged, ex_onlar, "KARŞI", "_Onlar"))
+    return pd.DataFrame(kolonlar)
+
+
+def _eslesmeyenler(grp, eslesen_idx, durum, tutar_adi, ex_cols, onek):
+    """grp içinde unique_idx'i eşleşenlerde olmayan satırlar (anti-join)."""
+    if grp.empty or "unique_idx" not in grp.columns:
+        return pd.DataFrame()
+    kalan = grp[~grp["unique_idx"].isin(eslesen_idx)]
+    if kalan.empty:
+        return pd.DataFrame()
+
+    kolonlar = {
+        "Durum": sabit_durum(len(kalan), durum),
+        "Belge No": kalan["Orijinal_Belge_No"].to_numpy(),
+        "Tarih": tarih_metni(kalan["Tarih"]).to_numpy(),
+        tutar_adi: (kalan["Borc"] - kalan["Alacak"]).to_numpy(),
+    }
+    kolonlar.update(_ek_kolonlar(kalan, ex_cols, onek, None))
+    return pd.DataFrame(kolonlar)
+
+
+def _eslesen_idx(merged, ad):
+    if ad in merged.columns:
+        return merged[ad]
+    return pd.Series([], dtype=object)
+
+
+def bizde_var_tablosu(grp_biz, merged, ex_biz):
+    """Bizde olup eşleşmeyen faturalar ("🔴 Bizde Var")."""
+    return _eslesmeyenler(grp_biz, _eslesen_idx(merged, "unique_idx_Biz"),
+                          "🔴 Bizde Var", "Tutar (Biz)", ex_biz, "BİZ")
+
+
+def onlarda_var_tablosu(grp_onlar, merged, ex_onlar):
+    """Karşı tarafta olup eşleşmeyen faturalar ("🔵 Onlarda Var")."""
+    return _eslesmeyenler(grp_onlar, _eslesen_idx(merged, "unique_idx_Onlar"),
+                          "🔵 Onlarda Var", "Tutar (Onlar)", ex_onlar, "KARŞI")
+
+
+def tablolari_birlestir(*tablolar):
+    """
+    Parça tabloları tek concat ile alt alta ekler. Satırı olmayan parçalar
+    atlanır; kolon sırası, eskiden dict listesinden DataFrame kurulurken
+    olduğu gibi ilk görülme sırasıdır.
+    """
+    dolu = [t for t in tablolar if len(t)]
+    if not dolu:
+        return pd.DataFrame()
+    if len(dolu) == 1:
+        return dolu[0].reset_index(drop=True)
+    return durum_kategorik(pd.concat(dolu, ignore_index=True, sort=False))
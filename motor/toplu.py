@@ -0,0 +1,232 @@
+"""
+Toplu mutabakat: tek şirket defteri ↔ çok sayıda cari ekstresi.
+
+Bizim defter bir kez okunur ve `hazirla`'dan bir kez geçer, sonra cari
+kodu kolonuna göre bölünür. Her cari dosyası kendi bölümüyle ayrı bir
+süreçte eşleştirilir; okuma, gruplama, eşleştirme ve rapor yazımı
+işçide yapıldığı için iş çekirdek sayısıyla ölçeklenir. Ana süreç sadece
+her cari için özet satırını toplar.
+
+Kullanım:
+    python -m motor.toplu biz.xlsx ekstreler/ --ayarlar kolonlar.json --cari-kolon "Cari Kod" \\
+        --cikti raporlar/ [--is-sayisi 8]
+
+Cari dosyasının kodu dosya adından (uzantısız) alınır; ayar dosyasında
+"dosya_cari": {"ABC Ltd ekstre.xlsx": "120.01.005"} ile açıkça verilebilir.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+
+import pandas as pd
+
+from motor.artimli import MutabakatDeposu, artimli_mutabakat
+from motor.benzer import benzer_ayarlari
+from motor.dagitim import dagitim_ayarlari
+from motor.kademe import kademe_kurallari
+from motor.cli import ROLLER, defter_oku, karsi_rol, taraf_ayarlari
+from motor.mutabakat import hazir_mutabakat, hazirla
+from motor.okuyucular import DESTEKLENEN_UZANTILAR
+from motor.rapor import excel_yaz, rapor_sayfalari
+
+TOPLU_OZET_KOLONLARI = ['Cari', 'Dosya', 'Durum', 'Para_Birimi', 'Biz_Bakiye', 'Onlar_Bakiye',
+                        'Kümüle_Fark', 'Eşleşen', 'Bizde Var', 'Onlarda Var', 'Ödeme', 'Süre (sn)']
+
+
+def cari_kodu(deger):
+    """Cari kodlarının karşılaştırma biçimi: boşluksuz, büyük harf."""
+    return str(deger).strip().upper()
+
+
+def guvenli_dosya_adi(ad):
+    return re.sub(r'[\\/*?:"<>|]', '-', str(ad)).strip() or "_"
+
+
+def cari_dosyalari(yollar, dosya_cari=None):
+    """Verilen dosya/klasörlerden {cari kodu: dosya yolu}."""
+    dosya_cari = {os.path.basename(k): v for k, v in (dosya_cari or {}).items()}
+    uzantilar = {"." + u for u in DESTEKLENEN_UZANTILAR}
+    dosyalar = []
+    for yol in yollar:
+        if os.path.isdir(yol):
+            dosyalar.extend(os.path.join(yol, ad) for ad in sorted(os.listdir(yol))
+                            if os.path.splitext(ad)[1].lower() in uzantilar and not ad.startswith("~$"))
+        else:
+            dosyalar.append(yol)
+
+    sonuc = {}
+    for dosya in dosyalar:
+        ad = os.path.basename(dosya)
+        kod = cari_kodu(dosya_cari.get(ad, os.path.splitext(ad)[0]))
+        if kod in sonuc:
+            raise ValueError(f"Aynı cari koduna iki dosya düştü: {sonuc[kod]} / {dosya}")
+        sonuc[kod] = dosya
+    return sonuc
+
+
+def _kategorileri_daralt(df):
+    """Bölümler işçiye gönderilir; ana defterin bütün Match_ID kategorilerini taşımasınlar."""
+    kategorik = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    return df.assign(**{c: df[c].cat.remove_unused_categories() for c in kategorik}) if kategorik else df
+
+
+def carilere_bol(biz, cari_kolon):
+    """Hazırlanmış defteri cari koduna göre {kod: HazirlikSonucu} olarak böler."""
+    ham_kod = biz.ham[cari_kolon].map(cari_kodu)
+    odeme_kod = biz.odemeler[cari_kolon].map(cari_kodu)
+    odeme_gruplari = {kod: _kategorileri_daralt(p) for kod, p in biz.odemeler.groupby(odeme_kod, sort=False)}
+    bos_odeme = _kategorileri_daralt(biz.odemeler.iloc[0:0])
+    return {
+        kod: replace(biz, ham=_kategorileri_daralt(ham), odemeler=odeme_gruplari.get(kod, bos_odeme))
+        for kod, ham in biz.ham.groupby(ham_kod, sort=False)
+    }
+
+
+def _bakiye_satirlari(ozet):
+    """Özetin her para birimi için son (kümüle) satırı."""
+    if ozet.empty:
+        return ozet
+    return ozet.groupby('Para_Birimi', sort=True).tail(1)
+
+
+def cari_mutabakati(kod, dosya, biz, config, cikti_klasoru):
+    """
+    İşçi süreçte çalışır: cari dosyasını okur, kendi bölümüyle eşleştirir,
+    raporu yazar ve toplu özet satır(lar)ını döner.
+    """
+    t0 = time.perf_counter()
+    satir = {'Cari': kod, 'Dosya': os.path.basename(dosya)}
+    try:
+        df_onlar = defter_oku([dosya], config['onlar'], config['ex_onlar'], config['okuma'])
+        onlar = hazirla(df_onlar, config['onlar'], "Onlar", config['ex_onlar'], hesap=biz.hesap)
+        if config.get('depo'):
+            tablolar = artimli_mutabakat(
+                biz, onlar, config['rol_kodu'], MutabakatDeposu(config['depo']), kod,
+                ayarlar=config['ayarlar'], tolerans=config['tolerans'], gun_penceresi=config['gun_penceresi'],
+                benzer=config.get('benzer'), dagitim=config.get('dagitim'), kurallar=config.get('kurallar'),
+            ).tablolar()
+        else:
+            tablolar = hazir_mutabakat(biz, onlar, config['rol_kodu'], tolerans=config['tolerans'],
+                                       gun_penceresi=config['gun_penceresi'], benzer=config.get('benzer'),
+                                       dagitim=config.get('dagitim'), kurallar=config.get('kurallar')).tablolar()
+        excel_yaz(os.path.join(cikti_klasoru, f"{guvenli_dosya_adi(kod)}.xlsx"), rapor_sayfalari(tablolar))
+    except Exception as e:
+        satir.update({'Durum': f"Hata: {e}", 'Süre (sn)': round(time.perf_counter() - t0, 2)})
+        return [satir]
+
+    satir.update({
+        'Durum': "Tamam" if len(biz.ham) else "Bizde kayıt yok",
+        'Eşleşen': len(tablolar['eslesen']),
+        'Bizde Var': len(tablolar['un_biz']),
+        'Onlarda Var': len(tablolar['un_onlar']),
+        'Ödeme': len(tablolar['odeme']),
+        'Süre (sn)': round(time.perf_counter() - t0, 2),
+    })
+    bakiyeler = _bakiye_satirlari(tablolar['ozet'])
+    if bakiyeler.empty:
+        return [satir]
+    return [dict(satir, **b) for b in
+            bakiyeler[['Para_Birimi', 'Biz_Bakiye', 'Onlar_Bakiye', 'Kümüle_Fark']].to_dict('records')]
+
+
+def toplu_mutabakat(df_biz, config_biz, ex_biz, cari_kolon, dosyalar, config_onlar, ex_onlar,
+                    rol_kodu, cikti_klasoru, tolerans=0.0, gun_penceresi=None, okuma=None,
+                    is_sayisi=None, ilerleme=None, depo=None, benzer=None, dagitim=None, kurallar=None,
+                    hesap="pandas"):
+    """
+    dosyalar: {cari kodu: dosya yolu}. Her cari için `cikti_klasoru/<kod>.xlsx`
+    yazılır; dönüş, cari bazında Kümüle_Fark özet tablosudur. Defterimizde
+    olup dosyası verilmeyen cariler "Dosya yok" satırıyla listelenir.
+    depo (SQLite yolu) verilirse her cari artımlı çalıştırılır. benzer:
+    BenzerAyarlari (motor/benzer.py); verilirse benzer belge no geçişi açılır.
+    dagitim: DagitimAyarlari (motor/dagitim.py); verilirse toplu ödeme dağıtımı yapılır.
+    kurallar: fatura eşleştirme kademesi (motor/kademe.py); None → Match_ID, sonra Belge No.
+    hesap: 'pandas' | 'polars' hesap motoru (motor/polars_motoru.py).
+    """
+    if cari_kolon not in df_biz.columns:
+        raise KeyError(f"Cari kolonu bulunamadı: {cari_kolon}")
+    os.makedirs(cikti_klasoru, exist_ok=True)
+
+    # Cari kolonu bölmek için hazırlıktan geçirilir ama rapora eklenmez
+    biz = hazirla(df_biz, config_biz, "Biz", list(ex_biz) + [cari_kolon], hesap=hesap)
+    biz = replace(biz, ekstra=list(ex_biz))
+    bolumler = carilere_bol(biz, cari_kolon)
+    bos_biz = replace(biz, ham=biz.ham.iloc[0:0], odemeler=biz.odemeler.iloc[0:0])
+
+    config = {'onlar': config_onlar, 'ex_onlar': list(ex_onlar), 'okuma': okuma or {},
+              'rol_kodu': rol_kodu, 'tolerans': tolerans, 'gun_penceresi': gun_penceresi,
+              'benzer': benzer, 'dagitim': dagitim, 'kurallar': kurallar, 'depo': depo, 'ayarlar': {'biz': config_biz, 'onlar': config_onlar, 'cari_kolon': cari_kolon}}
+    if depo:
+        MutabakatDeposu(depo)  # şema işçiler başlamadan bir kez kurulsun
+    satirlar = [{'Cari': kod, 'Dosya': "", 'Durum': "Dosya yok"}
+                for kod in bolumler if kod not in dosyalar]
+
+    with ProcessPoolExecutor(max_workers=is_sayisi) as havuz:
+        isler = {
+            havuz.submit(cari_mutabakati, kod, dosya, bolumler.get(kod, bos_biz), config, cikti_klasoru): kod
+            for kod, dosya in dosyalar.items()
+        }
+        for i, is_ in enumerate(as_completed(isler), 1):
+            satirlar.extend(is_.result())
+            if ilerleme:
+                ilerleme(i, len(isler), isler[is_])
+
+    ozet = pd.DataFrame(satirlar).reindex(columns=TOPLU_OZET_KOLONLARI)
+    return ozet.sort_values(['Cari', 'Para_Birimi'], na_position='first', ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m motor.toplu",
+                                     description="Tek defter ↔ çok sayıda cari ekstresi (paralel)")
+    parser.add_argument("biz", help="Bizim defter")
+    parser.add_argument("onlar", nargs="+", help="Cari ekstre dosyaları veya klasör(ler)")
+    parser.add_argument("--ayarlar", required=True, help="Kolon eşleştirme JSON dosyası (python -m motor ile aynı)")
+    parser.add_argument("--cari-kolon", help="Bizim defterde cari kodu kolonu (ayarlarda 'cari_kolon' da olabilir)")
+    parser.add_argument("--cikti", default="raporlar", help="Raporların yazılacağı klasör")
+    parser.add_argument("--is-sayisi", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument("--depo", help="Artımlı çalıştırma deposu (SQLite); cari bazında sadece değişenler eşleştirilir")
+    args = parser.parse_args(argv)
+
+    with open(args.ayarlar, "r", encoding="utf-8") as f:
+        ayarlar = json.load(f)
+    rol_kodu = ayarlar.get('rol', "Biz Alıcıyız")
+    if rol_kodu not in ROLLER:
+        parser.error(f"Geçersiz rol: {rol_kodu!r} (beklenen: {' / '.join(ROLLER)})")
+    cari_kolon = args.cari_kolon or ayarlar.get('cari_kolon')
+    if not cari_kolon:
+        parser.error("--cari-kolon verilmeli")
+
+    cf1, ex_biz = taraf_ayarlari(ayarlar.get('biz', {}), rol_kodu)
+    cf2, ex_onlar = taraf_ayarlari(ayarlar.get('onlar', {}), karsi_rol(rol_kodu))
+    dosyalar = cari_dosyalari(args.onlar, ayarlar.get('dosya_cari'))
+
+    start = time.time()
+    d1 = defter_oku([args.biz], cf1, list(ex_biz) + [cari_kolon], ayarlar.get('okuma'))
+    print(f"Bizim defter: {len(d1)} satır, {len(dosyalar)} cari dosyası")
+
+    ozet = toplu_mutabakat(
+        d1, cf1, ex_biz, cari_kolon, dosyalar, cf2, ex_onlar, rol_kodu, args.cikti,
+        tolerans=float(ayarlar.get('odeme_toleransi', 0.0)),
+        gun_penceresi=int(ayarlar.get('valor_penceresi', 0)) or None,
+        okuma=ayarlar.get('okuma'), is_sayisi=args.is_sayisi, depo=args.depo,
+        benzer=benzer_ayarlari(ayarlar.get('benzer_belge')),
+        dagitim=dagitim_ayarlari(ayarlar.get('toplu_odeme')),
+        kurallar=kademe_kurallari(ayarlar.get('eslestirme_kurallari')),
+        hesap=ayarlar.get('hesap_motoru', "pandas"),
+        ilerleme=lambda i, n, kod: print(f"[{i}/{n}] {kod}", file=sys.stderr),
+    )
+    yol = os.path.join(args.cikti, "Toplu_Ozet.xlsx")
+    excel_yaz(yol, {"Cari Özet": ozet})
+
+    hatali = ozet['Durum'].astype(str).str.startswith("Hata").sum()
+    print(f"Özet: {os.path.abspath(yol)} ({time.time() - start:.2f} sn, {hatali} hatalı cari)")
+    return 1 if hatali else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,23 @@
 import streamlit as st
 import pandas as pd
-import re
-import io
 import time
 import warnings
-import json
-import os
+
+from motor.aktarim import BICIMLER, paket_baytlari, parquet_var_mi, tablo_baytlari
+from motor.benzer import BenzerAyarlari
+from motor.dagitim import DagitimAyarlari
+from motor.gorunum import (SAYFA_BOYLARI, TARIH_KOLONLARI, TUTAR_KOLONLARI, Filtre, TabloGorunumu,
+                           sayfa_sayisi, sayfa_stili)
+from motor.hazirlik import EKSTRA_GRUPLAMALARI
+from motor.kademe import KURAL_ADLARI, VARSAYILAN_KURALLAR, kurallari_yaz
+from motor.kolon_hafizasi import KolonHafizasi
+from motor.mutabakat import mutabakat_yap
+from motor.okuma import (ONIZLEME_SATIR, baslik_oku, dosyalari_oku, gerekli_kolonlar, kolonlari_oku,
+                         okuma_bilgisi_metni, secili_kolonlar, sema_farklari, sema_farki_metni)
+from motor.okuyucular import DESTEKLENEN_UZANTILAR, MOTORLAR, calamine_var_mi
+from motor.olcum import PERFORMANS_LOG, Olcum
+from motor.polars_motoru import HESAP_MOTORLARI, polars_var_mi
+from motor.rapor import rapor_baytlari, rapor_sayfalari, sonuc_izi
 
 # Uyarıları gizle
 warnings.filterwarnings("ignore")
@@ -18,28 +30,12 @@ if 'analiz_yapildi' not in st.session_state:
 if 'sonuclar' not in st.session_state:
     st.session_state['sonuclar'] = {}
 
-CONFIG_FILE = "ayarlar.json"
-
-def ayarlari_yukle():
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def ayarlari_kaydet(yeni_ayarlar):
-    mevcut = ayarlari_yukle()
-    mevcut.update(yeni_ayarlar)
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(mevcut, f, ensure_ascii=False, indent=4)
-    except:
-        pass
-
-if 'column_prefs' not in st.session_state:
-    st.session_state['column_prefs'] = ayarlari_yukle()
+# Kolon seçimleri başlık düzenine göre hatırlanır (bkz. motor/kolon_hafizasi.py)
+@st.cache_resource
+def kolon_hafizasi():
+    hafiza = KolonHafizasi()
+    hafiza.eski_ayarlari_aktar()
+    return hafiza
 
 hide_st_style = """
             <style>
@@ -55,11 +51,10 @@ st.markdown(hide_st_style, unsafe_allow_html=True)
 
 # --- 2. YARDIMCI FONKSİYONLAR ---
 
-def get_smart_index(options, target_name, filename, key_suffix):
-    if filename in st.session_state['column_prefs']:
-        saved_col = st.session_state['column_prefs'][filename].get(key_suffix)
-        if saved_col in options:
-            return options.index(saved_col)
+def get_smart_index(options, target_name, prefs, key_suffix):
+    saved_col = prefs.get(key_suffix)
+    if saved_col in options:
+        return options.index(saved_col)
     for i, opt in enumerate(options):
         if str(opt).strip().lower() == target_name.lower():
             return i
@@ -73,386 +68,19 @@ def get_default_multiselect(options, targets):
                 defaults.append(opt)
     return list(set(defaults))
 
-@st.cache_data
-def belge_no_temizle(val):
-    if isinstance(val, (pd.Series, list, tuple)):
-        val = val.iloc[0] if hasattr(val, 'iloc') else val[0]
-    if pd.isna(val):
-        return ""
-    s = str(val)
-    res = ''.join(filter(str.isdigit, s))
-    if res:
-        return str(int(res))
-    return ""
-
-@st.cache_data
-def referans_no_temizle(val):
-    if pd.isna(val):
-        return ""
-
-    s = str(val).strip()
-
-    # Tamamen boşsa ödeme değil
-    if s == "":
-        return ""
-
-    # Sayı bulmaya çalış ama bulamazsan da string'i olduğu gibi kabul et
-    digits = re.sub(r'\D', '', s)
-
-    # Eğer içinde hiç rakam yoksa yine de referans kabul et
-    if digits == "":
-        return s.upper()
-
-    return digits  # Rakamlar varsa bunlar Payment_ID olur
-
-def safe_strftime(val):
-    if isinstance(val, (pd.Series, list, tuple)):
-        val = val.iloc[0] if hasattr(val, 'iloc') else val[0]
-    if pd.isna(val):
-        return ""
-    try:
-        return val.strftime('%d.%m.%Y')
-    except:
-        return ""
-
-def apply_excel_styles(writer, sheet_name, df):
-    from openpyxl.styles import Font
-    try:
-        worksheet = writer.sheets[sheet_name]
-        bold_cols = ['Biz_Bakiye', 'Onlar_Bakiye', 'Kümüle_Fark', 'Durum', 'Fark (TL)']
-        header = [cell.value for cell in worksheet[1]]
-        for col_idx, col_name in enumerate(header, 1):
-            column_letter = worksheet.cell(row=1, column=col_idx).column_letter
-            worksheet.column_dimensions[column_letter].width = 20
-            if col_name in bold_cols:
-                col_letter = worksheet.cell(row=1, column=col_idx).column_letter
-                for cell in worksheet[col_letter]:
-                    if cell.row > 1:
-                        cell.font = Font(bold=True)
-    except:
-        pass
-
-def excel_indir_coklu(dfs_dict):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        for sheet_name, df in dfs_dict.items():
-            safe_name = re.sub(r'[\\/*?:\[\]]', '-', str(sheet_name))[:30]
-            df.to_excel(writer, index=False, sheet_name=safe_name)
-            apply_excel_styles(writer, safe_name, df)
-    return output.getvalue()
-
-def excel_indir_tek_sayfa(dfs_dict):
-    output = io.BytesIO()
-    master_df = pd.DataFrame()
-    for category, df in dfs_dict.items():
-        if not df.empty:
-            df_temp = df.copy()
-            df_temp.insert(0, "Kategori", category)
-            master_df = pd.concat([master_df, df_temp], ignore_index=True)
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        master_df.to_excel(writer, index=False, sheet_name='Tum_Mutabakat_Verisi')
-        apply_excel_styles(writer, 'Tum_Mutabakat_Verisi', master_df)
-    return output.getvalue()
-
-def ozet_rapor_olustur(df_biz_raw, df_onlar_raw):
-    biz = df_biz_raw.copy()
-    biz['Yil_Ay'] = biz['Tarih'].dt.to_period('M')
-    biz['Net'] = biz['Borc'] - biz['Alacak']
-    grp_biz = biz.groupby(['Para_Birimi', 'Yil_Ay'])[['Borc', 'Alacak', 'Net']].sum().reset_index()
-    grp_biz.columns = ['Para_Birimi', 'Yil_Ay', 'Biz_Borc', 'Biz_Alacak', 'Biz_Net']
-    
-    onlar = df_onlar_raw.copy()
-    onlar['Yil_Ay'] = onlar['Tarih'].dt.to_period('M')
-    onlar['Net'] = onlar['Borc'] - onlar['Alacak']
-    grp_onlar = onlar.groupby(['Para_Birimi', 'Yil_Ay'])[['Borc', 'Alacak', 'Net']].sum().reset_index()
-    grp_onlar.columns = ['Para_Birimi', 'Yil_Ay', 'Onlar_Borc', 'Onlar_Alacak', 'Onlar_Net']
-    
-    ozet = pd.merge(grp_biz, grp_onlar, on=['Para_Birimi', 'Yil_Ay'], how='outer').fillna(0)
-    ozet = ozet.sort_values(['Para_Birimi', 'Yil_Ay'])
-    
-    ozet['Biz_Bakiye'] = ozet.groupby('Para_Birimi')['Biz_Net'].cumsum()
-    ozet['Onlar_Bakiye'] = ozet.groupby('Para_Birimi')['Onlar_Net'].cumsum()
-    ozet['Kümüle_Fark'] = ozet['Biz_Bakiye'] + ozet['Onlar_Bakiye']
-    
-    ozet['Yil_Ay'] = ozet['Yil_Ay'].astype(str)
-    cols = ['Para_Birimi', 'Yil_Ay', 'Biz_Borc', 'Biz_Alacak', 'Biz_Bakiye', 
-            'Onlar_Borc', 'Onlar_Alacak', 'Onlar_Bakiye', 'Kümüle_Fark']
-    return ozet[cols]
-
-def veri_hazirla(df, config, taraf_adi, extra_cols=None):
-    if extra_cols is None:
-        extra_cols = []
-
-    # Aynı isimli kolonları temizle
-    df = df.loc[:, ~df.columns.duplicated()]
-    df_copy = df.copy()
-
-    # --- 1) Ana tablo (fatura + ödeme karışık) ---
-    df_new = pd.DataFrame()
-
-    # Extra kolonlar
-    for col in extra_cols:
-        if col in df_copy.columns:
-            df_new[col] = df_copy[col].astype(str)
-
-    # Tarihler
-    df_new['Tarih'] = pd.to_datetime(df_copy[config['tarih_col']], dayfirst=True, errors='coerce')
+GRUPLAMA_ADLARI = {"first": "İlk değer", "last": "Son değer", "join": "Birleştir", "count": "Adet"}
 
-    if config.get('tarih_odeme_col') and config['tarih_odeme_col'] != "Seçiniz...":
-        df_new['Tarih_Odeme'] = pd.to_datetime(
-            df_copy[config['tarih_odeme_col']], dayfirst=True, errors='coerce'
-        )
-    else:
-        df_new['Tarih_Odeme'] = df_new['Tarih']
-
-    # Belge No / Match_ID
-    base = df_copy[config['belge_col']].astype(str)
-
-    # Boş / NaN / "nan" olanları tespit et
-    mask_empty = base.isna() | base.str.strip().eq("") | base.str.strip().str.lower().eq("nan")
-
-    # Eğer başka bir "Referans / Reference" kolonu varsa, boşları onunla doldur
-    alt_ref_cols = [c for c in df_copy.columns
-                    if c != config['belge_col'] and re.search(r'ref|referans', str(c), re.IGNORECASE)]
-    
-    if alt_ref_cols:
-        alt = df_copy[alt_ref_cols[0]].astype(str)
-        base = base.where(~mask_empty, alt)
-
-    df_new['Orijinal_Belge_No'] = base
-
-    df_new['Match_ID'] = df_new['Orijinal_Belge_No'].apply(
-        lambda x: ''.join(filter(str.isdigit, str(x)))
-    )
-    df_new['Match_ID'] = df_new['Match_ID'].replace(r'^0+', '', regex=True)
-
-    # Payment_ID (Ödeme Ref / Dekont)
-    if config.get('odeme_ref_col') and config['odeme_ref_col'] != "Seçiniz...":
-        df_new['Payment_ID'] = df_copy[config['odeme_ref_col']].apply(referans_no_temizle)
-    else:
-        df_new['Payment_ID'] = ""
-
-    df_new['Kaynak'] = taraf_adi
-
-    # Döviz
-    doviz_aktif = False
-    if config.get('doviz_cinsi_col') and config['doviz_cinsi_col'] != "Seçiniz...":
-        df_new['Para_Birimi'] = df_copy[config['doviz_cinsi_col']].astype(str).str.upper().str.strip()
-        df_new['Para_Birimi'] = df_new['Para_Birimi'].replace({'TL': 'TRY', 'TRL': 'TRY'})
-        doviz_aktif = True
-    else:
-        df_new['Para_Birimi'] = "TRY"
-
-    if config.get('doviz_tutar_col') and config['doviz_tutar_col'] != "Seçiniz...":
-        df_new['Doviz_Tutari'] = pd.to_numeric(
-            df_copy[config['doviz_tutar_col']], errors='coerce'
-        ).fillna(0).abs()
-        doviz_aktif = True
-    else:
-        df_new['Doviz_Tutari'] = 0.0
-
-        # Tutar
-    if "Tek Kolon" in config.get('tutar_tipi', ''):
-        col_name = config['tutar_col']
-
-        # Virgüllü, noktalı, string her şeyi güvenli çevir
-        ham = df_copy[col_name].apply(_to_float)
-        rol = config.get('rol_kodu', 'Biz Alıcıyız')
-
-        if rol == "Biz Alıcıyız":
-            df_new['Borc'] = ham.where(ham > 0, 0)
-            df_new['Alacak'] = ham.where(ham < 0, 0).abs()
-        else:
-            df_new['Alacak'] = ham.where(ham > 0, 0)
-            df_new['Borc'] = ham.where(ham < 0, 0).abs()
-
-    else:
-        # Ayrı kolonlar da aynı şekilde güvenli parse edilsin
-        df_new['Borc']   = df_copy[config['borc_col']].apply(_to_float)
-        df_new['Alacak'] = df_copy[config['alacak_col']].apply(_to_float)
-
-    # --- 2) Ödeme satırlarını ayır ---
-    # Ödeme = Payment_ID dolu satırlar
-    df_pay_final = df_new[df_new['Payment_ID'] != ""].copy()
-    df_pay_final['unique_idx'] = df_pay_final.index  # ödeme eşleştirmede kullanılıyor
-
-    # Fatura tarafı için (raw_biz/raw_onlar) df_new aynen dönüyor
-    return df_new, df_pay_final, doviz_aktif
-
-def grupla(df, is_doviz_aktif):
-    if df.empty:
-        return df
-    mask_ids = df['Match_ID'] != ""
-    df_ids = df[mask_ids]
-    df_noids = df[~mask_ids]
-    
-    if df_ids.empty:
-        return df_noids
-    
-    agg_rules = {
-        'Tarih': 'first', 'Tarih_Odeme': 'first', 'Orijinal_Belge_No': 'first', 
-        'Payment_ID': 'first', 'Kaynak': 'first', 'Borc': 'sum', 'Alacak': 'sum', 
-        'Para_Birimi': 'first'
-    }
-    for col in df.columns:
-        if col not in agg_rules and col not in ['Match_ID', 'unique_idx', 'Doviz_Tutari']:
-            agg_rules[col] = 'first'
-            
-    if is_doviz_aktif:
-        def get_real_fx(sub):
-            nt = sub[~sub['Para_Birimi'].isin(['TRY', 'TL'])]
-            if not nt.empty:
-                return nt['Doviz_Tutari'].sum()
-            return 0.0
-        
-        cols_needed = ['Match_ID', 'Para_Birimi', 'Doviz_Tutari']
-        df_sub = df_ids[cols_needed].copy()
-        
-        df_grp = df_ids.groupby('Match_ID', as_index=False).agg(agg_rules)
-        df_grp = df_grp.set_index('Match_ID')
-        df_grp['Doviz_Tutari'] = df_sub.groupby('Match_ID').apply(get_real_fx)
-        df_grp = df_grp.reset_index()
-    else:
-        df_grp = df_ids.groupby('Match_ID', as_index=False).agg(agg_rules)
-        df_grp['Doviz_Tutari'] = 0.0
-        
-    final = pd.concat([df_grp, df_noids], ignore_index=True)
-    final['unique_idx'] = final.index
-    return final
-def _num(x):
-   """NaN, None, boş string vs. ne gelirse gelsin güvenli şekilde float'a çevir, boşsa 0 yap."""
-   try:
-       if x is None:
-           return 0.0
-       if isinstance(x, str):
-           s = x.strip().replace(",", ".")
-           if s == "":
-               return 0.0
-           return float(s)
-       # pandas NaN kontrolü
-       if pd.isna(x):
-           return 0.0
-       return float(x)
-   except:
-       return 0.0
-
-def _to_float(val):
-    """
-    NaN, None, boş string, karışık tip vs. ne gelirse gelsin
-    güvenli şekilde float'a çevirir. Boş ise 0 döner.
-    """
-    try:
-        if isinstance(val, (pd.Series, list, tuple)):
-            val = val.iloc[0] if hasattr(val, "iloc") else val[0]
-    except Exception:
-        pass
-
-    # pandas NaN kontrolü
-    try:
-        if pd.isna(val):
-            return 0.0
-    except Exception:
-        pass
-
-    if val is None:
-        return 0.0
-
-    if isinstance(val, str):
-        s = val.strip()
-        if s == "":
-            return 0.0
-        # 1.000,50 → 1000.50 dönüştürme
-        s = s.replace(".", "").replace(",", ".")
-        try:
-            return float(s)
-        except Exception:
-            return 0.0
-
-    try:
-        return float(val)
-    except Exception:
-        return 0.0
-
-def hesap_fatura_tutar(m, rol_kodu):
-    """
-    Biz Alıcı / Biz Satıcı rolüne göre:
-      - Önce çapraz senaryoları dener (normal + iade)
-      - Çapraz işe yaramazsa paralel senaryolara bakar (Borc-Borc, Alacak-Alacak)
-      - En düşük mutlak farka sahip senaryonun tutarlarını döner.
-    """
-
-    # Değerleri güvenli al
-    bb = _to_float(m.get("Borc_Biz", 0))      # Biz Borç
-    ba = _to_float(m.get("Alacak_Biz", 0))    # Biz Alacak
-    ob = _to_float(m.get("Borc_Onlar", 0))    # Onlar Borç
-    oa = _to_float(m.get("Alacak_Onlar", 0))  # Onlar Alacak
-
-    cross_scenarios = []
-
-    # --- ROL TEMELLİ ÇAPRAZ SENARYOLAR ---
-
-    if rol_kodu == "Biz Alıcıyız":
-        # Normal: Biz Alacak, Onlar Borç
-        cross_scenarios.append(("normal_BizAlacak_OnlarBorc", ba, ob))
-        # İade: Biz Borç, Onlar Alacak
-        cross_scenarios.append(("iade_BizBorc_OnlarAlacak", bb, oa))
-    else:
-        # Biz Satıcıyız
-        # Normal: Biz Borç, Onlar Alacak
-        cross_scenarios.append(("normal_BizBorc_OnlarAlacak", bb, oa))
-        # İade: Biz Alacak, Onlar Borç
-        cross_scenarios.append(("iade_BizAlacak_OnlarBorc", ba, ob))
-
-    # --- PARALEL SENARYOLAR (işaret / kolon kayması için) ---
-    parallel_scenarios = [
-        ("parallel_Borc_Borc", bb, ob),
-        ("parallel_Alacak_Alacak", ba, oa),
-    ]
-
-    def with_diff(scenarios):
-        out = []
-        for name, my_amt, their_amt in scenarios:
-            diff = their_amt - my_amt
-            out.append({
-                "name": name,
-                "biz": my_amt,
-                "onlar": their_amt,
-                "diff": diff
-            })
-        return out
-
-    cross = with_diff(cross_scenarios)
-    parallel = with_diff(parallel_scenarios)
-
-    def both_nonzero(s):
-        return abs(s["biz"]) > 0.001 and abs(s["onlar"]) > 0.001
-
-    def any_nonzero(s):
-        return abs(s["biz"]) > 0.001 or abs(s["onlar"]) > 0.001
-
-    # 1) Önce rol kuralına uygun ÇAPRAZ senaryolarda iki tarafı da dolu olanlara bak
-    cross_both = [s for s in cross if both_nonzero(s)]
-    if cross_both:
-        best = min(cross_both, key=lambda x: abs(x["diff"]))
-        return best["biz"], best["onlar"], best["diff"]
-
-    # 2) Çaprazlar işe yaramadıysa, PARALEL senaryolarda (Borc-Borc / Alacak-Alacak)
-    #    iki tarafı da dolu olanlara bak (Vodafone iade örneğin burada yakalanıyor)
-    parallel_both = [s for s in parallel if both_nonzero(s)]
-    if parallel_both:
-        best = min(parallel_both, key=lambda x: abs(x["diff"]))
-        return best["biz"], best["onlar"], best["diff"]
-
-    # 3) Hâlâ yoksa, tüm senaryolar içinde en az bir tarafı dolu olanlardan
-    #    farkı en küçük olanı seç (çok edge case)
-    all_scenarios = cross + parallel
-    any_filled = [s for s in all_scenarios if any_nonzero(s)]
-    if any_filled:
-        best = min(any_filled, key=lambda x: abs(x["diff"]))
-        return best["biz"], best["onlar"], best["diff"]
-
-    # 4) Gerçekten tamamen boş satır
-    return 0.0, 0.0, 0.0
+def ekstra_gruplama_sec(kolonlar, key):
+    """Aynı belge no'lu satırlar toplanırken ek sütunların nasıl birleşeceği (varsayılan: ilk değer)."""
+    secim = {}
+    if kolonlar:
+        with st.expander("Eklenen sütunların gruplanması"):
+            for c in kolonlar:
+                kural = st.selectbox(str(c), EKSTRA_GRUPLAMALARI, format_func=GRUPLAMA_ADLARI.get,
+                                     key=f"{key}_{c}")
+                if kural != "first":
+                    secim[c] = kural
+    return secim
 
 # --- 3. ARAYÜZ ---
 c_title, c_settings = st.columns([2, 1])
@@ -463,33 +91,52 @@ with c_settings:
 
 rol_kodu = "Biz Alıcıyız" if "Alıcıyız" in rol_secimi else "Biz Satıcıyız"
 
+with st.expander("⚙️ Okuma ve Hesap Ayarları"):
+    o1, o2, o3 = st.columns(3)
+    okuma_secenekleri = {
+        'motor': o1.selectbox("Excel Okuyucu", MOTORLAR, index=0, key="okuma_motor",
+                              help="Otomatik: calamine kuruluysa o, değilse openpyxl akış modu"),
+        'tum_sayfalar': o2.checkbox("Tüm sayfaları tek deftere birleştir", key="tum_sayfalar"),
+    }
+    if okuma_secenekleri['motor'] == "calamine" and not calamine_var_mi():
+        st.warning("python-calamine kurulu değil (pip install python-calamine); Otomatik seçin.")
+    hesap_motoru = o3.selectbox("Hesap Motoru", HESAP_MOTORLARI, index=0, key="hesap_motoru",
+                                help="polars: anahtar normalizasyonu ve metin birleştirme Polars ile "
+                                     "(sonuç aynı, büyük dosyalarda daha hızlı)")
+    if hesap_motoru == "polars" and not polars_var_mi():
+        st.warning("polars kurulu değil (pip install polars); pandas kullanılacak.")
+
 st.divider()
 col1, col2 = st.columns(2)
 
 # SOL
 with col1:
     st.subheader("🏢 Bizim Kayıtlar")
-    f1 = st.file_uploader("Dosya", type=["xlsx", "xls"], key="f1")
+    f1 = st.file_uploader("Dosya", type=DESTEKLENEN_UZANTILAR, key="f1")
     cf1 = {'rol_kodu': rol_kodu}
     ex_biz = [] 
     if f1:
-        d1 = pd.read_excel(f1)
+        # Sadece başlık + örnek satırlar; tam okuma Başlat'ta
+        d1, okuma1 = baslik_oku(f1, **okuma_secenekleri)
+        st.caption(okuma_bilgisi_metni(okuma1))
         d1 = d1.loc[:, ~d1.columns.duplicated()]
         cl1 = ["Seçiniz..."] + d1.columns.tolist()
-        f_name1 = f1.name
+        with st.expander("Önizleme"):
+            st.dataframe(d1, use_container_width=True)
+        prefs1 = kolon_hafizasi().bul("biz", d1.columns, f1.name)
         
-        def_tarih = get_smart_index(cl1, "Tarih", f_name1, 'tarih_col')
-        def_belge = get_smart_index(cl1, "Belge No", f_name1, 'belge_col')
-        def_tutar = get_smart_index(cl1, "Tutar", f_name1, 'tutar_col')
-        def_pb = get_smart_index(cl1, "PB", f_name1, 'doviz_cinsi_col')
-        def_dt = get_smart_index(cl1, "Döviz", f_name1, 'doviz_tutar_col')
+        def_tarih = get_smart_index(cl1, "Tarih", prefs1, 'tarih_col')
+        def_belge = get_smart_index(cl1, "Belge No", prefs1, 'belge_col')
+        def_tutar = get_smart_index(cl1, "Tutar", prefs1, 'tutar_col')
+        def_pb = get_smart_index(cl1, "PB", prefs1, 'doviz_cinsi_col')
+        def_dt = get_smart_index(cl1, "Döviz", prefs1, 'doviz_tutar_col')
 
         cf1['tarih_col'] = st.selectbox("Tarih", cl1, index=def_tarih, key="d1")
         cf1['belge_col'] = st.selectbox("Belge No (Eşleşme Anahtarı)", cl1, index=def_belge, key="doc1")
         
         st.info("📅 Ödeme / Referans (Opsiyonel)")
-        def_pod = get_smart_index(cl1, "Ödeme Tarihi", f_name1, 'tarih_odeme_col')
-        def_ref = get_smart_index(cl1, "Referans", f_name1, 'odeme_ref_col')
+        def_pod = get_smart_index(cl1, "Ödeme Tarihi", prefs1, 'tarih_odeme_col')
+        def_ref = get_smart_index(cl1, "Referans", prefs1, 'odeme_ref_col')
         cf1['tarih_odeme_col'] = st.selectbox("Ödeme Tarihi (Valör)", cl1, index=def_pod, key="pd1")
         cf1['odeme_ref_col'] = st.selectbox("Ödeme Ref / Dekont No", cl1, index=def_ref, key="pref1")
         
@@ -499,40 +146,47 @@ with col1:
         if ty1 == "Tek":
             cf1['tutar_col'] = st.selectbox("Tutar", cl1, index=def_tutar, key="amt1")
         else:
-            def_b = get_smart_index(cl1, "Borç", f_name1, 'borc_col')
-            def_a = get_smart_index(cl1, "Alacak", f_name1, 'alacak_col')
+            def_b = get_smart_index(cl1, "Borç", prefs1, 'borc_col')
+            def_a = get_smart_index(cl1, "Alacak", prefs1, 'alacak_col')
             cf1['borc_col'] = st.selectbox("Borç", cl1, index=def_b, key="b1")
             cf1['alacak_col'] = st.selectbox("Alacak", cl1, index=def_a, key="a1")
         c3, c4 = st.columns(2)
         cf1['doviz_cinsi_col'] = c3.selectbox("PB", cl1, index=def_pb, key="cur1")
         cf1['doviz_tutar_col'] = c4.selectbox("Döviz Tutar", cl1, index=def_dt, key="cur_amt1")
         ex_biz = st.multiselect("Rapora Eklenecek Sütunlar (Biz):", options=d1.columns.tolist(), key="multi1")
+        cf1['ekstra_gruplama'] = ekstra_gruplama_sec(ex_biz, "grp1")
 
 # SAĞ
 with col2:
     st.subheader("🏭 Karşı Taraf")
-    f2 = st.file_uploader("Dosya", type=["xlsx", "xls"], accept_multiple_files=True, key="f2")
+    f2 = st.file_uploader("Dosya", type=DESTEKLENEN_UZANTILAR, accept_multiple_files=True, key="f2")
     # Biz alıcıysak karşı taraf satıcı, biz satıcıysak karşı taraf alıcı gibi davranacak
     cf2 = {
         'rol_kodu': "Biz Satıcıyız" if rol_kodu == "Biz Alıcıyız" else "Biz Alıcıyız"
     }
     ex_onlar = []
     if f2:
-        dfs = [pd.read_excel(f) for f in f2]
-        d2 = pd.concat(dfs, ignore_index=True)
+        # Birden çok dosya tek deftere birleşir; satırın dosyası KAYNAK_KOLONU'nda
+        d2, okumalar2 = dosyalari_oku(f2, nrows=ONIZLEME_SATIR, **okuma_secenekleri)
+        for okuma2 in okumalar2:
+            st.caption(okuma_bilgisi_metni(okuma2))
+        for ad, fark in sema_farklari({o['dosya']: o['kolonlar'] for o in okumalar2}).items():
+            st.warning(sema_farki_metni(ad, fark, okumalar2[0]['dosya']))
         d2 = d2.loc[:, ~d2.columns.duplicated()]
         cl2 = ["Seçiniz..."] + d2.columns.tolist()
-        f_name2 = "merged_files" if len(f2) > 1 else f2[0].name
+        with st.expander("Önizleme"):
+            st.dataframe(d2, use_container_width=True)
+        prefs2 = kolon_hafizasi().bul("onlar", d2.columns, "merged_files" if len(f2) > 1 else f2[0].name)
         
-        def_tarih2 = get_smart_index(cl2, "Tarih", f_name2, 'tarih_col')
-        def_belge2 = get_smart_index(cl2, "Fatura No", f_name2, 'belge_col')
+        def_tarih2 = get_smart_index(cl2, "Tarih", prefs2, 'tarih_col')
+        def_belge2 = get_smart_index(cl2, "Fatura No", prefs2, 'belge_col')
         
         cf2['tarih_col'] = st.selectbox("Tarih", cl2, index=def_tarih2, key="d2")
         cf2['belge_col'] = st.selectbox("Belge No (Eşleşme Anahtarı)", cl2, index=def_belge2, key="doc2")
         
         st.info("📅 Ödeme / Referans (Opsiyonel)")
-        def_pod2 = get_smart_index(cl2, "Ödeme Tarihi", f_name2, 'tarih_odeme_col')
-        def_ref2 = get_smart_index(cl2, "Referans", f_name2, 'odeme_ref_col')
+        def_pod2 = get_smart_index(cl2, "Ödeme Tarihi", prefs2, 'tarih_odeme_col')
+        def_ref2 = get_smart_index(cl2, "Referans", prefs2, 'odeme_ref_col')
         cf2['tarih_odeme_col'] = st.selectbox("Ödeme Tarihi (Valör)", cl2, index=def_pod2, key="pd2")
         cf2['odeme_ref_col'] = st.selectbox("Ödeme Ref / Dekont No", cl2, index=def_ref2, key="pref2")
         
@@ -540,22 +194,66 @@ with col2:
         ty2 = st.radio("Tip", ["Ayrı", "Tek"], index=0, key="r2", horizontal=True)
         cf2['tutar_tipi'] = "Tek Kolon" if ty2 == "Tek" else "Ayrı Kolonlar"
         if ty2 == "Tek":
-            def_amt2 = get_smart_index(cl2, "Tutar", f_name2, 'tutar_col')
+            def_amt2 = get_smart_index(cl2, "Tutar", prefs2, 'tutar_col')
             cf2['tutar_col'] = st.selectbox("Tutar", cl2, index=def_amt2, key="amt2")
         else:
-            def_b2 = get_smart_index(cl2, "Borç", f_name2, 'borc_col')
-            def_a2 = get_smart_index(cl2, "Alacak", f_name2, 'alacak_col')
+            def_b2 = get_smart_index(cl2, "Borç", prefs2, 'borc_col')
+            def_a2 = get_smart_index(cl2, "Alacak", prefs2, 'alacak_col')
             cf2['borc_col'] = st.selectbox("Borç", cl2, index=def_b2, key="b2")
             cf2['alacak_col'] = st.selectbox("Alacak", cl2, index=def_a2, key="a2")
             
         c3, c4 = st.columns(2)
-        def_pb2 = get_smart_index(cl2, "PB", f_name2, 'doviz_cinsi_col')
-        def_dt2 = get_smart_index(cl2, "Döviz", f_name2, 'doviz_tutar_col')
+        def_pb2 = get_smart_index(cl2, "PB", prefs2, 'doviz_cinsi_col')
+        def_dt2 = get_smart_index(cl2, "Döviz", prefs2, 'doviz_tutar_col')
         cf2['doviz_cinsi_col'] = c3.selectbox("PB", cl2, index=def_pb2, key="cur2")
         cf2['doviz_tutar_col'] = c4.selectbox("Döviz Tutar", cl2, index=def_dt2, key="cur_amt2")
         ex_onlar = st.multiselect("Rapora Eklenecek Sütunlar (Karşı):", options=d2.columns.tolist(), key="multi2")
+        cf2['ekstra_gruplama'] = ekstra_gruplama_sec(ex_onlar, "grp2")
 
 st.divider()
+c_tol, c_valor, c_benzer = st.columns(3)
+odeme_toleransi = c_tol.number_input(
+    "Ödeme Tutar Toleransı", min_value=0.0, value=0.0, step=0.01, format="%.2f", key="pay_tol"
+)
+valor_penceresi = c_valor.number_input(
+    "Valör Penceresi (gün, 0 = sınırsız)", min_value=0, value=0, step=1, key="pay_win"
+)
+benzer_belge = c_benzer.checkbox(
+    "Benzer Belge No Eşleştir", value=False, key="fuzzy_doc",
+    help="Tam eşleşmeyen faturalar belge no benzerliği, tutar ve tarih yakınlığı ile ikinci kez eşleştirilir."
+)
+toplu_odeme = c_benzer.checkbox(
+    "Toplu Ödeme Dağıtımı", value=False, key="pay_alloc",
+    help="1'e 1 eşleşmeyen ödemeler, karşı taraftaki birden çok ödemenin toplamıyla eşleştirilir (7 gün valör penceresi)."
+)
+
+# Fatura eşleştirme kademesi: seçim sırası geçiş sırasıdır; bizim dosyanın kolon ayarlarıyla saklanır
+kayitli_kurallar = prefs1.get('eslestirme_kurallari') if f1 else None
+kayitli_kurallar = {(k if isinstance(k, str) else k['tur']): ({} if isinstance(k, str) else k)
+                    for k in kayitli_kurallar or VARSAYILAN_KURALLAR}
+with st.expander("🔀 Eşleştirme Kademesi"):
+    kural_turleri = [t for t in KURAL_ADLARI if t != "benzer"]
+    secilen_kurallar = st.multiselect(
+        "Kurallar (seçim sırasıyla uygulanır)", kural_turleri,
+        default=[t for t in kayitli_kurallar if t in kural_turleri], format_func=KURAL_ADLARI.get, key="match_rules",
+        help="Her kural, önceki kurallarda eşleşmeyen faturalara uygulanır. Boş bırakılırsa Match_ID, sonra Belge No."
+    )
+    eslestirme_kurallari = []
+    for tur in secilen_kurallar:
+        kural = {"tur": tur}
+        if tur == "tutar_tarih":
+            kural["gun"] = st.number_input("Tutar + Tarih: gün penceresi", min_value=0, step=1, key="rule_days",
+                                           value=int(kayitli_kurallar.get(tur, {}).get("gun", 3)))
+        elif tur == "aciklama":
+            ortak_ekstra = [c for c in ex_biz if c in ex_onlar]
+            if not ortak_ekstra:
+                st.caption("Açıklama kuralı için aynı adlı bir sütunu iki tarafta da rapora ekleyin.")
+                continue
+            kayitli_kolon = kayitli_kurallar.get(tur, {}).get("kolon")
+            kural["kolon"] = st.selectbox("Açıklama sütunu", ortak_ekstra, key="rule_col",
+                                          index=ortak_ekstra.index(kayitli_kolon) if kayitli_kolon in ortak_ekstra else 0)
+        eslestirme_kurallari.append(kural)
+    eslestirme_kurallari = kurallari_yaz(eslestirme_kurallari)
 st.divider()
 
 # --- 4. ANALİZ MOTORU ---
@@ -569,8 +267,8 @@ if st.button("🚀 Başlat", type="primary", use_container_width=True):
                          'doviz_cinsi_col', 'doviz_tutar_col', 'tarih_odeme_col', 'odeme_ref_col']:
                     if v and v != "Seçiniz...":
                         prefs[k] = v
-            st.session_state['column_prefs'][f1.name] = prefs
-            ayarlari_kaydet({f1.name: prefs})
+            prefs['eslestirme_kurallari'] = eslestirme_kurallari
+            kolon_hafizasi().kaydet("biz", d1.columns, f1.name, prefs)
             
         f_name_right = "merged_files" if len(f2) > 1 else f2[0].name
         if f_name_right:
@@ -580,266 +278,58 @@ if st.button("🚀 Başlat", type="primary", use_container_width=True):
                          'doviz_cinsi_col', 'doviz_tutar_col', 'tarih_odeme_col', 'odeme_ref_col']:
                     if v and v != "Seçiniz...":
                         prefs[k] = v
-            st.session_state['column_prefs'][f_name_right] = prefs
-            ayarlari_kaydet({f_name_right: prefs})
+            kolon_hafizasi().kaydet("onlar", d2.columns, f_name_right, prefs)
 
         try:
             start = time.time()
+            olcum = Olcum(biz_dosyasi=f1.name, onlar_dosyalari=[f.name for f in f2],
+                          okuma_motoru=okuma_secenekleri['motor'], hesap_motoru=hesap_motoru, rol=rol_kodu)
             with st.spinner('İşleniyor...'):
-                # 1. HAZIRLIK – 4 argüman (df, config, taraf, extra_cols)
-                raw_biz, pay_biz, dv_biz = veri_hazirla(d1, cf1, "Biz", ex_biz)
-                grp_biz = grupla(raw_biz, dv_biz)
-
-                raw_onlar, pay_onlar, dv_onlar = veri_hazirla(d2, cf2, "Onlar", ex_onlar)
-                grp_onlar = grupla(raw_onlar, dv_onlar)
-
-                # Döviz raporda kullanılacak mı?
-                doviz_raporda = dv_biz or dv_onlar
-
-                # ÖZET
-                all_biz = pd.concat([raw_biz, pay_biz]) if not pay_biz.empty else raw_biz
-                all_onlar = pd.concat([raw_onlar, pay_onlar]) if not pay_onlar.empty else raw_onlar
-                df_ozet = ozet_rapor_olustur(all_biz, all_onlar)
-
-                # =========================================================
-                #  FATURA / BELGE EŞLEŞTİRME (EŞLEŞENLER)
-                # =========================================================
-
-                # Önce Match_ID kontrolü
-                grp_biz["Match_ID"] = grp_biz["Match_ID"].fillna("").astype(str)
-                grp_onlar["Match_ID"] = grp_onlar["Match_ID"].fillna("").astype(str)
-
-                biz_mid_nonempty = grp_biz["Match_ID"].ne("").sum()
-                onlar_mid_nonempty = grp_onlar["Match_ID"].ne("").sum()
-
-                eslesenler = []
-                eslesen_odeme = []
-                un_biz = []
-                un_onlar = []
-
-                # ------- 1) DEFAULT: Match_ID ile eşleştirme -------
-
-                if biz_mid_nonempty > 0 and onlar_mid_nonempty > 0:
-                    ortak_mid = set(grp_biz.loc[grp_biz["Match_ID"] != "", "Match_ID"]) & \
-                                set(grp_onlar.loc[grp_onlar["Match_ID"] != "", "Match_ID"])
-
-                    st.caption(
-                        f"[Match_ID] Biz (boş olmayan): {biz_mid_nonempty} | "
-                        f"Onlar (boş olmayan): {onlar_mid_nonempty} | "
-                        f"Ortak Match_ID sayısı: {len(ortak_mid)}"
-                    )
-
-                    biz_m = grp_biz[grp_biz["Match_ID"].isin(ortak_mid)].copy()
-                    onlar_m = grp_onlar[grp_onlar["Match_ID"].isin(ortak_mid)].copy()
-
-                    merged = biz_m.merge(
-                        onlar_m,
-                        on="Match_ID",
-                        how="inner",
-                        suffixes=("_Biz", "_Onlar")
-                    )
-
-                else:
-                    # ------- 2) FALLBACK: Orijinal_Belge_No ile eşleştirme -------
-                    grp_biz["Merge_Key"] = grp_biz["Orijinal_Belge_No"].astype(str).str.upper().str.strip().str.replace(" ", "", regex=False)
-                    grp_onlar["Merge_Key"] = grp_onlar["Orijinal_Belge_No"].astype(str).str.upper().str.strip().str.replace(" ", "", regex=False)
-
-                    biz_key_nonempty = grp_biz["Merge_Key"].ne("").sum()
-                    onlar_key_nonempty = grp_onlar["Merge_Key"].ne("").sum()
-                    ortak_key = set(grp_biz.loc[grp_biz["Merge_Key"] != "", "Merge_Key"]) & \
-                                set(grp_onlar.loc[grp_onlar["Merge_Key"] != "", "Merge_Key"])
-
-                    st.caption(
-                        f"[Fallback: Orijinal_Belge_No] Biz (boş olmayan): {biz_key_nonempty} | "
-                        f"Onlar (boş olmayan): {onlar_key_nonempty} | "
-                        f"Ortak Belge No sayısı: {len(ortak_key)}"
-                    )
-
-                    biz_m = grp_biz[grp_biz["Merge_Key"].isin(ortak_key)].copy()
-                    onlar_m = grp_onlar[grp_onlar["Merge_Key"].isin(ortak_key)].copy()
-
-                    merged = biz_m.merge(
-                        onlar_m,
-                        on="Merge_Key",
-                        how="inner",
-                        suffixes=("_Biz", "_Onlar")
-                    )
-
-                matched_biz_idx = set()
-                matched_onlar_idx = set()
-
-                # Eğer merged tamamen boşsa bile, aşağıda "Bizde Var / Onlarda Var" yine dolacak
-                for _, m in merged.iterrows():
-                    # Rol kuralına göre tutarları seç
-                    my_amt, their_amt, real_diff = hesap_fatura_tutar(m, rol_kodu)
-
-                    status = "✅ Tam Eşleşme" if abs(real_diff) < 1 else "❌ Tutar Farkı"
-
-                    d = {
-                        "Durum": status,
-                        "Belge No": m["Orijinal_Belge_No_Biz"],
-                        "Tarih (Biz)": safe_strftime(m["Tarih_Biz"]),
-                        "Tarih (Onlar)": safe_strftime(m["Tarih_Onlar"]),
-                        "Tutar (Biz)": my_amt,
-                        "Tutar (Onlar)": their_amt,
-                        "Fark (TL)": real_diff,
-                    }
-
-                    if doviz_raporda:
-                        dv_biz_val = _to_float(m.get("Doviz_Tutari_Biz"))
-                        dv_onlar_val = _to_float(m.get("Doviz_Tutari_Onlar"))
-                        d["PB"] = m["Para_Birimi_Biz"]
-                        d["Döviz (Biz)"] = dv_biz_val
-                        d["Döviz (Onlar)"] = dv_onlar_val
-                        d["Fark (Döviz)"] = dv_biz_val - dv_onlar_val
-
-                    # Ekstra kolonlar (Biz)
-                    for c in ex_biz:
-                        col_biz = c + "_Biz" if c + "_Biz" in m.index else c
-                        d[f"BİZ: {c}"] = str(m.get(col_biz, ""))
-
-                    # Ekstra kolonlar (Karşı)
-                    for c in ex_onlar:
-                        col_on = c + "_Onlar" if c + "_Onlar" in m.index else c
-                        d[f"KARŞI: {c}"] = str(m.get(col_on, ""))
-
-                    eslesenler.append(d)
-                    matched_biz_idx.add(m["unique_idx_Biz"])
-                    matched_onlar_idx.add(m["unique_idx_Onlar"])
-
-
-                # --------- BİZDE VAR (FATURA) -----------------
-                for _, row_b in grp_biz.iterrows():
-                    if row_b["unique_idx"] not in matched_biz_idx:
-                        amt = row_b["Borc"] - row_b["Alacak"]
-                        d_un = {
-                            "Durum": "🔴 Bizde Var",
-                            "Belge No": row_b["Orijinal_Belge_No"],
-                            "Tarih": safe_strftime(row_b["Tarih"]),
-                            "Tutar (Biz)": amt,
-                        }
-                        for c in ex_biz:
-                            d_un[f"BİZ: {c}"] = str(row_b.get(c, ""))
-                        un_biz.append(d_un)
-
-                # --------- ONLARDA VAR (FATURA) -----------------
-                for _, row_o in grp_onlar.iterrows():
-                    if row_o["unique_idx"] not in matched_onlar_idx:
-                        amt = row_o["Borc"] - row_o["Alacak"]
-                        d_un = {
-                            "Durum": "🔵 Onlarda Var",
-                            "Belge No": row_o["Orijinal_Belge_No"],
-                            "Tarih": safe_strftime(row_o["Tarih"]),
-                            "Tutar (Onlar)": amt,
-                        }
-                        for c in ex_onlar:
-                            d_un[f"KARŞI: {c}"] = str(row_o.get(c, ""))
-                        un_onlar.append(d_un)
-
-                # =========================================================
-                #  ÖDEME EŞLEŞTİRME (REF / TUTAR / PB)
-                # =========================================================
-                if not pay_biz.empty and not pay_onlar.empty:
-                    dict_onlar_pay_by_ref = {}
-                    dict_onlar_pay_by_amt = {}
-
-                    # Karşı taraf ödemelerini sözlüklere dağıt
-                    for idx, r in pay_onlar.iterrows():
-                        pid = r.get("Payment_ID", "")
-                        amt = abs(r["Borc"] - r["Alacak"])
-                        cur = r.get("Para_Birimi", "TRY")
-
-                        if pid:
-                            dict_onlar_pay_by_ref.setdefault(pid, []).append(idx)
-
-                        dict_onlar_pay_by_amt.setdefault((amt, cur), []).append(idx)
-
-                    used = set()
-                    
-                    # Bizim ödemeleri tek tek eşleştir
-                    for idx, row_p in pay_biz.iterrows():
-                        biz_pid = row_p.get("Payment_ID", "")
-                        biz_amt = abs(row_p["Borc"] - row_p["Alacak"])
-                        biz_cur = row_p.get("Para_Birimi", "TRY")
-
-                        found_idx = None
-
-                        # 1) Öncelik: Ref no eşleşmesi
-                        if biz_pid and biz_pid in dict_onlar_pay_by_ref:
-                            for i in dict_onlar_pay_by_ref[biz_pid]:
-                                if i not in used:
-                                    found_idx = i
-                                    break
-
-                        # 2) Tutar + PB eşleşmesi
-                        if found_idx is None:
-                            key = (biz_amt, biz_cur)
-                            if key in dict_onlar_pay_by_amt:
-                                for i in dict_onlar_pay_by_amt[key]:
-                                    if i not in used:
-                                        found_idx = i
-                                        break
-
-                        # EŞLEŞME BULUNDU
-                        if found_idx is not None:
-                            used.add(found_idx)
-                            row_onlar = pay_onlar.loc[found_idx]
-
-                            onlar_amt = abs(row_onlar["Borc"] - row_onlar["Alacak"])
-                            fark_tl = biz_amt - onlar_amt
-
-                            kayit = {
-                                "Durum": "✅ Ödeme Eşleşti" if abs(fark_tl) < 0.01 else "🟡 Tutar Farkı",
-                                "Ödeme Ref": biz_pid or row_onlar.get("Payment_ID", ""),
-                                "Tarih (Biz)": safe_strftime(row_p.get("Tarih_Odeme", row_p["Tarih"])),
-                                "Tarih (Onlar)": safe_strftime(row_onlar.get("Tarih_Odeme", row_onlar["Tarih"])),
-                                "Tutar (Biz)": biz_amt,
-                                "Tutar (Onlar)": onlar_amt,
-                                "Fark (TL)": fark_tl,
-                                "PB": biz_cur,
-                            }
-
-                            for c in ex_biz:
-                                kayit[f"BİZ: {c}"] = str(row_p.get(c, ""))
-                            for c in ex_onlar:
-                                kayit[f"KARŞI: {c}"] = str(row_onlar.get(c, ""))
-
-                            eslesen_odeme.append(kayit)
-
-                        else:
-                            d_un = {
-                                "Durum": "🔴 Bizde Var (Ödeme)",
-                                "Ödeme Ref": biz_pid,
-                                "Tarih": safe_strftime(row_p.get("Tarih_Odeme", row_p["Tarih"])),
-                                "Tutar": biz_amt,
-                                "PB": biz_cur,
-                            }
-                            for c in ex_biz:
-                                d_un[f"BİZ: {c}"] = str(row_p.get(c, ""))
-                            un_biz.append(d_un)
-
-                    # Karşı taraftaki eşleşmeyen ödemeler
-                    for idx, r in pay_onlar.iterrows():
-                        if idx not in used:
-                            d_un = {
-                                "Durum": "🔵 Onlarda Var (Ödeme)",
-                                "Ödeme Ref": r.get("Payment_ID", ""),
-                                "Tarih": safe_strftime(r.get("Tarih_Odeme", r["Tarih"])),
-                                "Tutar": abs(r["Borc"] - r["Alacak"]),
-                                "PB": r.get("Para_Birimi", "TRY"),
-                            }
-                            for c in ex_onlar:
-                                d_un[f"KARŞI: {c}"] = str(r.get(c, ""))
-                            un_onlar.append(d_un)
+                # 0. TAM OKUMA – sadece eşleştirilen ve rapora eklenecek kolonlar
+                with olcum.asama("okuma") as k:
+                    baslik1 = d1.columns.tolist()
+                    d1, okuma1 = kolonlari_oku(f1, gerekli_kolonlar(cf1, ex_biz, baslik1), **okuma_secenekleri)
+                    d1 = d1.loc[:, ~d1.columns.duplicated()]
+
+                    # Önbellekte olmayan dosyalar paralel ayrıştırılır; eşleştirme kolonu
+                    # eksik dosya varsa hata verilir (satırları NaN ile dolmasın)
+                    d2, _ = dosyalari_oku(
+                        f2, kolonlar=[gerekli_kolonlar(cf2, ex_onlar, o['kolonlar']) for o in okumalar2],
+                        zorunlu=secili_kolonlar(cf2), **okuma_secenekleri)
+                    d2 = d2.loc[:, ~d2.columns.duplicated()]
+                    k["cikti"] = len(d1) + len(d2)
+
+                # 1-4. HAZIRLIK → GRUPLAMA → ÖZET → FATURA / ÖDEME EŞLEŞTİRME
+                sonuc = mutabakat_yap(
+                    d1, cf1, d2, cf2, rol_kodu, ex_biz, ex_onlar,
+                    tolerans=odeme_toleransi,
+                    gun_penceresi=valor_penceresi or None,
+                    olcum=olcum,
+                    benzer=BenzerAyarlari() if benzer_belge else None,
+                    dagitim=DagitimAyarlari() if toplu_odeme else None,
+                    kurallar=eslestirme_kurallari,
+                    hesap=hesap_motoru,
+                )
+                for uyari in sonuc.uyarilar():
+                    st.warning(uyari)
+                st.caption(sonuc.fatura.bilgi_metni())
 
                 # --- SONUÇLARI SESSION'A YAZ ---
-                st.session_state['sonuclar'] = {
-                    "ozet": df_ozet,
-                    "eslesen": pd.DataFrame(eslesenler),
-                    "odeme": pd.DataFrame(eslesen_odeme),
-                    "un_biz": pd.DataFrame(un_biz),
-                    "un_onlar": pd.DataFrame(un_onlar)
+                st.session_state['sonuclar'] = sonuc.tablolar()
+                st.session_state['sonuc_izi'] = sonuc_izi(st.session_state['sonuclar'])
+                # Zip paketinin manifestine yazılır
+                st.session_state['calisma_bilgisi'] = {
+                    'parametreler': {
+                        'rol': rol_kodu, 'odeme_toleransi': odeme_toleransi, 'valor_penceresi': valor_penceresi,
+                        'benzer_belge': benzer_belge, 'toplu_odeme': toplu_odeme,
+                        'eslestirme_kurallari': eslestirme_kurallari, 'hesap_motoru': hesap_motoru,
+                        'biz_dosyasi': f1.name, 'onlar_dosyalari': [f.name for f in f2],
+                        'biz': cf1, 'onlar': cf2, 'ekstra_biz': list(ex_biz), 'ekstra_onlar': list(ex_onlar),
+                    },
+                    'sureler': {k['asama']: k['sure_sn'] for k in olcum.asamalar},
                 }
+                st.session_state['olcum'] = olcum
+                olcum.log_yaz(PERFORMANS_LOG)
                 st.session_state['analiz_yapildi'] = True
                 st.success(f"Bitti! Süre: {time.time() - start:.2f} sn")
 
@@ -852,43 +342,128 @@ if st.session_state.get('analiz_yapildi', False):
     
     df_es = res.get("eslesen", pd.DataFrame())
     
-    dfs_exp = {
-        "ÖZET_BAKIYE": res.get("ozet", pd.DataFrame()),
-        "Eşleşenler": df_es,
-        "Ödemeler": res.get("odeme", pd.DataFrame()),
-        "Bizde Var - Yok": res.get("un_biz", pd.DataFrame()),
-        "Onlarda Var - Yok": res.get("un_onlar", pd.DataFrame())
-    }
+    dfs_exp = rapor_sayfalari(res)
+    tablo_adlari = {"ozet": "📈 Özet", "eslesen": "✅ Eşleşenler", "odeme": "💰 Ödemeler",
+                    "un_biz": "🔴 Bizde Var", "un_onlar": "🔵 Onlarda Var"}
+    if "dagitim" in res:
+        tablo_adlari["dagitim"] = "🟣 Toplu Ödemeler"
+    t_heads = list(tablo_adlari.values())
+    iz = st.session_state.get('sonuc_izi') or sonuc_izi(res)
+    olcum = st.session_state.get('olcum')
+
+    def olculu(ad, uret):
+        """İndirme baytlarını üretir; süresi aynı çalıştırmanın ölçümüne ve loguna eklenir."""
+        def veri():
+            if olcum is None:
+                return uret()
+            with olcum.asama(ad) as k:
+                sonuc = uret()
+                k["cikti"] = len(sonuc)  # bayt
+            olcum.log_yaz(PERFORMANS_LOG, son=1)
+            return sonuc
+        return veri
 
     c1, c2 = st.columns(2)
     with c1:
-        st.download_button("📥 İndir (Ayrı Sayfalar)", excel_indir_coklu(dfs_exp), "Rapor.xlsx")
+        # Baytlar tıklanınca üretilir ve sonuç izine göre önbelleklenir; rerun'larda yazım yapılmaz
+        st.download_button("📥 İndir (Ayrı Sayfalar)", olculu("disa_aktarim_xlsx", lambda: rapor_baytlari(iz, "coklu", dfs_exp)),
+                           "Rapor.xlsx", on_click="ignore")
     with c2:
-        st.download_button("📥 İndir (Tek Liste)", excel_indir_tek_sayfa(dfs_exp), "Ozet.xlsx")
+        st.download_button("📥 İndir (Tek Liste)", olculu("disa_aktarim_tek_xlsx", lambda: rapor_baytlari(iz, "tek", dfs_exp)),
+                           "Ozet.xlsx", on_click="ignore")
+
+    with st.expander("📦 Diğer Biçimler (Parquet / CSV / Zip)"):
+        bilgi = st.session_state.get('calisma_bilgisi', {})
+        parquet_var = parquet_var_mi()
+        if not parquet_var:
+            st.caption("Parquet için pyarrow kurulu değil; zip paketinde sadece CSV olur.")
+        c_tablo, c_pq, c_csv = st.columns([2, 1, 1])
+        secili = c_tablo.selectbox("Tablo", list(tablo_adlari), format_func=tablo_adlari.get, key="aktarim_tablo")
+        df_secili = res.get(secili, pd.DataFrame())
+        with c_pq:
+            st.download_button("📥 Parquet", olculu("disa_aktarim_parquet", lambda: tablo_baytlari(df_secili, "parquet")),
+                               f"{secili}{BICIMLER['parquet'][0]}", on_click="ignore", disabled=not parquet_var)
+        with c_csv:
+            st.download_button("📥 CSV (gzip)", olculu("disa_aktarim_csv_gz", lambda: tablo_baytlari(df_secili, "csv.gz")),
+                               f"{secili}{BICIMLER['csv.gz'][0]}", on_click="ignore")
+        st.download_button("📥 Hepsi (Zip + manifest)",
+                           olculu("disa_aktarim_zip",
+                                  lambda: paket_baytlari(res, bilgi.get('parametreler'), bilgi.get('sureler'))),
+                           "Mutabakat.zip", on_click="ignore")
     
-    t_heads = ["📈 Özet", "✅ Eşleşenler", "💰 Ödemeler", "🔴 Bizde Var", "🔵 Onlarda Var"]
+    if olcum is not None:
+        with st.expander(f"⏱️ Performans ({olcum.toplam_sure():.2f} sn)"):
+            st.dataframe(olcum.tablo(), use_container_width=True, hide_index=True)
+            gecisler = next((a.get("gecisler") for a in olcum.asamalar if a["asama"] == "fatura"), None)
+            if gecisler:
+                st.caption("Fatura eşleştirme kademesi")
+                st.dataframe(pd.DataFrame(gecisler).rename(columns={"kural": "Kural", "eslesen": "Eşleşen",
+                                                                     "sure_sn": "Süre (sn)"}),
+                             use_container_width=True, hide_index=True)
+            st.caption(f"Çalıştırma: {olcum.calisma_id} · kayıtlar '{PERFORMANS_LOG}' dosyasına eklenir")
+
     tabs = st.tabs(t_heads)
-    
-    def highlight_cols(x):
-        return ['font-weight: bold' if col in ['Biz_Bakiye', 'Onlar_Bakiye', 'Kümüle_Fark'] else '' for col in x.index]
-    
+
+    # Görünümler (çözülmüş tarih/arama kolonları) sonuç değişene kadar oturumda tutulur
+    if st.session_state.get('gorunum_izi') != iz:
+        st.session_state['gorunumler'] = {}
+        st.session_state['gorunum_izi'] = iz
+    gorunumler = st.session_state['gorunumler']
+
+    def sonuc_tablosu(anahtar, fark_satirlari=False):
+        df = res.get(anahtar, pd.DataFrame())
+        if df.empty:
+            st.info("Kayıt yok")
+            return
+        g = gorunumler.setdefault(anahtar, TabloGorunumu(df))
+
+        f1_, f2_, f3_ = st.columns(3)
+        filtre = Filtre(
+            durumlar=f1_.multiselect("Durum", g.secenekler("Durum"), key=f"{anahtar}_durum"),
+            para_birimleri=f2_.multiselect("PB", g.secenekler("PB"), key=f"{anahtar}_pb"),
+            arama=f3_.text_input("Belge No / Ref ara", key=f"{anahtar}_ara"),
+        )
+        if g.kolon(TARIH_KOLONLARI):
+            t1_, t2_ = st.columns(2)
+            filtre.tarih_bas = t1_.date_input("Tarih (başlangıç)", value=None, format="DD.MM.YYYY", key=f"{anahtar}_tbas")
+            filtre.tarih_bit = t2_.date_input("Tarih (bitiş)", value=None, format="DD.MM.YYYY", key=f"{anahtar}_tbit")
+        tutar_kolonlari = [c for c in TUTAR_KOLONLARI if c in df.columns]
+        s1_, s2_, s3_, s4_ = st.columns(4)
+        if tutar_kolonlari:
+            filtre.tutar_kolonu = s1_.selectbox("Tutar kolonu", tutar_kolonlari, key=f"{anahtar}_tkol")
+            filtre.min_tutar = s2_.number_input("Min |tutar|", min_value=0.0, value=0.0, step=100.0, key=f"{anahtar}_tmin")
+        filtre.siralama = s3_.selectbox("Sırala", ["(Orijinal sıra)"] + list(df.columns), key=f"{anahtar}_sira")
+        filtre.artan = s4_.radio("Yön", ["Artan", "Azalan"], horizontal=True, key=f"{anahtar}_yon") == "Artan"
+
+        poz = g.pozisyonlar(filtre)
+        sayilar = g.durum_sayilari(poz)
+        if len(sayilar):
+            st.caption(f"{len(poz):,} / {len(df):,} satır — " + " · ".join(f"{d}: {n:,}" for d, n in sayilar.items()))
+        else:
+            st.caption(f"{len(poz):,} / {len(df):,} satır")
+
+        p1_, p2_ = st.columns(2)
+        sayfa_boyu = p1_.selectbox("Sayfa boyu", SAYFA_BOYLARI, key=f"{anahtar}_boy")
+        son_sayfa = sayfa_sayisi(len(poz), sayfa_boyu)
+        sayfa_no = min(int(p2_.number_input(f"Sayfa (1-{son_sayfa})", min_value=1, value=1, step=1,
+                                            key=f"{anahtar}_sayfa")), son_sayfa)
+        st.dataframe(sayfa_stili(g.sayfa(poz, sayfa_no, sayfa_boyu), fark_satirlari=fark_satirlari),
+                     use_container_width=True)
+
     with tabs[0]: 
-        try:
-            st.dataframe(res.get("ozet", pd.DataFrame()).style.apply(highlight_cols, axis=1).format(precision=2), use_container_width=True)
-        except:
-            st.dataframe(res.get("ozet", pd.DataFrame()), use_container_width=True)
+        # Özet ay × para birimi kadar satırdır; sayfalamaya gerek yok
+        st.dataframe(sayfa_stili(res.get("ozet", pd.DataFrame()), kalin_kolonlar=['Biz_Bakiye', 'Onlar_Bakiye', 'Kümüle_Fark'],
+                                 hassasiyet=2), use_container_width=True)
             
     with tabs[1]: 
-        if not df_es.empty:
-            def color_row(row):
-                return ['background-color: #ffe6e6' if "❌" in str(row['Durum']) else '' for _ in row]
-            st.dataframe(df_es.style.apply(color_row, axis=1), use_container_width=True)
-        else:
-            st.info("Kayıt yok")
+        sonuc_tablosu("eslesen", fark_satirlari=True)
     
     with tabs[2]:
-        st.dataframe(res.get("odeme", pd.DataFrame()), use_container_width=True)
+        sonuc_tablosu("odeme")
     with tabs[3]:
-        st.dataframe(res.get("un_biz", pd.DataFrame()), use_container_width=True)
+        sonuc_tablosu("un_biz")
     with tabs[4]:
-        st.dataframe(res.get("un_onlar", pd.DataFrame()), use_container_width=True)
+        sonuc_tablosu("un_onlar")
+    if "dagitim" in res:
+        with tabs[5]:
+            sonuc_tablosu("dagitim")